@@ -5,6 +5,7 @@ export type Unsubscriber = () => void;
 
 
 type ResponseAwaiter<T> = (value: T|null) => void;
+export type PartialHandler = (payload: any) => void;
 
 
 export type FinishedNormally = () => void;
@@ -35,7 +36,15 @@ export interface FailurePacket extends Packet {
     payload: string;
 }
 
-export type ResponsePacket = ResultPacket|FailurePacket;
+/**
+ * A preliminary result. The request stays open until the response arrives.
+ */
+export interface PartialPacket extends Packet {
+    type: "partial";
+    payload: any;
+}
+
+export type ResponsePacket = ResultPacket|FailurePacket|PartialPacket;
 
 
 export interface Channel<Receive extends Packet, Send extends Packet> {
@@ -162,6 +171,7 @@ export class RPCServer<T> {
 
 export class RPCClient {
     private _requests: Map<string, ResponseAwaiter<ResponsePacket|null>>;
+    private _partials: Map<string, PartialHandler>;
     private _instance_number: number;
     private _current_packet_counter: number;
 
@@ -170,6 +180,7 @@ export class RPCClient {
 
     constructor(channel: Channel<ResponsePacket, RequestPacket>) {
         this._requests = new Map();
+        this._partials = new Map();
         this._instance_number = _instance_counter++;
         this._current_packet_counter = 0;
 
@@ -192,8 +203,20 @@ export class RPCClient {
     _receive(packet: ResponsePacket) {
         // Drop packets not for us.
         if (!this._requests.has(packet.id)) return;
+
+        if (packet.type == "partial") {
+            const handler = this._partials.get(packet.id);
+            if (handler !== undefined) {
+                if (!!packet.buffers)
+                    packet.payload.buffers = packet.buffers;
+                handler(packet.payload);
+            }
+            return;
+        }
+
         const awaiter = this._requests.get(packet.id)!;
         this._requests.delete(packet.id);
+        this._partials.delete(packet.id);
         awaiter(packet);
     }
 
@@ -206,8 +229,8 @@ export class RPCClient {
             get: (_, name) => {
                 return name in cache
                     ? cache[name]
-                    : (cache[name] = (payload: any = {}, buffers: ArrayBuffer[]|undefined = undefined) => {
-                        return this.request(name.toString(), payload, buffers, cancel);
+                    : (cache[name] = (payload: any = {}, buffers: ArrayBuffer[]|undefined = undefined, onPartial: PartialHandler|undefined = undefined) => {
+                        return this.request(name.toString(), payload, buffers, cancel, onPartial);
                       })
                     ;
             }
@@ -218,7 +241,8 @@ export class RPCClient {
             name: string,
             payload: any,
             buffers: ArrayBuffer[]|undefined = undefined,
-            cancel: CancelRendezVous|undefined
+            cancel: CancelRendezVous|undefined,
+            onPartial: PartialHandler|undefined = undefined
     ): Promise<T> {
         const id = `${this._instance_number}--${this._current_packet_counter++}`;
         return new Promise((rs, rj) => {
@@ -244,11 +268,14 @@ export class RPCClient {
             if (cancel !== undefined) {
                 finished = cancel(() => {
                     this._requests.delete(id);
+                    this._partials.delete(id);
                     rj(new Error("Request timed out."));
                 });
             }
 
             this._requests.set(id, awaiter);
+            if (onPartial !== undefined)
+                this._partials.set(id, onPartial);
             this.channel.send({
                 id,
                 type: name,
@@ -263,6 +290,7 @@ export class RPCClient {
 
         const awaiters = [...this._requests.values()];
         this._requests.clear();
+        this._partials.clear();
         for (let awaiter of awaiters)
             awaiter(null);
     }
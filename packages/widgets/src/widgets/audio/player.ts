@@ -19,9 +19,9 @@ const BUFFER_HIGH_MARK_SECONDS = 30;
 const BUFFER_LOW_MARK_SECONDS = 2;
 
 
-function calculatePosition(sample: number): [number, number] {
-    const frame = Math.floor(sample / SAMPLES_PER_REQUEST);
-    const offset = sample % SAMPLES_PER_REQUEST;
+function calculatePosition(sample: number, samplesPerRequest: number): [number, number] {
+    const frame = Math.floor(sample / samplesPerRequest);
+    const offset = sample % samplesPerRequest;
 
     return [ frame, offset ];
 }
@@ -94,7 +94,9 @@ export class AudioPlayer {
         this._onpause = () => ctx.suspend();
 
         // Find out where the seeked position starts at.
-        let [nextFrame, currentOffset] = calculatePosition(startAt);
+        // The kernel might have resampled the audio, which shortens each chunk.
+        const samplesPerRequest = Math.round(SAMPLES_PER_REQUEST * this.source.resample_ratio);
+        let [nextFrame, currentOffset] = calculatePosition(startAt, samplesPerRequest);
 
         // Calculation for the UI.
         let currentSecond = 0;
@@ -120,7 +122,7 @@ export class AudioPlayer {
 
 
         let lastBuffers: ArrayBuffer[];
-        if (SAMPLES_PER_REQUEST - currentOffset > this.source.sample_rate) {
+        if (samplesPerRequest - currentOffset > this.source.sample_rate) {
             //   1. >1 second left at the sample to start:
             //      Make the offset negative to cause the initial buffer to
             //      take from beyond the start of b2 below.
@@ -131,7 +133,7 @@ export class AudioPlayer {
             //
             //      or before:
             lastBuffers = new Array(this.source.channels);
-            lastBuffers.fill(new ArrayBuffer(SAMPLES_PER_REQUEST*4));
+            lastBuffers.fill(new ArrayBuffer(samplesPerRequest*4));
             currentOffset *= -1;
         } else {
             //   2. <1 second left:
@@ -144,7 +146,7 @@ export class AudioPlayer {
                 return false;
             });
             nextFrame++;
-            currentOffset = SAMPLES_PER_REQUEST - currentOffset;
+            currentOffset = samplesPerRequest - currentOffset;
         }
 
         try {
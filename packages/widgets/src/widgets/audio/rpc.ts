@@ -2,17 +2,67 @@ import { Channel, Closable, RPCClient, RequestPacket, ResponsePacket, timeout }
 
 
 
+// The sample types we can decode, ordered by preference.
+const SAMPLE_TYPES = ["int16", "float32"];
+
+
+interface Transport {
+    sample_type: "float32"|"int16";
+    channel_count: number;
+    samples_per_second: number;
+}
+
+
 interface AudioMeta {
     channel_count: number;
     sample_count: number;
     samples_per_second: number;
     frames: number;
+
+    // Only sent if the kernel supports negotiating the transport.
+    transport?: Transport;
+    source_samples_per_second?: number;
 }
 
 
+interface WaveformResult {
+    done: boolean;
+    progress: number;
+
+    // Only set when the waveform is done.
+    bucket_size?: number;
+    buckets?: number;
+    channel_count?: number;
+    buffers: ArrayBuffer[];
+}
+
+
+export interface Waveform {
+    bucketSize: number;
+    buckets: number;
+
+    // The minimum, the maximum and the RMS of all buckets for each channel.
+    channels: { min: Float32Array, max: Float32Array, rms: Float32Array }[];
+}
+
+
+// How long to wait before asking again if the waveform is done.
+const WAVEFORM_POLL_INTERVAL = 500;
+
+
 export interface AudioRPC extends Closable {
-    meta(): Promise<AudioMeta>;
-    render(payload: { frame: number }): Promise<{ size: number, buffers: ArrayBuffer[] }>;
+    meta(payload: { transport: { sample_types: string[] } }): Promise<AudioMeta>;
+    render(payload: { frame: number, transport?: Transport }): Promise<{ size: number, buffers: ArrayBuffer[] }>;
+    waveform(): Promise<WaveformResult>;
+}
+
+
+function toFloat32(buffer: ArrayBuffer): ArrayBuffer {
+    const samples = new Int16Array(buffer);
+    const result = new Float32Array(samples.length);
+    for (let i = 0; i<samples.length; i++)
+        result[i] = samples[i] / 32767;
+    return result.buffer;
 }
 
 
@@ -28,6 +78,8 @@ export class AudioSource implements Closable {
     private _loaded: number = 0;
     private _samples: number = 0;
     private _sample_rate: number = 0;
+    private _source_sample_rate: number = 0;
+    private _transport: Transport|undefined = undefined;
 
     ondata: () => void = () => {};
 
@@ -65,21 +117,54 @@ export class AudioSource implements Closable {
         return this._frames;
     }
 
+    // The ratio between the transferred and the original sample rate.
+    get resample_ratio(): number {
+        return this._sample_rate / this._source_sample_rate;
+    }
+
     get duration(): number {
         return this._samples / this._sample_rate;
     }
 
     async loadMetadata() {
         if (this._frames === 0) {
-            const { frames, channel_count, samples_per_second, sample_count } = await this.rpc.meta();
+            const meta = await this.rpc.meta({ transport: { sample_types: SAMPLE_TYPES } });
+            const { frames, channel_count, samples_per_second, sample_count } = meta;
             this._frames = frames;
             this._sample_rate = samples_per_second;
+            this._source_sample_rate = meta.source_samples_per_second ?? samples_per_second;
+            this._transport = meta.transport;
             this._samples = sample_count;
             this._channels = channel_count
         }
         this.ondata();
     }
 
+    async loadWaveform(progress: (value: number) => void = () => {}): Promise<Waveform|null> {
+        // The kernel computes the waveform in the background.
+        while (this._open) {
+            const result = await this.rpc.waveform();
+            progress(result.progress);
+
+            if (result.done) {
+                const { bucket_size, buckets, channel_count, buffers } = result;
+                const channels = [];
+                for (let channel = 0; channel<channel_count; channel++) {
+                    const offset = channel * 3 * buckets * 4;
+                    channels.push({
+                        min: new Float32Array(buffers[0], offset, buckets),
+                        max: new Float32Array(buffers[0], offset + buckets * 4, buckets),
+                        rms: new Float32Array(buffers[0], offset + 2 * buckets * 4, buckets),
+                    });
+                }
+                return { bucketSize: bucket_size, buckets, channels };
+            }
+
+            await new Promise(rs => setTimeout(rs, WAVEFORM_POLL_INTERVAL));
+        }
+        return null;
+    }
+
     async render(start: number, received: (frameno: number, size: number, buffers: ArrayBuffer[]) => boolean) {
         if (this._frames === 0)
             await this.loadMetadata();
@@ -87,9 +172,13 @@ export class AudioSource implements Closable {
         for (let frame = start; frame<this._frames; frame++) {
             if (!this._open) break;
 
-            const { size, buffers } = await this.rpc.render({ frame });
+            let { size, buffers } = await this.rpc.render({ frame, transport: this._transport });
             this._loaded += size;
 
+            // The player only deals with float32.
+            if (this._transport?.sample_type === "int16")
+                buffers = buffers.map(toFloat32);
+
             if (!received(frame, size, buffers))
                 break;
         }
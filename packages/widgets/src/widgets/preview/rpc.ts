@@ -4,7 +4,37 @@ import { Channel, Closable, RPCClient, RequestPacket, ResponsePacket, timeout }
 
 export interface FrameResult {
     size: [number, number],
-    props: Record<string, string[]>,
+    props?: Record<string, string[]>,
+    image_size?: [number, number],
+    codec?: string,
+    mime?: string,
+    buffers?: ArrayBuffer[],
+
+    // Set if the request was superseded after its first image. No image is sent.
+    cancelled?: boolean
+}
+
+
+export interface PropsResult {
+    size: [number, number],
+    props: Record<string, string[]>
+}
+
+
+export interface PropsDeltaResult {
+    size: [number, number],
+    props?: Record<string, string[]>,
+    base?: number,
+    changed?: Record<string, string[]>,
+    removed?: string[]
+}
+
+
+export interface TileResult {
+    size: [number, number],
+    box: [number, number, number, number],
+    codec?: string,
+    mime?: string,
     buffers?: ArrayBuffer[]
 }
 
@@ -18,9 +48,92 @@ export interface PreviewRPC extends Closable {
     /**
      * Let the preview window render a frame.
      *
+     * @param frame        The frame number.
+     * @param progressive  Send a cheap image first. It is passed to onPartial.
+     *                     The final image is skipped if another frame is requested in the meantime.
+     */
+    frame(
+        payload: {frame: number, image?: 'clip'|'diff', zoom?: number, props?: boolean, codec?: string, progressive?: boolean},
+        buffers?: ArrayBuffer[],
+        onPartial?: (partial: FrameResult) => void
+    ): Promise<FrameResult>;
+
+    /**
+     * Returns the size and the properties of a frame without rendering it.
+     *
+     * @param frame  The frame number.
+     * @param base   A frame whose properties the client already knows.
+     *               The server then only sends the changes.
+     */
+    props(payload: {frame: number, image?: 'clip'|'diff', base?: number}): Promise<PropsDeltaResult>;
+
+    /**
+     * Let the preview window render a single tile of a frame.
+     *
      * @param frame  The frame number.
+     * @param zoom   The level of the tile pyramid as returned by previewScale.
+     * @param x      The column of the tile.
+     * @param y      The row of the tile.
      */
-    frame(payload: {frame: number, image?: 'clip'|'diff'}): Promise<FrameResult>;
+    tile(payload: {frame: number, image?: 'clip'|'diff', zoom: number, x: number, y: number, codec?: string}): Promise<TileResult>;
+}
+
+
+/**
+ * Rounds the zoom up to the next power of two.
+ *
+ * Below a zoom of 1 the server renders downscaled images. Rounding
+ * keeps the amount of different sizes per clip small.
+ */
+export function previewScale(zoom: number): number {
+    if (zoom >= 1) return 1;
+    return Math.pow(2, Math.ceil(Math.log2(Math.max(zoom, 1/64))));
+}
+
+
+const RAW_MIME = "application/x-yuuno-rgba";
+
+
+/**
+ * Prepends a bitmap header to uncompressed RGBA pixels.
+ *
+ * The browser shows the bitmap directly, so raw frames never have
+ * to be compressed on either side.
+ */
+function rgbaBitmap(pixels: ArrayBuffer, width: number, height: number): Blob {
+    const header = new DataView(new ArrayBuffer(122));
+    header.setUint16(0, 0x424D);                        // "BM"
+    header.setUint32(2, 122 + pixels.byteLength, true);
+    header.setUint32(10, 122, true);                    // Offset of the pixels
+
+    header.setUint32(14, 108, true);                    // BITMAPV4HEADER
+    header.setInt32(18, width, true);
+    header.setInt32(22, -height, true);                 // Top to bottom
+    header.setUint16(26, 1, true);
+    header.setUint16(28, 32, true);
+    header.setUint32(30, 3, true);                      // BI_BITFIELDS
+    header.setUint32(34, pixels.byteLength, true);
+    header.setUint32(54, 0x000000FF, true);             // Channel masks for RGBA
+    header.setUint32(58, 0x0000FF00, true);
+    header.setUint32(62, 0x00FF0000, true);
+    header.setUint32(66, 0xFF000000, true);
+    header.setUint32(70, 0x73524742, true);             // sRGB
+
+    return new Blob([header.buffer, pixels], { type: "image/bmp" });
+}
+
+
+/**
+ * Creates a blob the browser can show from an encoded image.
+ *
+ * @param buffer  The image data sent by the server.
+ * @param mime    The mime type reported by the server.
+ * @param size    The size of the image. Only required for raw images.
+ */
+export function imageBlob(buffer: ArrayBuffer, mime: string|undefined, size: [number, number]): Blob {
+    if (mime === RAW_MIME)
+        return rgbaBitmap(buffer, size[0], size[1]);
+    return new Blob([buffer], { type: mime ?? "image/png" });
 }
 
 
@@ -28,6 +141,9 @@ class CachedPreviewRPC implements PreviewRPC {
     private _cache: Map<string, Promise<FrameResult>> = new Map();
     private _lru: string[] = [];
 
+    // The last known properties of each image.
+    private _props: Map<string, {frame: number, props: Record<string, string[]>}> = new Map();
+
     private parent: PreviewRPC;
     private model: Backbone.Model;
 
@@ -38,6 +154,7 @@ class CachedPreviewRPC implements PreviewRPC {
 
     clear() {
         this._cache.clear();
+        this._props.clear();
     }
 
     open() {
@@ -53,19 +170,59 @@ class CachedPreviewRPC implements PreviewRPC {
     }
 
     frame(
-            { frame, image }: { frame: number, image?: 'clip'|'diff' }
+            { frame, image, zoom, codec, progressive }: { frame: number, image?: 'clip'|'diff', zoom?: number, codec?: string, progressive?: boolean },
+            buffers?: ArrayBuffer[],
+            onPartial?: (partial: FrameResult) => void
     ): Promise<FrameResult> {
         if (!image) image = "clip";
+        if (!codec) codec = this.model.get("codec");
+        const scale = previewScale(zoom ?? this.model.get("zoom"));
         const realId = this.model.get("clips")[this.model.get(image)];
-        const _lru_id = `${realId}--${image}--${frame}`;
+        const _lru_id = `${realId}--${image}--${frame}--${scale}--${codec}`;
         if (!this._cache.has(_lru_id)) {
             this._evict();
-            this._cache.set(_lru_id, this.parent.frame({ frame, image }));
+            // The properties are requested separately.
+            const result = this.parent.frame({ frame, image, zoom: scale, props: false, codec, progressive }, buffers, onPartial);
+            this._cache.set(_lru_id, result);
+
+            // A cancelled request has no image worth keeping.
+            result.then(({ cancelled }) => {
+                if (cancelled && this._cache.get(_lru_id) === result)
+                    this._cache.delete(_lru_id);
+            }, () => {});
         }
         this._hit(_lru_id);
         return this._cache.get(_lru_id)!;
     }
 
+    async props(
+            { frame, image }: { frame: number, image?: 'clip'|'diff' }
+    ): Promise<PropsResult> {
+        if (!image) image = "clip";
+        const realId = this.model.get("clips")[this.model.get(image)];
+        const key = `${realId}--${image}`;
+
+        const last = this._props.get(key);
+        const result = await this.parent.props({ frame, image, base: last?.frame });
+
+        let props: Record<string, string[]>;
+        if (result.base !== undefined && last !== undefined && result.base === last.frame) {
+            props = { ...last.props, ...result.changed };
+            for (const name of result.removed ?? [])
+                delete props[name];
+        } else {
+            props = result.props ?? {};
+        }
+
+        this._props.set(key, { frame, props });
+        return { size: result.size, props };
+    }
+
+    tile(payload: {frame: number, image?: 'clip'|'diff', zoom: number, x: number, y: number, codec?: string}): Promise<TileResult> {
+        // The images keep the tiles they show.
+        return this.parent.tile(payload);
+    }
+
     private _hit(id: string) {
         if (this._lru.indexOf(id) == 0) 
             return;
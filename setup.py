@@ -33,6 +33,11 @@ try:
 except ImportError:
     extensions = []
 
+# The compiled module only speeds up the audio conversion.
+# Don't fail the installation if there is no compiler.
+for extension in extensions:
+    extension.optional = True
+
 
 DIRNAME = os.path.dirname(__file__) if __file__ else os.getcwd()
 
@@ -141,7 +146,7 @@ requirements = [
 test_requirements = []
 
 extras_requires = {
-    'vapoursynth': ['vapoursynth', 'vsutil']
+    'vapoursynth': ['vapoursynth', 'vsutil', 'numpy']
 }
 
 
@@ -187,7 +192,7 @@ setup(
     ],
     package_dir={'yuuno_ipython': 'yuuno_ipython'},
     package_data={'yuuno_ipython': ['static/*', 'build/*']},
-    # ext_modules=extensions,
+    ext_modules=extensions,
     include_package_data=True,
     install_requires=requirements,
     license="GNU Affero General Public License v3 (AGPLv3)",
@@ -153,7 +153,7 @@ class TestVapourSynth(unittest.TestCase):
 
         self.assertEqual(len(VapourSynthClip(self.black_clip)), len(self.black_clip))
 
-        cpf = VapourSynthClip(self.black_clip_yuv444)[0].result().compat_frame
+        cpf = VapourSynthClip(self.black_clip_yuv444)[0].result().render_compat().result()
         self.assertEqual(cpf.format.id, self.vs.COMPATBGR32)
         self.assertEqual(cpf.width, self.black_clip_yuv444.width)
         self.assertEqual(cpf.height, self.black_clip_yuv444.height)
@@ -163,7 +163,7 @@ class TestVapourSynth(unittest.TestCase):
 
         self.assertEqual(len(VapourSynthFrame(self.black_clip.get_frame(0))), 1)
 
-        cpf = VapourSynthFrame(self.black_clip_yuv444.get_frame(0))[0].result().compat_frame
+        cpf = VapourSynthFrame(self.black_clip_yuv444.get_frame(0))[0].result().render_compat().result()
         self.assertEqual(cpf.format.id, self.vs.COMPATBGR32)
         self.assertEqual(cpf.width, self.black_clip_yuv444.width)
         self.assertEqual(cpf.height, self.black_clip_yuv444.height)
@@ -173,3 +173,310 @@ class TestVapourSynth(unittest.TestCase):
         import vapoursynth
         self.assertEqual(ns['vs'], vapoursynth)
         self.assertIn('core', ns)
+
+    def test_008_vapoursynth_plane_buffer(self):
+        from yuuno.vs.clip import plane_buffer, plane_data
+
+        frame = self.black_clip_yuv420.get_frame(0)
+        buf = plane_buffer(frame, 1)
+        self.assertEqual(buf.shape, (5, 5))
+        self.assertEqual(buf.strides, (frame.get_stride(1), 1))
+        self.assertTrue(buf.readonly)
+
+        data = plane_data(frame, 1)
+        self.assertEqual(len(data), 5 * 5)
+        self.assertEqual(bytes(data), b"\x80" * 25)
+
+        # The view must keep the frame alive.
+        del frame
+        self.assertEqual(buf.tobytes()[:1], b"\x80")
+
+    def test_009_vapoursynth_lazy_conversion(self):
+        from yuuno.vs.clip import VapourSynthClip
+
+        frame = VapourSynthClip(self.black_clip_yuv420)[0].result()
+        self.assertEqual(frame.size(), (10, 10))
+        frame.format()
+        frame.properties()
+        self.assertIsNone(frame.rgb_frame)
+        self.assertIsNone(frame.compat_frame)
+
+        frame.to_pil()
+        self.assertIsNotNone(frame.pil_cache)
+
+        # The converted frames are released once the image has been extracted.
+        self.assertIsNone(frame.rgb_frame)
+        self.assertIsNone(frame.compat_frame)
+
+    def test_010_vapoursynth_frame_cache(self):
+        from yuuno.vs.clip import VapourSynthClip
+
+        extension = Yuuno.instance().get_extension(VapourSynth)
+        clip = VapourSynthClip(self.black_clip_yuv444)
+
+        first = clip[0].result()
+        first.to_pil()
+        self.assertIs(clip[0].result(), first)
+        self.assertEqual(extension.frame_cache.statistics().hits, 1)
+
+        extension.yuv_matrix = "601"
+        self.assertEqual(len(extension.frame_cache), 0)
+        self.assertIsNot(clip[0].result(), first)
+
+    def test_011_vapoursynth_scaled_clip(self):
+        from yuuno.vs.clip import VapourSynthClip
+
+        clip = VapourSynthClip(self.black_clip_yuv444)
+        self.assertIs(clip.scaled(1), clip)
+
+        scaled = clip.scaled(0.5)
+        self.assertIs(clip.scaled(0.5), scaled)
+
+        frame = scaled[0].result()
+        self.assertEqual(frame.size(), (10, 10))
+        self.assertEqual(frame.to_pil().size, (5, 5))
+
+    def test_012_vapoursynth_region(self):
+        from yuuno.clip import Box
+        from yuuno.vs.clip import VapourSynthClip
+
+        clip = VapourSynthClip(self.black_clip_yuv444)
+        region = clip.region(0.5, Box(2, 0, 3, 2))
+        self.assertIs(clip.region(0.5, Box(2, 0, 3, 2)), region)
+
+        frame = region[0].result()
+        self.assertEqual(frame.size(), (10, 10))
+        self.assertEqual(frame.to_pil().size, (3, 2))
+
+    def test_013_vapoursynth_native_planes(self):
+        from yuuno.clip import RawFormat
+        from yuuno.vs.clip import VapourSynthClip
+
+        clip = self.core.std.BlankClip(width=10, height=10, format=self.vs.YUV420P16, color=[1023, 512, 512])
+        frame = VapourSynthClip(clip)[0].result()
+
+        fmt, planes = frame.native_planes()
+        self.assertEqual(fmt.bits_per_sample, 16)
+        self.assertEqual(fmt.family, RawFormat.ColorFamily.YUV)
+        self.assertEqual([tuple(p.shape) for p in planes], [(10, 10), (5, 5), (5, 5)])
+        self.assertEqual(planes[0][0][0], 1023)
+        self.assertEqual(planes[1][4][4], 512)
+
+    def test_014_vapoursynth_alpha_clip(self):
+        from yuuno.vs.clip import VapourSynthAlphaClip
+
+        alpha = self.core.std.BlankClip(width=10, height=10, format=self.vs.GRAY8, color=128)
+        clip = VapourSynthAlphaClip((self.black_clip_yuv444, alpha))
+
+        frame = clip[0].result()
+        image = frame.to_pil()
+        self.assertEqual(image.mode, "RGBA")
+        self.assertEqual(image.size, (10, 10))
+        self.assertEqual(image.getpixel((0, 0))[3], 128)
+        self.assertIsInstance(frame.properties(), dict)
+
+    def test_015_vapoursynth_get_frames(self):
+        from yuuno.vs.clip import VapourSynthClip
+
+        clip = VapourSynthClip(self.black_clip_yuv444 * 10)
+        frames = list(clip.get_frames(range(10), prefetch=4))
+        self.assertEqual([f.frameno for f in frames], list(range(10)))
+
+    def test_016_vapoursynth_release_frames(self):
+        from yuuno.vs.clip import VapourSynthClip, live_frames
+
+        extension = Yuuno.instance().get_extension(VapourSynth)
+        before = live_frames()
+
+        frame = VapourSynthClip(self.black_clip_yuv420)[0].result()
+        self.assertEqual(live_frames(), before + 1)
+
+        frame.render_rgb().result()
+        self.assertEqual(live_frames(), before + 2)
+
+        frame.to_pil()
+        self.assertEqual(live_frames(), before + 1)
+
+        with frame:
+            pass
+        self.assertEqual(live_frames(), before)
+        self.assertEqual(len(extension.frame_cache), 0)
+
+    def test_017_vapoursynth_properties(self):
+        from yuuno.vs.clip import VapourSynthClip, simplify_props
+
+        frame = VapourSynthClip(self.black_clip_yuv444)[0].result()
+        self.assertIs(frame.properties(), frame.properties())
+
+        self.assertEqual(simplify_props(b"\x00" * 1024), ["<1024 bytes>"])
+        self.assertEqual(simplify_props(b"abc"), [repr(b"abc")])
+
+    def test_018_vapoursynth_cache_key(self):
+        from yuuno.vs.clip import VapourSynthClip
+
+        clip = VapourSynthClip(self.black_clip_yuv444)
+        # Wrapping the same node again renders the same images.
+        self.assertEqual(clip.cache_key(), VapourSynthClip(self.black_clip_yuv444).cache_key())
+        self.assertNotEqual(clip.cache_key(), clip.scaled(0.5).cache_key())
+        self.assertNotEqual(clip.scaled(0.5).cache_key(), clip.region(0.5, (0, 0, 4, 4)).cache_key())
+
+    def test_019_vapoursynth_wrapped_native_planes(self):
+        from contextlib import contextmanager
+        from yuuno.utils import inline_resolved
+        from yuuno.vs.policy.clip import WrappedFrame as PolicyFrame
+        from yuuno.vs.vsscript.clip import WrappedFrame as ScriptFrame
+
+        class FakeEnvironment(object):
+            active = False
+
+            @contextmanager
+            def use(self):
+                self.active = True
+                try:
+                    yield
+                finally:
+                    self.active = False
+
+            @inline_resolved
+            def perform(self, cb):
+                with self.use():
+                    return cb()
+
+        class FakeFrame(object):
+            def __init__(self, env):
+                self.env = env
+
+            def native_planes(self):
+                assert self.env.active
+                return "format", ["plane"]
+
+        for wrapper in (PolicyFrame, ScriptFrame):
+            with self.subTest(wrapper=wrapper.__module__):
+                env = FakeEnvironment()
+                self.assertEqual(wrapper(env, FakeFrame(env)).native_planes(), ("format", ["plane"]))
+                self.assertFalse(env.active)
+
+    def test_020_vapoursynth_concurrent_render(self):
+        from concurrent.futures import Future
+        from yuuno.vs.clip import VapourSynthFrameWrapper
+
+        class PendingNode(object):
+            def __init__(self):
+                self.requests = []
+
+            def get_frame_async(self, frameno):
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self.requests.append(future)
+                return future
+
+        node = PendingNode()
+        source = self.black_clip.get_frame(0)
+        frame = VapourSynthFrameWrapper(source, rgb_node=node, owns_frame=False)
+
+        first, second = frame.render_rgb(), frame.render_rgb()
+        self.assertEqual(len(node.requests), 1)
+
+        rendered = self.black_clip.get_frame(0)
+        node.requests[0].set_result(rendered)
+        self.assertIs(first.result(), rendered)
+        self.assertIs(second.result(), rendered)
+        self.assertIs(frame.render_rgb().result(), rendered)
+        self.assertEqual(len(node.requests), 1)
+
+    def test_021_vapoursynth_shared_close(self):
+        from yuuno.vs.clip import VapourSynthClip
+
+        clip = VapourSynthClip(self.black_clip_yuv444)
+        first, second = clip[0].result(), clip[0].result()
+        self.assertIs(first, second)
+
+        # The other user still works with the frame.
+        first.close()
+        self.assertIsNotNone(second.frame)
+        self.assertEqual(second.to_pil().size, (10, 10))
+
+        second.close()
+        self.assertIsNone(second.frame)
+        self.assertIsNot(clip[0].result(), second)
+
+    def test_022_vapoursynth_planes_outlive_close(self):
+        from yuuno.vs.clip import VapourSynthClip
+
+        clip = self.core.std.BlankClip(width=10, height=10, format=self.vs.GRAY8, color=42)
+        frame = VapourSynthClip(clip)[0].result()
+        _, planes = frame.native_planes()
+
+        frame.close()
+        self.assertIsNone(frame.frame)
+        self.assertEqual(bytes(memoryview(planes[0]).tobytes()), b"\x2a" * 100)
+
+    def test_023_vapoursynth_concurrent_to_pil(self):
+        from concurrent.futures import Future
+        from yuuno.vs.flags import Features
+        from yuuno.vs.clip import VapourSynthFrameWrapper
+
+        class PendingNode(object):
+            def __init__(self):
+                self.requests = []
+
+            def get_frame_async(self, frameno):
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self.requests.append(future)
+                return future
+
+        node = PendingNode()
+        source = self.black_clip.get_frame(0)
+        frame = VapourSynthFrameWrapper(source, rgb_node=node, compat_node=node, owns_frame=False)
+
+        first, second = frame.to_pil_async(), frame.to_pil_async()
+        self.assertEqual(len(node.requests), 1)
+
+        # The first caller must not close the frame the second one still extracts.
+        converted = self.black_clip if frame.extension.merge_bands or Features.API4 else self.black_compat
+        node.requests[0].set_result(converted.get_frame(0))
+        self.assertIs(first.result(), second.result())
+        self.assertEqual(second.result().size, (source.width, source.height))
+        self.assertIsNone(frame.rgb_frame)
+
+    def test_024_vapoursynth_close_shared_frame(self):
+        from yuuno.vs.clip import VapourSynthClip, live_frames
+
+        extension = Yuuno.instance().get_extension(VapourSynth)
+        clip = VapourSynthClip(self.black_clip_yuv444)
+        before = live_frames()
+
+        # The second request is served by the frame cache.
+        with clip[0].result() as first:
+            first.to_pil()
+            with clip[0].result() as second:
+                self.assertIs(first, second)
+            self.assertIsNotNone(first.frame)
+
+        self.assertIsNone(first.frame)
+        self.assertEqual(live_frames(), before)
+        self.assertEqual(len(extension.frame_cache), 0)
+
+        # Encoding a frame does not keep it alive either.
+        output = Yuuno.instance().output
+        output.encoded_cache.clear()
+        output.encode_frame(clip, 0).result()
+        self.assertEqual(live_frames(), before)
+
+    def test_025_vapoursynth_region_post_processor(self):
+        from yuuno.clip import Box
+        from yuuno.vs.clip import VapourSynthClip
+
+        white = self.core.std.BlankClip(width=5, height=10, format=self.vs.RGB24, color=[255, 255, 255])
+        black = self.core.std.BlankClip(width=5, height=10, format=self.vs.RGB24)
+        clip = VapourSynthClip(self.core.std.StackHorizontal([white, black]))
+
+        # The post-processor sees the whole frame and not only the region.
+        extension = Yuuno.instance().get_extension(VapourSynth)
+        extension.post_processor = lambda c: c.std.FlipHorizontal()
+        try:
+            self.assertEqual(clip.region(1, Box(0, 0, 5, 10))[0].result().to_pil().getpixel((0, 0)), (0, 0, 0))
+            self.assertEqual(clip.scaled(0.5)[0].result().to_pil().getpixel((0, 0)), (0, 0, 0))
+        finally:
+            extension.post_processor = None
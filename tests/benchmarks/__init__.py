@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import os
+import sys
+import json
+import time
+import platform
+import typing as t
+
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+}
+
+
+def measure(func: t.Callable[[], t.Any], *, repeat: int = 5, number: int = 1) -> float:
+    """
+    Runs the function and returns the best time per call in seconds.
+
+    :param func:    The function to measure.
+    :param repeat:  How often the measurement is repeated.
+    :param number:  How often the function is called per measurement.
+    :return: The fastest time per call.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def print_table(header: t.Sequence[str], rows: t.Iterable[t.Sequence[t.Any]], file: t.TextIO = None) -> None:
+    """
+    Prints the rows as a table.
+
+    :param file: The stream to write to. Defaults to stdout.
+    """
+    file = file or sys.stdout
+    rows = [[str(c) for c in row] for row in rows]
+    widths = [max(len(str(h)), *(len(r[i]) for r in rows)) for i, h in enumerate(header)]
+    print("  ".join(h.ljust(w) for h, w in zip(header, widths)), file=file)
+    print("  ".join("-" * w for w in widths), file=file)
+    for row in rows:
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)), file=file)
+
+
+def environment() -> t.Dict[str, t.Any]:
+    """
+    Describes the machine and the versions the benchmark ran with.
+    """
+    import yuuno
+    info = {
+        "yuuno": yuuno.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    try:
+        import vapoursynth
+    except ImportError:
+        pass
+    else:
+        info["vapoursynth"] = vapoursynth.core.version_number()
+    return info
+
+
+def write_json(path: str, benchmark: str, results: t.Sequence[t.Dict[str, t.Any]]) -> None:
+    """
+    Writes the results in a machine-readable form, so runs of different releases can be compared.
+
+    :param path:      The file to write to. "-" writes to stdout.
+    :param benchmark: The name of the benchmark.
+    :param results:   One dictionary per measurement.
+    """
+    document = {
+        "benchmark": benchmark,
+        "environment": environment(),
+        "results": list(results),
+    }
+
+    if path == "-":
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
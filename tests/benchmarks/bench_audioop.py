@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compares the integer to float32 conversion of audio samples
+against the per-sample loop it replaced. The compiled module
+is only measured if it was built with
+``python setup.py build_ext --inplace``.
+
+The input is one chunk of the audio widget: 24 VapourSynth
+audio frames of 3072 samples each.
+
+Run with ``python -m tests.benchmarks.bench_audioop``.
+"""
+import random
+from array import array
+from unittest import mock
+
+from tests.benchmarks import measure, print_table
+from yuuno.vs import audioop
+
+
+SAMPLES = 24 * 3072
+
+
+def legacy(inp, bits_per_sample):
+    # The implementation before the vectorized conversion.
+    def clamp(v, min, max):
+        if v < min:
+            return min
+        elif v > max:
+            return max
+        else:
+            return v
+
+    samples = memoryview(inp).cast("H" if bits_per_sample <= 16 else "I")
+    data = bytearray(len(samples) * 4)
+    view = memoryview(data).cast("f")
+    shifted_by = 1 << (bits_per_sample-1)
+    max_pos_value = shifted_by - 1
+    for i, v in enumerate(samples):
+        view[i] = clamp((v - shifted_by) / max_pos_value, -1.0, 1)
+    return bytes(data)
+
+
+def python(inp, bits_per_sample):
+    with mock.patch.multiple(audioop, _audioop=None, numpy=None):
+        return audioop.to_float32_le(inp, bits_per_sample)
+
+
+def numpy(inp, bits_per_sample):
+    with mock.patch.object(audioop, "_audioop", None):
+        return audioop.to_float32_le(inp, bits_per_sample)
+
+
+def main():
+    rows = []
+    for bits, width in ((16, 2), (24, 4), (32, 4)):
+        # Uniform noise at full scale. It contains the smallest sample, which has to be clamped.
+        largest = (1 << (bits - 1)) - 1
+        data = array("h" if width == 2 else "i", [random.randint(-largest - 1, largest) for _ in range(SAMPLES)]).tobytes()
+
+        t_legacy = measure(lambda: legacy(data, bits), repeat=3)
+        t_python = measure(lambda: python(data, bits), repeat=3)
+        if audioop.numpy is not None:
+            t_numpy = measure(lambda: numpy(data, bits))
+            numpy_result = f"{SAMPLES/t_numpy/1e6:.1f}M/s ({t_legacy/t_numpy:.0f}x)"
+        else:
+            numpy_result = "not installed"
+        if audioop._audioop is not None:
+            t_compiled = measure(lambda: audioop.to_float32_le(data, bits))
+            compiled_result = f"{SAMPLES/t_compiled/1e6:.1f}M/s ({t_legacy/t_compiled:.0f}x)"
+        else:
+            compiled_result = "not built"
+
+        rows.append((
+            f"{bits} bit",
+            f"{SAMPLES/t_legacy/1e6:.2f}M/s",
+            f"{SAMPLES/t_python/1e6:.2f}M/s ({t_legacy/t_python:.1f}x)",
+            numpy_result,
+            compiled_result,
+        ))
+
+    print_table(("input", "per-sample loop", "python fallback", "numpy", "compiled"), rows)
+
+
+if __name__ == "__main__":
+    main()
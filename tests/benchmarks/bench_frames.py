@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Measures the per-frame overhead of the frame wrappers.
+
+At 1000 frames per second each frame has a budget of 1ms. The table
+shows how much of it is spent on wrapping the frame alone.
+
+Run with ``python -m tests.benchmarks.bench_frames``. Requires VapourSynth.
+"""
+from traitlets import HasTraits, Instance, Integer, Any, Bool
+
+import vapoursynth as vs
+from vapoursynth import VideoFrame, VideoNode
+
+from tests.benchmarks import measure, print_table
+from tests.helpers import TestEnvironment
+from yuuno import Yuuno
+from yuuno.core.settings import Settings
+from yuuno.vs.extension import VapourSynth
+from yuuno.vs.clip import VapourSynthClip, VapourSynthFrameWrapper
+
+
+FRAMES = 1000
+
+
+class LegacyFrameWrapper(HasTraits):
+    # The traits of the wrapper before it used slots.
+    pil_cache = Any(None, allow_none=True)
+    frame = Instance(VideoFrame, allow_none=True)
+    frameno = Integer(0)
+    rgb_frame = Instance(VideoFrame, allow_none=True)
+    compat_frame = Instance(VideoFrame, allow_none=True)
+    rgb_node = Instance(VideoNode, allow_none=True)
+    compat_node = Instance(VideoNode, allow_none=True)
+    cache_key = Any(None, allow_none=True)
+    owns_frame = Bool(True)
+
+    @property
+    def extension(self):
+        return Yuuno.instance().get_extension(VapourSynth)
+
+
+def main():
+    Settings.DEFAULT_EXTENSION_TYPES.clear()
+    Settings.DEFAULT_EXTENSION_TYPES.append('yuuno.vs.extension.VapourSynth')
+    Yuuno.instance(environment=TestEnvironment()).start()
+
+    extension = Yuuno.instance().get_extension(VapourSynth)
+    extension.frame_cache_size = 0
+
+    node = vs.core.std.BlankClip(width=16, height=16, format=vs.YUV420P8, length=FRAMES)
+    frame = node.get_frame(0)
+
+    def legacy():
+        for n in range(FRAMES):
+            wrapper = LegacyFrameWrapper(frame=frame, frameno=n, rgb_node=node, compat_node=node)
+            wrapper.extension.raw_force_compat
+
+    def slotted():
+        for n in range(FRAMES):
+            wrapper = VapourSynthFrameWrapper(frame, n, rgb_node=node, compat_node=node, extension=extension)
+            wrapper.extension.raw_force_compat
+
+    clip = VapourSynthClip(node)
+
+    def requests():
+        for n in range(FRAMES):
+            clip[n].result().close()
+
+    rows = []
+    for name, func in (("HasTraits wrapper", legacy), ("slotted wrapper", slotted), ("clip[n] request", requests)):
+        per_frame = measure(func) / FRAMES
+        rows.append((
+            name,
+            f"{per_frame*1e6:.1f}us",
+            f"{per_frame/1e-3*100:.1f}%",
+        ))
+
+    print_table(("path", "per frame", f"of the 1ms budget at {FRAMES} fps"), rows)
+    Yuuno.instance().stop()
+
+
+if __name__ == "__main__":
+    main()
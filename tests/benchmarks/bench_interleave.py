@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compares the RGB interleaving of extract_image against the old bytearray path
+and the fused RGBA assembly of alpha clips against putalpha.
+
+Run with ``python -m tests.benchmarks.bench_interleave``. Requires numpy.
+
+The planes are passed as two dimensional views with padded lines,
+like the ones VapourSynth frames return.
+"""
+import os
+
+import numpy
+from PIL import Image
+
+from tests.benchmarks import RESOLUTIONS, measure, print_table
+from yuuno.vs.interleave import Interleaver
+
+
+# VapourSynth aligns each line to 64 bytes on AVX2 machines.
+ALIGNMENT = 64
+
+
+def legacy(r, g, b):
+    # The implementation of extract_image before the interleaver.
+    # Reading the planes packed their lines into a new bytes-object.
+    r, g, b = r.tobytes(), g.tobytes(), b.tobytes()
+    data = bytearray(len(r)*4)
+    data[0::4] = b
+    data[1::4] = g
+    data[2::4] = r
+    return bytes(data)
+
+
+def legacy_alpha(planes, alpha, width, height):
+    # Interleave RGB, then let PIL copy the alpha plane into the image.
+    data = Interleaver().interleave(planes, width, height)
+    image = Image.frombuffer("RGB", (width, height), data, "raw", "RGB", 0, 1)
+    image.putalpha(Image.frombuffer("L", (width, height), alpha.tobytes(), "raw", "L", 0, 1))
+    return image
+
+
+def fused_alpha(planes, alpha, width, height):
+    data = Interleaver(channels=4).interleave(planes + [alpha], width, height)
+    return Image.frombuffer("RGBA", (width, height), data, "raw", "RGBA", 0, 1)
+
+
+def planes(width, height, count=3):
+    stride = (width + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+    return [
+        memoryview(numpy.frombuffer(os.urandom(stride * height), dtype=numpy.uint8).reshape(height, stride)[:, :width])
+        for _ in range(count)
+    ]
+
+
+def main():
+    rows = []
+    for name, (width, height) in RESOLUTIONS.items():
+        r, g, b = planes(width, height)
+        interleaver = Interleaver()
+
+        t_legacy = measure(lambda: legacy(r, g, b))
+        t_interleave = measure(lambda: interleaver.interleave([r, g, b], width, height))
+
+        rows.append((
+            name,
+            f"{t_legacy*1000:.2f}ms",
+            f"{t_interleave*1000:.2f}ms",
+            f"{t_legacy/t_interleave:.1f}x"
+        ))
+
+    print_table(("resolution", "legacy", "interleave", "speedup"), rows)
+    print()
+
+    rows = []
+    for name, (width, height) in RESOLUTIONS.items():
+        r, g, b, a = planes(width, height, 4)
+
+        t_legacy = measure(lambda: legacy_alpha([r, g, b], a, width, height))
+        t_fused = measure(lambda: fused_alpha([r, g, b], a, width, height))
+
+        rows.append((
+            name,
+            f"{t_legacy*1000:.2f}ms",
+            f"{t_fused*1000:.2f}ms",
+            f"{t_legacy/t_fused:.1f}x"
+        ))
+
+    print_table(("resolution", "putalpha", "fused rgba", "speedup"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Times each stage between a VapourSynth frame and the preview widget.
+
+The stages are measured separately on synthetic clips of several
+formats and resolutions:
+
+* ``get_frame``:      Requesting the source frame from VapourSynth.
+* ``to_rgb32``:       Requesting the frame of the RGB24-conversion.
+* ``extract_image``:  Interleaving the RGB24-frame into a PIL image.
+* ``extract_plane``:  Mapping a single plane into a PIL image.
+* ``bytes_of``:       Encoding the image as PNG.
+* ``subprocess``:     Transferring the frame out of a script subprocess.
+* ``encode``:         Throughput of the raw outputter into /dev/null.
+
+Run with ``python -m tests.benchmarks.bench_pipeline [--json results.json]``.
+Requires VapourSynth.
+"""
+import os
+import sys
+import argparse
+
+import vapoursynth as vs
+
+from tests.benchmarks import RESOLUTIONS, measure, print_table, write_json
+from tests.helpers import TestEnvironment
+from yuuno import Yuuno
+from yuuno.core.settings import Settings
+from yuuno.vs.clip import VapourSynthClip, extract_image, extract_plane
+from yuuno.vs.provider import VSStandaloneScript
+from yuuno.multi_scripts.subprocess.provider import ScriptProvider, ScriptProviderRegistration
+from yuuno_ipython.ipy_vs.outputter import encode
+
+
+FORMATS = {
+    "GRAY8": vs.GRAY8,
+    "YUV420P8": vs.YUV420P8,
+    "YUV420P10": vs.YUV420P10,
+    "YUV444P16": vs.YUV444P16,
+    "RGB24": vs.RGB24,
+}
+
+# The frames measured per stage. Each frame is only requested once, so VapourSynth cannot serve it from its cache.
+FRAMES = 10
+
+
+class StandaloneProvider(ScriptProvider):
+    """
+    Runs the script of the subprocess in the VapourSynth core of the subprocess.
+    """
+
+    def initialize(self, env) -> None:
+        self.script = VSStandaloneScript(env)
+
+    def get_script(self):
+        return self.script
+
+
+def synthetic(fmt: int, width: int, height: int, length: int) -> vs.VideoNode:
+    """
+    Creates a clip with some structure, so the PNG encoder has something to compress.
+    """
+    core = vs.core
+    clip = core.std.BlankClip(width=width, height=height, format=fmt, length=length)
+    try:
+        return core.std.Expr(clip, "X Y + N + 255 %" if fmt != vs.YUV444P16 else "X Y * N + 65535 %")
+    except (vs.Error, AttributeError):
+        # Older cores do not know the coordinates in Expr.
+        return clip
+
+
+def per_frame(func, frames=FRAMES, repeat=3):
+    # A new range of frames for every repetition.
+    counter = iter(range(frames * repeat * 2))
+    def _run():
+        for _ in range(frames):
+            func(next(counter))
+    return measure(_run, repeat=repeat) / frames
+
+
+def measure_clip(node: vs.VideoNode):
+    wrapper = VapourSynthClip(node)
+    rgb = wrapper.to_rgb32(node)
+    output = Yuuno.instance().output
+
+    results = {
+        "get_frame": per_frame(lambda n: node.get_frame_async(n).result()),
+        "to_rgb32": per_frame(lambda n: rgb.get_frame(n)),
+    }
+
+    frame = rgb.get_frame(0)
+    image = extract_image(frame)
+    results["extract_image"] = measure(lambda: extract_image(frame))
+    results["extract_plane"] = measure(lambda: extract_plane(frame, 0))
+    results["bytes_of"] = measure(lambda: output.bytes_of(image), repeat=3)
+    return results
+
+
+def measure_encode(node: vs.VideoNode):
+    def _run():
+        with open(os.devnull, "wb") as f:
+            encode(node, f)
+    return measure(_run, repeat=3) / len(node)
+
+
+def measure_subprocess(fmt_name: str, width: int, height: int):
+    from yuuno.multi_scripts.subprocess.manager import SubprocessScriptManager
+
+    registration = ScriptProviderRegistration(providercls=f"{__name__}.StandaloneProvider", extensions=[])
+    manager = SubprocessScriptManager(registration.with_config())
+    try:
+        script = manager.create("benchmark", initialize=True)
+        script.execute(
+            "import vapoursynth as vs\n"
+            f"from {__name__} import synthetic\n"
+            f"synthetic(vs.{fmt_name}, {width}, {height}, {FRAMES * 6}).set_output()\n"
+        ).result()
+        clip = script.get_results().result()["0"]
+
+        # ProxyFrames cache their data, so every measurement needs a new frame.
+        return per_frame(lambda n: clip[n].result().to_raw())
+    finally:
+        manager.disable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the frame-to-widget pipeline.")
+    parser.add_argument("--json", metavar="PATH", help="Writes the results as JSON. Use - for stdout.")
+    parser.add_argument("--resolution", action="append", choices=list(RESOLUTIONS), help="Only measure these resolutions.")
+    parser.add_argument("--format", action="append", choices=list(FORMATS), help="Only measure these formats.")
+    parser.add_argument("--no-subprocess", action="store_true", help="Skip the subprocess transfer.")
+    args = parser.parse_args()
+
+    Settings.DEFAULT_EXTENSION_TYPES.clear()
+    Settings.DEFAULT_EXTENSION_TYPES.append('yuuno.vs.extension.VapourSynth')
+    Yuuno.instance(environment=TestEnvironment()).start()
+
+    results = []
+    for res_name in args.resolution or RESOLUTIONS:
+        width, height = RESOLUTIONS[res_name]
+        for fmt_name in args.format or FORMATS:
+            node = synthetic(FORMATS[fmt_name], width, height, FRAMES * 6)
+
+            stages = measure_clip(node)
+            stages["encode"] = measure_encode(node)
+            if not args.no_subprocess:
+                try:
+                    stages["subprocess"] = measure_subprocess(fmt_name, width, height)
+                except Exception as e:
+                    print(f"subprocess transfer failed for {fmt_name} {res_name}: {e}", file=sys.stderr)
+
+            for stage, seconds in stages.items():
+                results.append({
+                    "stage": stage,
+                    "format": fmt_name,
+                    "resolution": res_name,
+                    "width": width,
+                    "height": height,
+                    "seconds_per_frame": seconds,
+                    "frames_per_second": 1 / seconds if seconds > 0 else None,
+                })
+
+    print_table(
+        ("stage", "format", "resolution", "per frame", "fps"),
+        [
+            (r["stage"], r["format"], r["resolution"], f"{r['seconds_per_frame']*1000:.2f}ms", f"{r['frames_per_second'] or 0:.1f}")
+            for r in results
+        ],
+        # Keep stdout clean for the JSON document.
+        file=sys.stderr if args.json == "-" else sys.stdout
+    )
+
+    if args.json:
+        write_json(args.json, "pipeline", results)
+
+    Yuuno.instance().stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compares Pillow's PNG encoder against the parallel PNG writer
+with an increasing number of threads.
+
+Run with ``python -m tests.benchmarks.bench_png``. Requires numpy.
+"""
+import os
+from io import BytesIO
+
+import numpy
+from PIL import Image
+
+from tests.benchmarks import RESOLUTIONS, measure, print_table
+from yuuno.output.parallel_png import write_png
+
+
+def frame(width, height):
+    # A gradient with some grain, which compresses roughly like a video frame.
+    y, x = numpy.mgrid[0:height, 0:width]
+    data = numpy.stack([x * 255 // width, y * 255 // height, (x + y) % 256], axis=-1)
+    data = data + numpy.random.RandomState(0).randint(0, 8, data.shape)
+    return Image.fromarray(data.clip(0, 255).astype(numpy.uint8), "RGB")
+
+
+def pillow(image):
+    image.save(BytesIO(), format="png", compress_level=6)
+
+
+def parallel(image, threads):
+    write_png(BytesIO(), image, level=6, threads=threads)
+
+
+def main():
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    rows = []
+    for name, (width, height) in RESOLUTIONS.items():
+        image = frame(width, height)
+        t_pillow = measure(lambda: pillow(image), repeat=3)
+
+        row = [name, f"{t_pillow*1000:.0f}ms"]
+        for threads in counts:
+            t_parallel = measure(lambda: parallel(image, threads), repeat=3)
+            row.append(f"{t_parallel*1000:.0f}ms ({t_pillow/t_parallel:.1f}x)")
+        rows.append(row)
+
+    print_table(("resolution", "pillow", *(f"{n} threads" for n in counts)), rows)
+
+
+if __name__ == "__main__":
+    main()
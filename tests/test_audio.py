@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_audio
+----------------------------------
+
+Tests for `yuuno.audio` module.
+"""
+
+
+import struct
+import unittest
+from unittest import mock
+
+from yuuno import audio as module
+from yuuno.audio import Audio, Format, Transport, WaveformSummary, negotiate, transport_format, convert, waveform
+from yuuno.utils import inline_resolved
+
+
+def pack(values):
+    return struct.pack(f"<{len(values)}f", *values)
+
+
+def unpack(code, data):
+    size = struct.calcsize(code)
+    return struct.unpack(f"<{len(data)//size}{code}", data)
+
+
+# 5.1: FL FR FC LFE BL BR
+SURROUND = Format(channel_count=6, samples_per_second=48000, frames=10, sample_count=737280, channel_layout=0b111111)
+STEREO = Format(channel_count=2, samples_per_second=44100, frames=10, sample_count=737279)
+
+
+@unittest.skipIf(module.numpy is None, "numpy not installed")
+class TestTransport(unittest.TestCase):
+
+    def test_001_negotiate_sample_type(self):
+        self.assertEqual(negotiate(STEREO, ["int16", "float32"]), Transport("int16", 2, 44100))
+        self.assertEqual(negotiate(STEREO, ["pcm24"]), Transport("float32", 2, 44100))
+
+    def test_002_negotiate_downmix(self):
+        self.assertEqual(negotiate(SURROUND, ["float32"], max_channels=2).channel_count, 2)
+        self.assertEqual(negotiate(SURROUND, ["float32"], max_channels=1).channel_count, 1)
+        self.assertEqual(negotiate(SURROUND, ["float32"], max_channels=8).channel_count, 6)
+        self.assertEqual(negotiate(STEREO, ["float32"], max_channels=2).channel_count, 2)
+
+    def test_003_negotiate_sample_rate(self):
+        self.assertEqual(negotiate(SURROUND, ["float32"], max_sample_rate=24000).samples_per_second, 24000)
+        self.assertEqual(negotiate(SURROUND, ["float32"], max_sample_rate=20000).samples_per_second, 16000)
+        self.assertEqual(negotiate(STEREO, ["float32"], max_sample_rate=20000).samples_per_second, 14700)
+        # Nothing divides the sample rate well enough.
+        self.assertEqual(negotiate(STEREO, ["float32"], max_sample_rate=1000).samples_per_second, 44100)
+
+    def test_004_negotiation_is_stable(self):
+        transport = negotiate(SURROUND, ["int16"], max_channels=2, max_sample_rate=16000)
+        again = negotiate(SURROUND, [transport.sample_type], transport.channel_count, transport.samples_per_second)
+        self.assertEqual(again, transport)
+
+    def test_005_transport_format(self):
+        result = transport_format(SURROUND, Transport("int16", 2, 16000))
+        self.assertEqual(result, Format(2, 16000, 10, 245760))
+
+    def test_006_downmix(self):
+        # Only the center channel and the LFE carry a signal.
+        chunk = [pack([0.0] * 4), pack([0.0] * 4), pack([1.0] * 4), pack([1.0] * 4), pack([0.0] * 4), pack([0.0] * 4)]
+        left, right = convert(chunk, SURROUND, Transport("float32", 2, 48000))
+        self.assertEqual(left, right)
+
+        # L = (FL + 0.707 FC + 0.707 BL) / 2.414
+        self.assertAlmostEqual(unpack("f", left)[0], 0.5 ** 0.5 / (1 + 2 * 0.5 ** 0.5), places=6)
+
+    def test_007_downmix_full_scale_does_not_clip(self):
+        chunk = [pack([1.0])] * 6
+        for channels in (1, 2):
+            with self.subTest(channels=channels):
+                for channel in convert(chunk, SURROUND, Transport("float32", channels, 48000)):
+                    self.assertAlmostEqual(unpack("f", channel)[0], 1.0, places=6)
+
+    def test_008_resample(self):
+        chunk = [pack([0.0, 1.0, 0.5, 0.5, 1.0]), pack([1.0] * 5)]
+        result = convert(chunk, Format(2, 48000, 1, 5), Transport("float32", 2, 24000))
+        self.assertEqual(unpack("f", result[0]), (0.5, 0.5, 1.0))
+        self.assertEqual(unpack("f", result[1]), (1.0, 1.0, 1.0))
+
+    def test_009_int16(self):
+        chunk = [pack([-2.0, -1.0, 0.0, 0.5, 1.0, 2.0])]
+        result, = convert(chunk, Format(1, 48000, 1, 6), Transport("int16", 1, 48000))
+        self.assertEqual(unpack("h", result), (-32767, -32767, 0, 16384, 32767, 32767))
+
+    def test_010_int16_parity(self):
+        values = [i / 1000 - 1.5 for i in range(3000)]
+        fmt = Format(1, 48000, 1, len(values))
+        transport = Transport("int16", 1, 48000)
+
+        expected = convert([pack(values)], fmt, transport)
+        with mock.patch.object(module, "numpy", None):
+            self.assertEqual(convert([pack(values)], fmt, transport), expected)
+
+    def test_011_native_is_passed_through(self):
+        chunk = (pack([0.25]), pack([0.5]))
+        self.assertIs(convert(chunk, STEREO, Transport("float32", 2, 44100))[0], chunk[0])
+
+
+class TestTransportPython(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(module, "numpy", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_001_only_sample_type(self):
+        self.assertEqual(negotiate(SURROUND, ["int16"], max_channels=2, max_sample_rate=24000), Transport("int16", 6, 48000))
+
+
+class RampAudio(Audio):
+
+    def __init__(self, chunks, chunk_size):
+        super(RampAudio, self).__init__(None)
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+
+    def format(self):
+        return Format(2, 48000, self.chunks, self.chunks * self.chunk_size)
+
+    def __len__(self):
+        return self.chunks
+
+    @inline_resolved
+    def __getitem__(self, frame):
+        start = frame * self.chunk_size
+        left = [(start + i) / 100 for i in range(self.chunk_size)]
+        return pack(left), pack([-v for v in left])
+
+
+def summarize(chunks, bucket_size):
+    summary = WaveformSummary(2, bucket_size)
+    for chunk in chunks:
+        summary.add(chunk)
+    return summary.finish()
+
+
+class TestWaveform(unittest.TestCase):
+
+    def test_001_buckets_span_chunks(self):
+        chunks = [(pack([0.0, 0.5, -0.5]), pack([1.0] * 3)), (pack([0.25, 0.0, 0.0]), pack([1.0] * 3))]
+        result = summarize(chunks, 4)
+
+        self.assertEqual((result.bucket_size, result.buckets, result.channel_count), (4, 2, 2))
+        values = unpack("f", result.data)
+        # Left channel: minimums, maximums, RMS.
+        self.assertEqual(values[0:4], (-0.5, 0.0, 0.5, 0.0))
+        self.assertAlmostEqual(values[4], (0.5625 / 4) ** 0.5, places=6)
+        self.assertEqual(values[5], 0.0)
+        # Right channel.
+        self.assertEqual(values[6:12], (1.0, 1.0, 1.0, 1.0, 1.0, 1.0))
+
+    def test_002_waveform(self):
+        progress = []
+        result = waveform(RampAudio(3, 10), buckets=4, progress=progress.append).result()
+
+        self.assertEqual(progress, [1/3, 2/3, 1.0])
+        self.assertEqual((result.bucket_size, result.buckets), (8, 4))
+        values = unpack("f", result.data)
+        self.assertEqual(values[0:4], unpack("f", pack([0.0, 0.08, 0.16, 0.24])))
+        self.assertEqual(values[4:8], unpack("f", pack([0.07, 0.15, 0.23, 0.29])))
+
+    def test_003_render(self):
+        audio = RampAudio(3, 10)
+        rendered = []
+
+        def render(frame):
+            rendered.append(frame)
+            return audio[frame]
+
+        result = waveform(audio, buckets=4, render=render).result()
+        self.assertEqual(rendered, [0, 1, 2])
+        self.assertEqual(result, waveform(audio, buckets=4).result())
+
+
+class TestWaveformFallback(unittest.TestCase):
+
+    def test_001_python_buckets_span_chunks(self):
+        chunks = [(pack([0.0, 0.5, -0.5]), pack([1.0] * 3)), (pack([0.25, 0.0, 0.0]), pack([1.0] * 3))]
+        with mock.patch.object(module, "numpy", None):
+            result = summarize(chunks, 4)
+
+        self.assertEqual((result.bucket_size, result.buckets, result.channel_count), (4, 2, 2))
+        values = unpack("f", result.data)
+        self.assertEqual(values[0:4], (-0.5, 0.0, 0.5, 0.0))
+        self.assertAlmostEqual(values[4], (0.5625 / 4) ** 0.5, places=6)
+        self.assertEqual(values[6:12], (1.0, 1.0, 1.0, 1.0, 1.0, 1.0))
+
+    @unittest.skipIf(module.numpy is None, "numpy not installed")
+    def test_002_numpy_parity(self):
+        chunks = [RampAudio(5, 1000)[i].result() for i in range(5)]
+        expected = summarize(chunks, 300)
+        with mock.patch.object(module, "numpy", None):
+            result = summarize(chunks, 300)
+
+        self.assertEqual(result[:3], expected[:3])
+        for a, b in zip(unpack("f", result.data), unpack("f", expected.data)):
+            self.assertAlmostEqual(a, b, places=5)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_audioop
+----------------------------------
+
+Tests for `yuuno.vs.audioop` module.
+"""
+
+
+import os
+import struct
+import unittest
+from unittest import mock
+
+from yuuno.vs import audioop as module
+from yuuno.vs.audioop import to_float32_le, float32_le, byteswap
+
+
+def pack(code, values):
+    return struct.pack(f"={len(values)}{code}", *values)
+
+
+def unpack(data):
+    return struct.unpack(f"<{len(data)//4}f", data)
+
+
+def python_conversion(*args):
+    with mock.patch.multiple(module, _audioop=None, numpy=None):
+        return to_float32_le(*args)
+
+
+class TestConversion(unittest.TestCase):
+
+    def test_001_limits(self):
+        for bits, code in ((8, "b"), (16, "h"), (24, "i"), (32, "i")):
+            with self.subTest(bits=bits):
+                largest = (1 << (bits - 1)) - 1
+                result = unpack(to_float32_le(pack(code, [-largest - 1, -largest, 0, largest]), bits))
+                self.assertEqual(result, (-1.0, -1.0, 0.0, 1.0))
+
+    def test_002_scaling(self):
+        result = unpack(to_float32_le(pack("h", [16384, -8192]), 16))
+        self.assertAlmostEqual(result[0], 16384 / 32767, places=6)
+        self.assertAlmostEqual(result[1], -8192 / 32767, places=6)
+
+    def test_003_clamping(self):
+        # 24 bit samples that do not fit into 24 bits.
+        result = unpack(to_float32_le(pack("i", [1 << 24, -(1 << 24)]), 24))
+        self.assertEqual(result, (1.0, -1.0))
+
+    def test_004_invalid(self):
+        with self.assertRaises(ValueError):
+            to_float32_le(b"", 0)
+        with self.assertRaises(ValueError):
+            to_float32_le(b"", 33)
+        with self.assertRaises(ValueError):
+            to_float32_le(b"\0\0\0", 16)
+
+    def test_005_empty(self):
+        self.assertEqual(to_float32_le(b"", 16), b"")
+        self.assertEqual(float32_le(b""), b"")
+
+    def test_006_float_passthrough(self):
+        values = [-1.0, -0.25, 0.0, 0.5, 1.0]
+        self.assertEqual(unpack(float32_le(pack("f", values))), tuple(values))
+        self.assertEqual(unpack(float32_le(memoryview(pack("f", values)).cast("f"))), tuple(values))
+
+    def test_007_byteswap(self):
+        self.assertEqual(unpack(byteswap(bytearray(pack("f", [0.5, -2.0])))), (0.5, -2.0))
+
+
+class TestConversionFallback(unittest.TestCase):
+
+    def test_001_python_limits(self):
+        for bits, code in ((8, "b"), (16, "h"), (24, "i"), (32, "i")):
+            with self.subTest(bits=bits):
+                largest = (1 << (bits - 1)) - 1
+                result = unpack(python_conversion(pack(code, [-largest - 1, -largest, 0, largest]), bits))
+                self.assertEqual(result, (-1.0, -1.0, 0.0, 1.0))
+
+    def test_002_python_clamping(self):
+        result = unpack(python_conversion(pack("i", [1 << 24, -(1 << 24), 0]), 24))
+        self.assertEqual(result, (1.0, -1.0, 0.0))
+
+    def test_003_python_float(self):
+        values = [-3.5, -1.0, 0.125, 1.0, 3.5]
+        with mock.patch.multiple(module, _audioop=None, numpy=None):
+            self.assertEqual(unpack(float32_le(pack("f", values))), tuple(values))
+            self.assertEqual(unpack(byteswap(bytearray(pack("f", values)))), tuple(values))
+            self.assertEqual(float32_le(b""), b"")
+
+    @unittest.skipIf(module.numpy is None, "numpy not installed")
+    def test_004_numpy_parity(self):
+        data = os.urandom(4096)
+        for bits in (8, 12, 16, 24, 32):
+            with self.subTest(bits=bits):
+                with mock.patch.object(module, "_audioop", None):
+                    result = to_float32_le(data, bits)
+                self.assertEqual(result, python_conversion(data, bits))
+
+    @unittest.skipIf(module.numpy is None, "numpy not installed")
+    def test_005_numpy_float(self):
+        data = pack("f", [-3.5, -1.0, 0.125, 1.0, 3.5])
+        with mock.patch.object(module, "_audioop", None):
+            result = float32_le(data)
+        with mock.patch.multiple(module, _audioop=None, numpy=None):
+            self.assertEqual(result, float32_le(data))
+
+
+@unittest.skipIf(module._audioop is None, "compiled module not built")
+class TestConversionCompiled(unittest.TestCase):
+
+    def test_001_parity(self):
+        data = os.urandom(4096)
+        for bits in (8, 12, 16, 24, 32):
+            with self.subTest(bits=bits):
+                self.assertEqual(to_float32_le(data, bits), python_conversion(data, bits))
+
+    def test_002_float_parity(self):
+        data = pack("f", [-3.5, -1.0, 0.125, 1.0, 3.5])
+        with mock.patch.multiple(module, _audioop=None, numpy=None):
+            expected = float32_le(data)
+        self.assertEqual(float32_le(data), expected)
+
+    def test_003_invalid_byteswap(self):
+        with self.assertRaises(ValueError):
+            byteswap(b"\0\0\0")
+
+    def test_004_32bit_scale(self):
+        largest = (1 << 31) - 1
+        data = pack("i", [largest, largest // 2, -largest - 1])
+        result = unpack(module._audioop.int32_to_float32(memoryview(data).cast("i"), 32))
+        self.assertEqual(result, unpack(python_conversion(data, 32)))
+        self.assertEqual(result[0], 1.0)
@@ -0,0 +1,72 @@
+import unittest
+
+from yuuno.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = LRUCache(10)
+
+    def tearDown(self):
+        del self.cache
+
+    def test_001_put_get(self):
+        self.cache.put("a", b"12345")
+        self.assertEqual(self.cache.get("a"), b"12345")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.size, 5)
+
+        stats = self.cache.statistics()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_002_evict_least_recently_used(self):
+        self.cache.put("a", b"1234")
+        self.cache.put("b", b"1234")
+        self.cache.get("a")
+        self.cache.put("c", b"1234")
+
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertIn("c", self.cache)
+        self.assertEqual(self.cache.statistics().evictions, 1)
+
+    def test_003_replace_entry(self):
+        self.cache.put("a", b"1234")
+        self.cache.put("a", b"12")
+        self.assertEqual(self.cache.size, 2)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_004_oversized_entry(self):
+        self.cache.put("a", b"1234")
+        self.cache.put("a", b"12345678901")
+        self.assertNotIn("a", self.cache)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_005_explicit_size(self):
+        self.cache.put("a", object(), size=6)
+        self.cache.put("b", object(), size=6)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_006_invalidate(self):
+        self.cache.put(("x", 1), b"1")
+        self.cache.put(("y", 1), b"1")
+        self.cache.invalidate(lambda key: key[0] == "x")
+        self.assertNotIn(("x", 1), self.cache)
+        self.assertIn(("y", 1), self.cache)
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_007_shrink_budget(self):
+        self.cache.put("a", b"1234")
+        self.cache.put("b", b"1234")
+        self.cache.budget = 5
+        self.assertEqual(len(self.cache), 1)
+        self.assertIn("b", self.cache)
+
+        self.cache.budget = 0
+        self.cache.put("c", b"1")
+        self.assertEqual(len(self.cache), 0)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_clip
+----------------------------------
+
+Tests for the default implementations of `yuuno.clip`.
+"""
+
+
+import unittest
+from concurrent.futures import Future
+
+from PIL import Image
+
+from yuuno.clip import Clip, Frame, Size, Box
+from yuuno.utils import inline_resolved
+
+
+class GradientFrame(Frame):
+
+    def __init__(self, width, height):
+        self.image = Image.new("L", (width, height))
+        self.image.putdata([x for _ in range(height) for x in range(width)])
+
+    def to_pil(self):
+        return self.image
+
+
+class GradientClip(Clip):
+
+    def __init__(self):
+        super(GradientClip, self).__init__(None)
+
+    def __len__(self):
+        return 2
+
+    @inline_resolved
+    def __getitem__(self, item):
+        return GradientFrame(16, 8)
+
+
+class TestRegion(unittest.TestCase):
+
+    def setUp(self):
+        self.clip = GradientClip()
+
+    def test_001_crops_image(self):
+        frame = self.clip.region(1, Box(4, 2, 8, 4))[0].result()
+        image = frame.to_pil_async().result()
+
+        self.assertEqual(image.size, (8, 4))
+        self.assertEqual(list(image.getdata())[:8], list(range(4, 12)))
+        self.assertEqual(frame.to_pil().size, (8, 4))
+
+    def test_002_reports_source_size(self):
+        frame = self.clip.region(1, Box(0, 0, 4, 4))[1].result()
+        self.assertEqual(frame.size(), Size(16, 8))
+        self.assertEqual(len(self.clip.region(1, Box(0, 0, 4, 4))), 2)
+
+    def test_003_scales_unscalable_clip(self):
+        self.assertIs(self.clip.scaled(0.5), self.clip)
+
+        # The box is given in the coordinates of the 8x4 image.
+        image = self.clip.region(0.5, Box(4, 0, 4, 4))[0].result().to_pil()
+        self.assertEqual(image.size, (4, 4))
+
+        row = list(image.getdata())[:4]
+        self.assertGreaterEqual(row[0], 8)
+        self.assertLessEqual(row[-1], 15)
+        self.assertEqual(row, sorted(row))
+
+    def test_004_scaled_edge_region(self):
+        # 16 * 0.3 is rounded up to 5 pixels. The last column lies partly outside the image.
+        image = self.clip.region(0.3, Box(4, 0, 1, 2))[0].result().to_pil()
+        self.assertEqual(image.size, (1, 2))
+        self.assertNotEqual(self.clip.region(0.3, Box(4, 0, 1, 2)).cache_key(), self.clip.region(1, Box(4, 0, 1, 2)).cache_key())
+
+
+class PendingClip(Clip):
+
+    def __init__(self):
+        super(PendingClip, self).__init__(None)
+        self.futures = {}
+
+    def __len__(self):
+        return 10
+
+    def __getitem__(self, item):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.futures[item] = future
+        return future
+
+
+class TestGetFrames(unittest.TestCase):
+
+    def test_001_streams_in_order(self):
+        frames = list(GradientClip().get_frames([1, 0], prefetch=2))
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[0].size(), Size(16, 8))
+
+    def test_002_bounded(self):
+        clip = PendingClip()
+        stream = clip.get_frames_async(range(10), prefetch=3)
+
+        first = next(stream)
+        self.assertEqual(sorted(clip.futures), [0, 1, 2])
+        self.assertIs(first, clip.futures[0])
+
+        # Frames finishing out of order are still returned in order.
+        clip.futures[1].set_result("b")
+        second = next(stream)
+        self.assertEqual(sorted(clip.futures), [0, 1, 2, 3])
+        self.assertIs(second, clip.futures[1])
+
+    def test_003_exhausts(self):
+        clip = PendingClip()
+        self.assertEqual(len(list(clip.get_frames_async(range(4), prefetch=8))), 4)
+        self.assertEqual(len(list(clip.get_frames_async([], prefetch=8))), 0)
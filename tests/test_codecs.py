@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_codecs
+----------------------------------
+
+Tests for the preview codecs of `yuuno.output`.
+"""
+
+
+import unittest
+from io import BytesIO
+
+from PIL import Image, features
+
+from yuuno.output import YuunoImageOutput
+
+
+class TestCodecs(unittest.TestCase):
+
+    def setUp(self):
+        self.output = YuunoImageOutput()
+        self.output.icc_profile = None
+        self.image = Image.new("RGB", (4, 2), (255, 0, 0))
+
+    def test_001_png(self):
+        encoded = self.output.encode(self.image, "png")
+        self.assertEqual(encoded.codec, "png")
+        self.assertEqual(encoded.mime, "image/png")
+        self.assertEqual(encoded.data, self.output.bytes_of(self.image))
+
+    def test_002_jpeg(self):
+        encoded = self.output.encode(self.image, "jpeg")
+        self.assertEqual(encoded.codec, "jpeg")
+        self.assertEqual(Image.open(BytesIO(encoded.data)).format, "JPEG")
+
+    def test_003_jpeg_falls_back_for_alpha(self):
+        encoded = self.output.encode(self.image.convert("RGBA"), "jpeg")
+        self.assertEqual(encoded.codec, "png")
+
+    @unittest.skipUnless(features.check("webp"), "webp support not found")
+    def test_004_webp_is_lossless(self):
+        encoded = self.output.encode(self.image, "webp")
+        self.assertEqual(encoded.codec, "webp")
+
+        decoded = Image.open(BytesIO(encoded.data)).convert("RGB")
+        self.assertEqual(list(decoded.getdata()), list(self.image.getdata()))
+
+    def test_005_raw(self):
+        encoded = self.output.encode(self.image, "raw")
+        self.assertEqual(encoded.codec, "raw")
+        self.assertEqual(encoded.data, b"\xff\x00\x00\xff" * 8)
+
+    def test_006_unknown(self):
+        with self.assertRaises(ValueError):
+            self.output.encode(self.image, "gif")
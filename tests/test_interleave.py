@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_interleave
+----------------------------------
+
+Tests for `yuuno.vs.interleave` module.
+"""
+
+
+import unittest
+from unittest import mock
+
+from yuuno.vs import interleave as module
+from yuuno.vs.interleave import Interleaver, interleave
+
+numpy = module.numpy
+
+
+R, G, B = b"\x01\x02", b"\x03\x04", b"\x05\x06"
+
+# Two lines with one byte of padding each.
+PADDED = (b"\x01\x02\x00\x03\x04\x00", b"\x05\x06\x00\x07\x08\x00", b"\x09\x0a\x00\x0b\x0c\x00")
+PADDED_RESULT = b"\x01\x05\x09\x02\x06\x0a\x03\x07\x0b\x04\x08\x0c"
+
+
+def python_interleave(*args, **kwargs):
+    with mock.patch.object(module, "numpy", None):
+        return interleave(*args, **kwargs)
+
+
+def padded_views():
+    # Like the planes of a frame.
+    return [memoryview(numpy.frombuffer(data, dtype=numpy.uint8).reshape(2, 3)[:, :2]) for data in PADDED]
+
+
+class TestInterleave(unittest.TestCase):
+
+    def test_001_interleave_rgb(self):
+        result = interleave([R, G, B], 2, 1)
+        self.assertEqual(bytes(result), b"\x01\x03\x05\x02\x04\x06")
+
+    def test_002_interleave_rgbx(self):
+        result = interleave([R, G, B], 2, 1, channels=4)
+        self.assertEqual(bytes(result), b"\x01\x03\x05\xff\x02\x04\x06\xff")
+
+    def test_003_interleave_rgba(self):
+        result = interleave([b"\x01", b"\x02", b"\x03", b"\x04"], 1, 1, channels=4)
+        self.assertEqual(bytes(result), b"\x01\x02\x03\x04")
+
+    def test_004_interleave_stride(self):
+        result = interleave(list(PADDED), 2, 2, [3, 3, 3])
+        self.assertEqual(bytes(result), PADDED_RESULT)
+
+    def test_005_new_buffer(self):
+        interleaver = Interleaver()
+        first = interleaver.interleave([b"\x01", b"\x02", b"\x03"], 1, 1)
+        second = interleaver.interleave([b"\x04", b"\x05", b"\x06"], 1, 1)
+        self.assertIsNot(first, second)
+        self.assertEqual(bytes(first), b"\x01\x02\x03")
+
+    def test_006_interleave_invalid(self):
+        with self.assertRaises(ValueError):
+            Interleaver(channels=2)
+
+        with self.assertRaises(ValueError):
+            interleave([b"\x01", b"\x02"], 1, 1)
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_007_interleave_2d(self):
+        planes = padded_views()
+        self.assertFalse(planes[0].c_contiguous)
+        self.assertEqual(bytes(interleave(planes, 2, 2)), PADDED_RESULT)
+
+
+class TestInterleaveFallback(unittest.TestCase):
+
+    def test_001_python_rgb(self):
+        self.assertEqual(bytes(python_interleave([R, G, B], 2, 1)), b"\x01\x03\x05\x02\x04\x06")
+
+    def test_002_python_rgbx(self):
+        result = python_interleave([R, G, B], 2, 1, channels=4)
+        self.assertEqual(bytes(result), b"\x01\x03\x05\xff\x02\x04\x06\xff")
+
+    def test_003_python_stride(self):
+        self.assertEqual(bytes(python_interleave(list(PADDED), 2, 2, [3, 3, 3])), PADDED_RESULT)
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_004_python_2d(self):
+        self.assertEqual(bytes(python_interleave(padded_views(), 2, 2)), PADDED_RESULT)
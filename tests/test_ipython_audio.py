@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_ipython_audio
+----------------------------------
+
+Tests for the audio widget.
+"""
+
+import struct
+import unittest
+from concurrent.futures import Future
+
+from yuuno import audio
+from yuuno.audio import Audio, Format
+from yuuno_ipython.ipython.apps import audio as app
+from yuuno_ipython.ipython.apps.audio import AudioWidget
+
+
+class PendingAudio(Audio):
+
+    def __init__(self, chunks=10, channels=2):
+        super(PendingAudio, self).__init__(None)
+        self.chunks = chunks
+        self.channels = channels
+        self.requests = []
+
+    def format(self):
+        return Format(channel_count=self.channels, samples_per_second=48000, frames=self.chunks, sample_count=self.chunks * 4)
+
+    def __len__(self):
+        return self.chunks
+
+    def __getitem__(self, frame):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.requests.append((frame, future))
+        return future
+
+    @property
+    def requested(self):
+        return [frame for frame, _ in self.requests]
+
+    def resolve(self, frame):
+        for requested, future in self.requests:
+            if requested == frame and not future.done():
+                future.set_result((bytes([frame]) * 16,) * self.channels)
+                return
+        raise KeyError(frame)
+
+
+class TestChunkCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clip = PendingAudio()
+        self.widget = AudioWidget(self.clip, prefetch_depth=2)
+        self.sent = []
+        self.widget.send = lambda content, buffers=None: self.sent.append((content, buffers))
+
+    def request(self, rqid, frame):
+        return self.widget._handle_request_render(None, {"type": "render", "id": rqid, "payload": {"frame": frame}}, [])
+
+    def test_001_read_ahead(self):
+        self.request("1", 0)
+        self.assertEqual(self.clip.requested, [0, 1])
+
+        self.clip.resolve(0)
+        (response, buffers), = self.sent
+        self.assertEqual(response["id"], "1")
+        self.assertEqual(response["payload"]["size"], 4)
+        self.assertEqual(buffers, (b"\0" * 16, b"\0" * 16))
+
+        self.clip.resolve(1)
+        self.assertEqual(self.clip.requested, [0, 1, 2])
+
+    def test_002_prefetched_chunk_is_not_rendered_again(self):
+        self.request("1", 0)
+        self.clip.resolve(0)
+        self.clip.resolve(1)
+
+        # Chunk 2 is still being rendered by the read-ahead.
+        self.request("2", 1)
+        self.request("3", 2)
+        self.assertEqual(self.clip.requested.count(1), 1)
+        self.assertEqual(self.clip.requested.count(2), 1)
+        self.assertEqual(len(self.sent), 2)
+
+        self.clip.resolve(2)
+        self.assertEqual(self.sent[-1][0]["id"], "3")
+
+    def test_003_seek_back_is_cached(self):
+        self.request("1", 0)
+        self.clip.resolve(0)
+
+        self.request("2", 8)
+        self.clip.resolve(1)
+        self.clip.resolve(8)
+
+        requested = len(self.clip.requests)
+        self.request("3", 0)
+        self.assertEqual(len(self.clip.requests), requested)
+        self.assertEqual(self.sent[-1][0]["id"], "3")
+
+    def test_004_budget(self):
+        self.widget.cache_size = 0
+        self.assertEqual(self.widget.chunk_cache.budget, 0)
+
+        self.widget.prefetch_depth = 0
+        self.request("1", 0)
+        self.clip.resolve(0)
+        self.request("2", 0)
+        self.assertEqual(self.clip.requested, [0, 0])
+
+    def test_005_clip_change_clears_cache(self):
+        self.request("1", 0)
+        self.clip.resolve(0)
+        self.assertEqual(self.widget.chunk_cache.statistics().entries, 1)
+
+        self.widget.clip = PendingAudio()
+        self.assertEqual(self.widget.chunk_cache.statistics().entries, 0)
+
+    def test_006_failures_are_not_cached(self):
+        self.widget.prefetch_depth = 0
+        self.request("1", 0)
+        self.clip.requests[0][1].set_exception(ValueError("broken filter"))
+        self.assertEqual(self.sent[-1][0]["type"], "failure")
+
+        self.request("2", 0)
+        self.assertEqual(self.clip.requested, [0, 0])
+
+
+@unittest.skipIf(audio.numpy is None, "numpy not installed")
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.clip = PendingAudio(channels=6)
+        self.widget = AudioWidget(self.clip, prefetch_depth=0)
+        self.sent = []
+        self.widget.send = lambda content, buffers=None: self.sent.append((content, buffers))
+
+    def meta(self, **payload):
+        self.widget._handle_request_meta(None, {"type": "meta", "id": "meta", "payload": payload}, [])
+        return self.sent.pop()[0]["payload"]
+
+    def test_001_legacy_client(self):
+        meta = self.meta()
+        self.assertNotIn("transport", meta)
+        self.assertEqual(meta["channel_count"], 6)
+        self.assertEqual(meta["samples_per_second"], 48000)
+
+    def test_002_negotiate(self):
+        self.widget.max_sample_rate = 24000
+        meta = self.meta(transport={"sample_types": ["int16", "float32"]})
+        self.assertEqual(meta["transport"], {"sample_type": "int16", "channel_count": 2, "samples_per_second": 24000})
+        self.assertEqual(meta["channel_count"], 2)
+        self.assertEqual(meta["samples_per_second"], 24000)
+        self.assertEqual(meta["source_samples_per_second"], 48000)
+        self.assertEqual(meta["sample_count"], 20)
+
+    def test_003_server_preference(self):
+        self.widget.sample_type = "float32"
+        meta = self.meta(transport={"sample_types": ["int16", "float32"]})
+        self.assertEqual(meta["transport"]["sample_type"], "float32")
+
+    def test_004_render(self):
+        transport = {"sample_type": "int16", "channel_count": 2, "samples_per_second": 24000}
+        self.widget._handle_request_render(None, {"type": "render", "id": "1", "payload": {"frame": 0, "transport": transport}}, [])
+        self.clip.requests[0][1].set_result((struct.pack("<4f", 1.0, 1.0, 0.0, 0.0),) * 6)
+
+        (response, buffers), = self.sent
+        self.assertEqual(response["payload"]["size"], 2)
+        self.assertEqual(len(buffers), 2)
+        self.assertEqual(struct.unpack("<2h", buffers[0]), (32767, 0))
+
+
+class TestWaveform(unittest.TestCase):
+
+    def setUp(self):
+        self.clip = PendingAudio(chunks=3)
+        self.widget = self.create(self.clip)
+        app.WAVEFORM_CACHE.clear()
+        app._waveform_jobs.clear()
+
+    def create(self, clip):
+        widget = AudioWidget(clip, prefetch_depth=0, waveform_buckets=4, waveform_concurrency=1)
+        widget.sent = []
+        widget.send = lambda content, buffers=None: widget.sent.append((content, buffers))
+        return widget
+
+    def poll(self, widget=None):
+        widget = widget or self.widget
+        widget._handle_request_waveform(None, {"type": "waveform", "id": "w"}, [])
+        return widget.sent.pop()
+
+    def test_001_progress(self):
+        response, _ = self.poll()
+        self.assertEqual(response["payload"], {"done": False, "progress": 0.0})
+        self.assertEqual(self.clip.requested, [0])
+
+        self.clip.resolve(0)
+        self.assertEqual(self.poll()[0]["payload"]["progress"], 1 / 3)
+        # Polling does not start a second computation.
+        self.assertEqual(self.clip.requested, [0, 1])
+
+        self.clip.resolve(1)
+        self.clip.resolve(2)
+        response, buffers = self.poll()
+        self.assertTrue(response["payload"]["done"])
+        self.assertEqual(response["payload"]["buckets"], 4)
+        self.assertEqual(response["payload"]["channel_count"], 2)
+        self.assertEqual(len(buffers[0]), 2 * 3 * 4 * 4)
+
+    def test_002_shared_between_widgets(self):
+        self.poll()
+        for frame in range(3):
+            self.clip.resolve(frame)
+
+        other = self.create(self.clip)
+        self.assertTrue(self.poll(other)[0]["payload"]["done"])
+        self.assertEqual(len(self.clip.requests), 3)
+
+    def test_003_failure_is_retried(self):
+        self.poll()
+        self.clip.requests[0][1].set_exception(ValueError("broken filter"))
+
+        self.assertEqual(self.poll()[0]["type"], "failure")
+        self.assertEqual(self.poll()[0]["payload"], {"done": False, "progress": 0.0})
+        self.assertEqual(self.clip.requested, [0, 0])
+
+    def test_004_chunks_are_shared_with_playback(self):
+        self.poll()
+        for frame in range(3):
+            self.clip.resolve(frame)
+
+        self.widget._handle_request_render(None, {"type": "render", "id": "1", "payload": {"frame": 1}}, [])
+        self.assertEqual(self.widget.sent[-1][0]["id"], "1")
+        self.assertEqual(len(self.clip.requests), 3)
+
+    def test_005_clip_change_drops_waveform(self):
+        self.poll()
+        for frame in range(3):
+            self.clip.resolve(frame)
+        self.assertEqual(len(app.WAVEFORM_CACHE), 1)
+
+        # Another widget still shows the clip.
+        other = self.create(self.clip)
+        self.widget.clip = PendingAudio()
+        self.assertEqual(len(app.WAVEFORM_CACHE), 1)
+
+        other.close()
+        self.assertEqual(len(app.WAVEFORM_CACHE), 0)
+
+    def test_006_dropped_job_stops(self):
+        self.poll()
+        self.widget.clip = PendingAudio()
+        self.clip.resolve(0)
+
+        self.assertEqual(self.clip.requested, [0])
+        self.assertEqual(len(app.WAVEFORM_CACHE), 0)
+        self.assertEqual(app._waveform_jobs, {})
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_ipython_preview
+----------------------------------
+
+Tests for the preview widget.
+"""
+
+import unittest
+from concurrent.futures import Future
+
+from yuuno import Yuuno
+from yuuno.clip import Clip, Size, Box
+from yuuno.utils import inline_resolved
+from yuuno_ipython.ipython.apps.preview import Preview, preview_scale, level_size, tile_box, props_delta
+
+from tests.test_png_output import SinglePixelFrame
+
+
+class TestPreviewScale(unittest.TestCase):
+
+    def test_001_full_resolution(self):
+        self.assertEqual(preview_scale(1), 1)
+        self.assertEqual(preview_scale(4), 1)
+
+    def test_002_round_up_to_power_of_two(self):
+        self.assertEqual(preview_scale(0.5), 0.5)
+        self.assertEqual(preview_scale(0.3), 0.5)
+        self.assertEqual(preview_scale(0.25), 0.25)
+        self.assertEqual(preview_scale(0.2), 0.25)
+
+    def test_003_lower_bound(self):
+        self.assertEqual(preview_scale(0), 1/64)
+
+
+class TestTiles(unittest.TestCase):
+
+    def test_001_level_size(self):
+        self.assertEqual(level_size(Size(7680, 4320), 1), Size(7680, 4320))
+        self.assertEqual(level_size(Size(7680, 4320), 0.25), Size(1920, 1080))
+        self.assertEqual(level_size(Size(1001, 3), 0.5), Size(501, 2))
+        self.assertEqual(level_size(Size(10, 10), 1/64), Size(1, 1))
+
+    def test_002_inner_tile(self):
+        self.assertEqual(tile_box(Size(1920, 1080), 512, 0, 0), Box(0, 0, 512, 512))
+        self.assertEqual(tile_box(Size(1920, 1080), 512, 2, 1), Box(1024, 512, 512, 512))
+
+    def test_003_edge_tile(self):
+        self.assertEqual(tile_box(Size(1920, 1080), 512, 3, 2), Box(1536, 1024, 384, 56))
+
+    def test_004_outside(self):
+        with self.assertRaises(ValueError):
+            tile_box(Size(1920, 1080), 512, 4, 0)
+        with self.assertRaises(ValueError):
+            tile_box(Size(1920, 1080), 512, 0, 3)
+        with self.assertRaises(ValueError):
+            tile_box(Size(1920, 1080), 512, -1, 0)
+
+
+class TestPropsDelta(unittest.TestCase):
+
+    def test_001_unchanged(self):
+        props = {"_Matrix": ["1"], "_PictType": ["I"]}
+        self.assertEqual(props_delta(props, dict(props)), ({}, []))
+
+    def test_002_changed_and_added(self):
+        old = {"_Matrix": ["1"], "_PictType": ["I"]}
+        new = {"_Matrix": ["1"], "_PictType": ["P"], "_SceneChangeNext": ["1"]}
+        self.assertEqual(props_delta(old, new), ({"_PictType": ["P"], "_SceneChangeNext": ["1"]}, []))
+
+    def test_003_removed(self):
+        old = {"_Matrix": ["1"], "_SceneChangePrev": ["1"]}
+        new = {"_Matrix": ["1"]}
+        self.assertEqual(props_delta(old, new), ({}, ["_SceneChangePrev"]))
+
+
+class PendingClip(Clip):
+
+    def __init__(self):
+        super(PendingClip, self).__init__(None)
+        self.requests = []
+
+    def __len__(self):
+        return 10
+
+    def __getitem__(self, item):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.requests.append((item, future))
+        return future
+
+    def resolve(self, index):
+        self.requests[index][1].set_result(SinglePixelFrame(format="RGB"))
+
+
+class TestProgressive(unittest.TestCase):
+
+    def setUp(self):
+        self.clip = PendingClip()
+        self.preview = Preview(clip="output", clips={"output": self.clip}, prefetch_depth=0)
+        self.sent = []
+        self.preview.send = lambda content, buffers=None: self.sent.append((content, buffers))
+
+        self.created = not Yuuno.initialized()
+        Yuuno.instance().output.encoded_cache.clear()
+
+    def tearDown(self):
+        if self.created:
+            Yuuno.clear_instance()
+
+    def request(self, rqid, frame, **payload):
+        return self.preview._handle_request_frame(None, {"id": rqid, "payload": dict(frame=frame, props=False, **payload)}, [])
+
+    def test_001_partial_then_final(self):
+        result = self.request("1", 0, progressive=True)
+        # Both images are requested before the first one is done.
+        self.assertEqual(len(self.clip.requests), 2)
+        self.clip.resolve(0)
+
+        (partial, buffers), = self.sent
+        self.assertEqual(partial["type"], "partial")
+        self.assertEqual(partial["id"], "1")
+        self.assertEqual(partial["payload"]["codec"], "jpeg")
+        self.assertEqual(len(buffers), 1)
+        self.assertFalse(result.done())
+
+        self.clip.resolve(1)
+        payload, buffers = result.result()
+        self.assertEqual(payload["codec"], "png")
+        self.assertNotIn("cancelled", payload)
+
+        # Only the final image is cached.
+        self.assertEqual(len(Yuuno.instance().output.encoded_cache), 1)
+
+    def test_002_cancel_refinement(self):
+        first = self.request("1", 0, progressive=True)
+        self.clip.resolve(0)
+
+        second = self.request("2", 1)
+        self.clip.resolve(1)
+        payload, buffers = first.result()
+        self.assertTrue(payload["cancelled"])
+        self.assertEqual(buffers, [])
+
+        self.clip.resolve(2)
+        self.assertEqual(second.result()[0]["codec"], "png")
+
+    def test_003_cached_frames_skip_partial(self):
+        result = self.request("1", 0)
+        self.clip.resolve(0)
+        result.result()
+
+        self.request("2", 0, progressive=True).result()
+        self.assertEqual(self.sent, [])
+
+    def test_004_final_before_partial(self):
+        result = self.request("1", 0, progressive=True)
+        self.clip.resolve(1)
+        self.clip.resolve(0)
+
+        self.assertEqual(self.sent, [])
+        self.assertEqual(result.result()[0]["codec"], "png")
+
+
+class PropsFrame(SinglePixelFrame):
+
+    def __init__(self, props):
+        super(PropsFrame, self).__init__(format="RGB")
+        self.props = props
+
+    def properties(self):
+        return self.props
+
+
+class PropsClip(Clip):
+
+    def __init__(self):
+        super(PropsClip, self).__init__(None)
+        self.requests = []
+
+    def __len__(self):
+        return 10
+
+    @inline_resolved
+    def __getitem__(self, item):
+        self.requests.append(item)
+        return PropsFrame({"_Matrix": ["1"], "_Frame": [str(item)]})
+
+
+class TestProps(unittest.TestCase):
+
+    def setUp(self):
+        self.clip = PropsClip()
+        self.preview = Preview(clip="output", clips={"output": self.clip})
+
+    def request(self, frame, base=None):
+        payload = {"frame": frame}
+        if base is not None:
+            payload["base"] = base
+        return self.preview._handle_request_props(None, {"id": "1", "payload": payload}, []).result()[0]
+
+    def test_001_delta(self):
+        self.assertEqual(self.request(0)["props"], {"_Matrix": ["1"], "_Frame": ["0"]})
+
+        result = self.request(1, base=0)
+        self.assertEqual((result["base"], result["changed"], result["removed"]), (0, {"_Frame": ["1"]}, []))
+        # The base frame is not rendered again.
+        self.assertEqual(self.clip.requests, [0, 1])
+
+    def test_002_unknown_base(self):
+        self.request(0)
+        # Another client knows the properties of a different frame.
+        result = self.request(2, base=5)
+        self.assertNotIn("base", result)
+        self.assertEqual(result["props"], {"_Matrix": ["1"], "_Frame": ["2"]})
+        self.assertEqual(self.clip.requests, [0, 2])
@@ -9,14 +9,21 @@ Tests for `yuuno` module.
 """
 
 
+import io
+import os
+import zlib
+import tempfile
 import unittest
+from concurrent.futures import CancelledError
 
-from traitlets import default, HasTraits, Unicode
+from traitlets import default, HasTraits, Bool, Unicode
 
 from PIL import Image
 
 from yuuno.output import YuunoImageOutput
-from yuuno.clip import Frame
+from yuuno.output import parallel_png
+from yuuno.clip import Clip, Frame
+from yuuno.utils import inline_resolved
 
 
 class SinglePixelFrame(Frame, HasTraits):
@@ -62,3 +69,210 @@ class TestPNGOutput(unittest.TestCase):
 
     def test_002_test_dump_nonsupported(self):
         self.assertEqual(self.output.bytes_of(SinglePixelFrame(format="CMYK")), self.EXPECTED_RESULT_CMYK_TO_RGB)
+
+    def test_003_icc_profile_read_once(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"profile-1")
+        try:
+            self.output.icc_profile = f.name
+            self.assertEqual(self.output.save_settings()["icc_profile"], b"profile-1")
+
+            with open(f.name, "wb") as f2:
+                f2.write(b"profile-2")
+            self.assertEqual(self.output.save_settings()["icc_profile"], b"profile-1")
+
+            # Changing a setting reads the profile again.
+            self.output.zlib_compression = 1
+            settings = self.output.save_settings()
+            self.assertEqual(settings["icc_profile"], b"profile-2")
+            self.assertEqual(settings["compress_level"], 1)
+        finally:
+            os.unlink(f.name)
+
+    def test_004_srgb_settings(self):
+        self.output.icc_profile = "sRGB"
+        self.assertEqual(self.output.save_settings()["format"], "png+srgb.yuuno")
+        self.output.icc_profile = None
+        self.assertNotIn("icc_profile", self.output.save_settings())
+
+
+@unittest.skipIf(parallel_png.numpy is None, "numpy not installed")
+class TestParallelPNG(unittest.TestCase):
+
+    def setUp(self):
+        self.output = YuunoImageOutput()
+        self.output.icc_profile = None
+        self.output.png_threads = 4
+
+    def image(self, mode, width=1024, height=1024):
+        numpy = parallel_png.numpy
+        channels = parallel_png.COLOR_TYPES[mode][1]
+        y, x = numpy.mgrid[0:height, 0:width]
+        data = numpy.stack([(x * (c+1) + y * (c+2)) % 256 for c in range(channels)], axis=-1).astype(numpy.uint8)
+        # Some noise so every filter type gets chosen.
+        data[::7, ::3] = numpy.random.RandomState(0).randint(0, 256, data[::7, ::3].shape)
+        return Image.fromarray(data.squeeze(-1) if channels == 1 else data, mode)
+
+    def decode(self, data):
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return image
+
+    def test_001_roundtrip(self):
+        for mode in ("L", "RGB", "RGBA"):
+            with self.subTest(mode=mode):
+                image = self.image(mode)
+                self.assertTrue(parallel_png.supports(image))
+                result = self.decode(self.output.bytes_of(image))
+                self.assertEqual(result.mode, mode)
+                self.assertEqual(result.tobytes(), image.tobytes())
+
+    def test_002_compression_levels(self):
+        image = self.image("RGB")
+        for level in (0, 1, 9):
+            with self.subTest(level=level):
+                self.output.zlib_compression = level
+                data = self.output.bytes_of(image)
+                self.assertEqual(self.decode(data).tobytes(), image.tobytes())
+
+    def test_003_single_zlib_stream(self):
+        image = self.image("RGB")
+        f = io.BytesIO()
+        parallel_png.write_png(f, image, threads=4)
+        data = f.getvalue()
+
+        idat = b""
+        pos = len(parallel_png.PNG_SIGNATURE)
+        chunks = 0
+        while pos < len(data):
+            length = int.from_bytes(data[pos:pos+4], "big")
+            cid = data[pos+4:pos+8]
+            body = data[pos+8:pos+8+length]
+            self.assertEqual(int.from_bytes(data[pos+8+length:pos+12+length], "big"), zlib.crc32(cid + body))
+            if cid == b"IDAT":
+                idat += body
+                chunks += 1
+            pos += length + 12
+
+        self.assertGreater(chunks, 1)
+        # zlib checks the combined adler32 checksum.
+        raw = zlib.decompress(idat)
+        self.assertEqual(len(raw), image.height * (image.width * 3 + 1))
+
+    def test_004_adler32_combine(self):
+        first, second = os.urandom(1000), os.urandom(70000)
+        self.assertEqual(
+            parallel_png.adler32_combine(zlib.adler32(first), zlib.adler32(second), len(second)),
+            zlib.adler32(first + second)
+        )
+
+    def test_005_srgb(self):
+        self.output.icc_profile = "sRGB"
+        result = self.decode(self.output.bytes_of(self.image("RGB")))
+        self.assertIn("srgb", result.info)
+        self.assertNotIn("icc_profile", result.info)
+
+    def test_006_icc_profile(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"profile")
+        try:
+            self.output.icc_profile = f.name
+            result = self.decode(self.output.bytes_of(self.image("RGB")))
+            self.assertEqual(result.info["icc_profile"], b"profile")
+        finally:
+            os.unlink(f.name)
+
+    def test_007_small_images_use_pillow(self):
+        image = self.image("RGB", 16, 16)
+        self.assertFalse(parallel_png.supports(image))
+        self.assertFalse(parallel_png.supports(self.image("RGB").convert("P")))
+        self.assertEqual(self.decode(self.output.bytes_of(image)).tobytes(), image.tobytes())
+
+
+class ClosingFrame(SinglePixelFrame):
+
+    closed = Bool(False)
+
+    def close(self):
+        self.closed = True
+
+
+class CountingClip(Clip):
+
+    def __init__(self):
+        super(CountingClip, self).__init__(None)
+        self.requests = 0
+        self.frames = []
+
+    def __len__(self):
+        return 2
+
+    @inline_resolved
+    def __getitem__(self, item):
+        self.requests += 1
+        frame = ClosingFrame(format="RGB")
+        self.frames.append(frame)
+        return frame
+
+
+class TestEncodedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.output = YuunoImageOutput()
+        self.output.icc_profile = None
+        self.clip = CountingClip()
+
+    def test_001_hit(self):
+        first = self.output.encode_frame(self.clip, 0).result()
+        second = self.output.encode_frame(self.clip, 0).result()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.image.data, TestPNGOutput.EXPECTED_RESULT_SIMPLE)
+        self.assertEqual(first.size, (1, 1))
+        self.assertEqual(self.clip.requests, 1)
+
+        stats = self.output.encoded_cache.statistics()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 1, 1))
+        self.assertEqual(stats.size, len(first.image.data))
+
+    def test_002_key(self):
+        self.output.encode_frame(self.clip, 0).result()
+        self.output.encode_frame(self.clip, 1).result()
+        self.output.encode_frame(self.clip, 0, "jpeg").result()
+        self.output.encode_frame(CountingClip(), 0).result()
+        self.assertEqual(self.output.encoded_cache.statistics().hits, 0)
+
+        # Regions are identified by the clip they are cut out of.
+        self.assertEqual(self.clip.region(1, (0, 0, 1, 1)).cache_key(), self.clip.region(1, (0, 0, 1, 1)).cache_key())
+        self.assertNotEqual(self.clip.region(1, (0, 0, 1, 1)).cache_key(), self.clip.cache_key())
+
+    def test_003_settings_invalidate(self):
+        self.output.encode_frame(self.clip, 0).result()
+        self.output.zlib_compression = 1
+        self.assertEqual(len(self.output.encoded_cache), 0)
+
+        self.output.encode_frame(self.clip, 0).result()
+        self.assertEqual(self.clip.requests, 2)
+
+    def test_004_disabled(self):
+        self.output.encoded_cache_size = 0
+        self.output.encode_frame(self.clip, 0).result()
+        self.output.encode_frame(self.clip, 0).result()
+        self.assertEqual(self.clip.requests, 2)
+
+    def test_005_uncached(self):
+        self.output.encode_frame(self.clip, 0, cache=False).result()
+        self.assertEqual(len(self.output.encoded_cache), 0)
+
+    def test_006_cancelled_before_render(self):
+        with self.assertRaises(CancelledError):
+            self.output.encode_frame(self.clip, 0, cancelled=lambda: True).result()
+        self.assertEqual(self.clip.requests, 0)
+
+    def test_007_closes_frame(self):
+        self.output.encode_frame(self.clip, 0).result()
+        self.assertEqual([f.closed for f in self.clip.frames], [True])
+
+        with self.assertRaises(CancelledError):
+            self.output.encode_frame(self.clip, 1, cancelled=lambda: self.clip.requests > 1).result()
+        self.assertEqual([f.closed for f in self.clip.frames], [True, True])
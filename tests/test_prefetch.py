@@ -0,0 +1,107 @@
+import unittest
+from concurrent.futures import Future
+
+from yuuno.prefetch import ReadAhead
+
+
+class TestReadAhead(unittest.TestCase):
+
+    def setUp(self):
+        self.read_ahead = ReadAhead(depth=3, concurrency=1)
+        self.rendered = []
+        self.futures = {}
+
+    def tearDown(self):
+        del self.read_ahead
+
+    def render(self, frameno):
+        self.rendered.append(frameno)
+        fut = Future()
+        self.futures[frameno] = fut
+        return fut
+
+    def finish(self, frameno):
+        self.futures.pop(frameno).set_result(None)
+
+    def test_001_forward_scrubbing(self):
+        self.read_ahead.request(10, 100, self.render)
+        self.assertEqual(self.rendered, [11])
+
+        self.finish(11)
+        self.assertEqual(self.rendered, [11, 12])
+
+        self.finish(12)
+        self.finish(13)
+        self.assertEqual(self.rendered, [11, 12, 13])
+
+    def test_002_learn_direction_and_step(self):
+        self.read_ahead.request(50, 100, self.render)
+        self.finish(51)
+        self.read_ahead.request(48, 100, self.render)
+        self.assertEqual(self.read_ahead.predict(48, 100), [46, 44, 42])
+
+        self.finish(52)
+        self.assertEqual(self.rendered[-1], 46)
+
+    def test_003_jump_drops_queue(self):
+        self.read_ahead.request(10, 100, self.render)
+        generation = self.read_ahead.generation
+
+        self.read_ahead.request(80, 100, self.render)
+        self.assertGreater(self.read_ahead.generation, generation)
+
+        # The running render occupies the only slot.
+        self.assertEqual(self.rendered, [11])
+        self.finish(11)
+        self.assertEqual(self.rendered, [11, 81])
+
+    def test_004_following_prediction_keeps_generation(self):
+        self.read_ahead.request(10, 100, self.render)
+        generation = self.read_ahead.generation
+        self.read_ahead.request(11, 100, self.render)
+        self.assertEqual(self.read_ahead.generation, generation)
+
+    def test_005_clip_bounds(self):
+        self.read_ahead.request(98, 100, self.render)
+        self.assertEqual(self.read_ahead.predict(98, 100), [99])
+
+    def test_006_concurrency(self):
+        self.read_ahead.concurrency = 2
+        self.read_ahead.request(0, 100, self.render)
+        self.assertEqual(self.rendered, [1, 2])
+        self.assertEqual(self.read_ahead.running, 2)
+
+    def test_007_disabled(self):
+        self.read_ahead.depth = 0
+        self.read_ahead.request(0, 100, self.render)
+        self.assertEqual(self.rendered, [])
+
+    def test_008_target_change_resets(self):
+        self.read_ahead.request(10, 100, self.render, target="a")
+        self.read_ahead.request(11, 100, self.render, target="a")
+        self.finish(11)
+        self.read_ahead.request(11, 100, self.render, target="b")
+        self.assertEqual(self.read_ahead.predict(11, 100), [12, 13, 14])
+
+    def test_009_synchronous_renders(self):
+        def render(frameno):
+            self.rendered.append(frameno)
+            fut = Future()
+            fut.set_result(None)
+            return fut
+
+        self.read_ahead.depth = 200
+        self.read_ahead.request(0, 1000, render)
+        self.assertEqual(self.rendered, list(range(1, 201)))
+        self.assertEqual(self.read_ahead.running, 0)
+
+    def test_010_stale_renders_are_not_finished(self):
+        self.read_ahead.request(10, 100, self.render)
+        self.read_ahead.request(80, 100, self.render)
+        self.finish(11)
+
+        # Frame 11 was rendered for an abandoned prediction, so it is requested again.
+        self.read_ahead.request(9, 100, self.render)
+        self.read_ahead.request(10, 100, self.render)
+        self.finish(81)
+        self.assertEqual(self.rendered, [11, 81, 11])
@@ -1,5 +1,14 @@
+import sys
+import math
 import typing as t
-from yuuno.utils import Future
+from array import array
+
+from yuuno.utils import Future, future_yield_coro, ordered
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Format(t.NamedTuple):
@@ -8,6 +17,23 @@ class Format(t.NamedTuple):
     frames: int
     sample_count: int
 
+    # A bitmask of the channels as used by VapourSynth and WAVE_FORMAT_EXTENSIBLE.
+    # The channels are stored in the order of their bits. 0 if the layout is unknown.
+    channel_layout: int = 0
+
+
+class Transport(t.NamedTuple):
+    """
+    Describes how the samples are sent to the browser.
+    """
+    sample_type: str
+    channel_count: int
+    samples_per_second: int
+
+    @property
+    def sample_width(self) -> int:
+        return SAMPLE_WIDTHS[self.sample_type]
+
 
 class Audio(object):
 
@@ -18,8 +44,315 @@ class Audio(object):
         raise NotImplementedError
 
     def __getitem__(self, frame: int) -> Future:
+        """
+        Renders a chunk of the audio.
+
+        :param frame: The index of the chunk.
+        :return: A future resolving to the samples of each channel as little endian float32.
+        """
         raise NotImplementedError
 
     def __len__(self) -> int:
         raise NotImplementedError
 
+    def cache_key(self) -> t.Hashable:
+        """
+        Returns a key that is equal for all objects producing the same samples.
+        """
+        return self
+
+
+class Waveform(t.NamedTuple):
+    """
+    An overview of the audio: The minimum, the maximum and the RMS of each bucket of samples.
+    """
+    bucket_size: int
+    buckets: int
+    channel_count: int
+
+    # Little endian float32 of the shape (channel_count, 3, buckets):
+    # For each channel, the minimums, the maximums and the RMS of all buckets.
+    data: bytes
+
+
+SAMPLE_WIDTHS = {
+    "float32": 4,
+    "int16": 2,
+}
+
+# The factors a clip may be resampled by. Each of them divides the length of a chunk,
+# so the chunks can be resampled independently from each other.
+RESAMPLE_FACTORS = (1, 2, 3, 4, 6, 8)
+
+# The channels by their bit in the channel layout.
+LEFT_CHANNELS = {0, 4, 6, 9, 12, 15, 29, 31, 33}
+RIGHT_CHANNELS = {1, 5, 7, 10, 14, 17, 30, 32, 34}
+LFE_CHANNELS = {3, 35}
+FRONT_CHANNELS = {0, 1}
+
+# -3dB for every channel except the front channels.
+SURROUND_GAIN = 0.5 ** 0.5
+
+
+def negotiate(format: Format, sample_types: t.Sequence[str], max_channels: int = 0,
+              max_sample_rate: int = 0) -> Transport:
+    """
+    Selects the transport format for the audio.
+
+    Downmixing and resampling need numpy. Without numpy, the audio keeps its channels and its sample rate.
+
+    :param format:          The format of the audio.
+    :param sample_types:    The sample types the client accepts, ordered by preference.
+    :param max_channels:    Downmix to stereo or mono if the audio has more channels. 0 keeps all channels.
+    :param max_sample_rate: Resample the audio if it has a higher sample rate. 0 keeps the sample rate.
+    :return: The transport format.
+    """
+    sample_type = next((st for st in sample_types if st in SAMPLE_WIDTHS), "float32")
+
+    channel_count = format.channel_count
+    if numpy is not None and 0 < max_channels < channel_count:
+        channel_count = min(2, max_channels)
+
+    factor = 1
+    if numpy is not None and max_sample_rate > 0:
+        for factor in RESAMPLE_FACTORS:
+            if format.samples_per_second % factor == 0 and format.samples_per_second // factor <= max_sample_rate:
+                break
+        else:
+            factor = 1
+
+    return Transport(sample_type, channel_count, format.samples_per_second // factor)
+
+
+def transport_format(format: Format, transport: Transport) -> Format:
+    """
+    Returns the format of the audio as seen by the client.
+    """
+    factor = format.samples_per_second // transport.samples_per_second
+    return format._replace(
+        channel_count=transport.channel_count,
+        samples_per_second=transport.samples_per_second,
+        sample_count=-(-format.sample_count // factor),
+        channel_layout=0
+    )
+
+
+def _channel_bits(format: Format) -> t.List[int]:
+    layout = format.channel_layout or ((1 << format.channel_count) - 1)
+    bits = [bit for bit in range(layout.bit_length()) if layout & (1 << bit)]
+    if len(bits) != format.channel_count:
+        bits = list(range(format.channel_count))
+    return bits
+
+
+def downmix_matrix(format: Format, channel_count: int) -> 'numpy.ndarray':
+    """
+    Returns the coefficients to downmix the channels to stereo or mono.
+
+    The low-frequency channels are dropped and each output channel is normalized, so it cannot clip.
+
+    :param format:        The format of the audio.
+    :param channel_count: 1 or 2.
+    :return: A matrix of shape (channel_count, format.channel_count).
+    """
+    matrix = numpy.zeros((2, format.channel_count))
+    for index, bit in enumerate(_channel_bits(format)):
+        if bit in LFE_CHANNELS:
+            continue
+
+        gain = 1.0 if bit in FRONT_CHANNELS else SURROUND_GAIN
+        if bit not in RIGHT_CHANNELS:
+            matrix[0, index] = gain
+        if bit not in LEFT_CHANNELS:
+            matrix[1, index] = gain
+
+    if channel_count == 1:
+        matrix = matrix.sum(axis=0, keepdims=True)
+
+    total = matrix.sum(axis=1, keepdims=True)
+    total[total == 0] = 1
+    return matrix / total
+
+
+def _decimate(samples: 'numpy.ndarray', factor: int) -> 'numpy.ndarray':
+    # Averaging the samples suppresses most of the aliasing. Good enough for a preview.
+    if factor == 1:
+        return samples
+
+    channels, length = samples.shape
+    whole = length // factor * factor
+    result = samples[:, :whole].reshape(channels, -1, factor).mean(axis=2)
+    if whole < length:
+        result = numpy.concatenate((result, samples[:, whole:].mean(axis=1, keepdims=True)), axis=1)
+    return result
+
+
+def __convert_numpy(chunk: t.Sequence[bytes], format: Format, transport: Transport) -> t.Tuple[bytes, ...]:
+    samples = numpy.stack([numpy.frombuffer(channel, dtype="<f4") for channel in chunk])
+
+    if transport.channel_count != format.channel_count:
+        samples = downmix_matrix(format, transport.channel_count).astype(numpy.float32) @ samples
+    samples = _decimate(samples, format.samples_per_second // transport.samples_per_second)
+
+    if transport.sample_type == "int16":
+        # Quantize in double precision, so the result matches the fallback exactly.
+        samples = numpy.rint(numpy.clip(samples.astype(numpy.float64), -1.0, 1.0) * 32767).astype("<i2")
+    else:
+        samples = samples.astype("<f4", copy=False)
+
+    return tuple(channel.tobytes() for channel in samples)
+
+
+def __convert_python(chunk: t.Sequence[bytes], format: Format, transport: Transport) -> t.Tuple[bytes, ...]:
+    # negotiate() only selects the sample type without numpy.
+    if transport.sample_type == "float32":
+        return tuple(chunk)
+
+    result = []
+    for channel in chunk:
+        samples = array("f", channel)
+        if sys.byteorder == "big":
+            samples.byteswap()
+
+        converted = array("h", [round((v if -1.0 <= v <= 1.0 else (1.0 if v > 0 else -1.0)) * 32767) for v in samples])
+        if sys.byteorder == "big":
+            converted.byteswap()
+        result.append(converted.tobytes())
+    return tuple(result)
+
+
+def convert(chunk: t.Sequence[bytes], format: Format, transport: Transport) -> t.Tuple[bytes, ...]:
+    """
+    Converts a rendered chunk into the transport format.
+
+    :param chunk:     The samples of each channel as little endian float32.
+    :param format:    The format of the audio.
+    :param transport: The transport format as returned by :func:`negotiate`.
+    :return: The samples of each channel of the transport format in little endian.
+    """
+    if transport == Transport("float32", format.channel_count, format.samples_per_second):
+        return tuple(chunk)
+
+    if numpy is not None:
+        return __convert_numpy(chunk, format, transport)
+    return __convert_python(chunk, format, transport)
+
+
+class WaveformSummary(object):
+    """
+    Summarizes a stream of chunks into a :class:`Waveform`.
+
+    The chunks are summarized as they arrive, so the audio never has to be kept in memory.
+    Samples that do not fill a bucket are kept until the next chunk arrives.
+    """
+
+    def __init__(self, channel_count: int, bucket_size: int):
+        self.channel_count = channel_count
+        self.bucket_size = bucket_size
+
+        self._rest = [array("f") for _ in range(channel_count)]
+        self._buckets = 0
+
+        # The minimums, the maximums and the RMS of each channel.
+        self._values = [[array("f") for _ in range(3)] for _ in range(channel_count)]
+
+    def add(self, chunk: t.Sequence[bytes]) -> None:
+        """
+        Adds the next chunk.
+
+        :param chunk: The samples of each channel as little endian float32.
+        """
+        if numpy is not None:
+            self._add_numpy(chunk)
+        else:
+            self._add_python(chunk)
+
+    def finish(self) -> Waveform:
+        """
+        Summarizes the remaining samples and returns the waveform.
+        """
+        if len(self._rest[0]) > 0:
+            self._summarize_python(0, len(self._rest[0]))
+            self._rest = [array("f") for _ in range(self.channel_count)]
+
+        values = array("f")
+        for channel in self._values:
+            for value in channel:
+                values.extend(value)
+        if sys.byteorder == "big":
+            values.byteswap()
+
+        return Waveform(self.bucket_size, self._buckets, self.channel_count, values.tobytes())
+
+    def _add_numpy(self, chunk: t.Sequence[bytes]) -> None:
+        samples = numpy.stack([
+            numpy.concatenate((numpy.frombuffer(rest, dtype="=f4"), numpy.frombuffer(channel, dtype="<f4")))
+            for rest, channel in zip(self._rest, chunk)
+        ])
+
+        buckets = samples.shape[1] // self.bucket_size
+        whole = buckets * self.bucket_size
+        self._rest = [array("f", channel[whole:].astype("=f4").tobytes()) for channel in samples]
+        if buckets == 0:
+            return
+
+        blocks = samples[:, :whole].reshape(self.channel_count, buckets, self.bucket_size)
+        summary = (
+            blocks.min(axis=2),
+            blocks.max(axis=2),
+            numpy.sqrt(numpy.square(blocks, dtype=numpy.float64).mean(axis=2)),
+        )
+        for channel, values in enumerate(self._values):
+            for value, result in zip(values, summary):
+                value.frombytes(result[channel].astype("=f4").tobytes())
+        self._buckets += buckets
+
+    def _add_python(self, chunk: t.Sequence[bytes]) -> None:
+        for rest, channel in zip(self._rest, chunk):
+            samples = array("f", channel)
+            if sys.byteorder == "big":
+                samples.byteswap()
+            rest.extend(samples)
+
+        start = 0
+        while len(self._rest[0]) - start >= self.bucket_size:
+            self._summarize_python(start, self.bucket_size)
+            start += self.bucket_size
+        self._rest = [rest[start:] for rest in self._rest]
+
+    def _summarize_python(self, start: int, size: int) -> None:
+        for rest, (minimums, maximums, rms) in zip(self._rest, self._values):
+            samples = rest[start:start + size]
+            minimums.append(min(samples))
+            maximums.append(max(samples))
+            rms.append(math.sqrt(math.fsum(v * v for v in samples) / size))
+        self._buckets += 1
+
+
+@future_yield_coro
+def waveform(audio: Audio, buckets: int, window: int = 2,
+             progress: t.Optional[t.Callable[[float], None]] = None,
+             render: t.Optional[t.Callable[[int], Future]] = None) -> Waveform:
+    """
+    Renders the whole audio and summarizes it into a waveform.
+
+    :param audio:    The audio to summarize.
+    :param buckets:  The maximal number of buckets.
+    :param window:   How many chunks may be rendered at the same time.
+    :param progress: Called with the completed fraction after each chunk.
+    :param render:   Renders a chunk of the audio, e.g. through a cache. Defaults to ``audio[frame]``.
+    :return: A future resolving to the waveform.
+    """
+    format = audio.format()
+    summary = WaveformSummary(format.channel_count, max(1, -(-format.sample_count // max(1, buckets))))
+
+    if render is None:
+        render = audio.__getitem__
+
+    length = len(audio)
+    for index, future in enumerate(ordered(render, range(length), window)):
+        summary.add((yield future))
+        if progress is not None:
+            progress((index + 1) / length)
+
+    return summary.finish()
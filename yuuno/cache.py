@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from threading import RLock
+from collections import OrderedDict
+from typing import TypeVar, Generic, NamedTuple, Optional, Callable, Hashable, Tuple
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStatistics(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+    budget: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+
+def sizeof(value) -> int:
+    """
+    Default size function: Works for every object supporting len().
+    """
+    return len(value)
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A thread-safe LRU-cache whose size is bounded by a byte budget.
+
+    The least recently used entries are evicted until the size of all
+    entries fits into the budget. Entries larger than the whole budget
+    are not stored at all. A budget of zero disables the cache.
+    """
+
+    def __init__(self, budget: int, sizeof: Callable[[V], int] = sizeof):
+        self._budget = max(0, budget)
+        self._sizeof = sizeof
+
+        self._lock = RLock()
+        self._entries: 'OrderedDict[K, Tuple[V, int]]' = OrderedDict()
+        self._size = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: int) -> None:
+        with self._lock:
+            self._budget = max(0, value)
+            self._evict()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Returns the entry and marks it as recently used.
+
+        :param key:     The key of the entry.
+        :param default: The value to return if the entry is not cached.
+        :return: The entry or the default value.
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: K, value: V, size: Optional[int] = None) -> None:
+        """
+        Stores an entry. An existing entry with the same key is replaced.
+
+        :param key:   The key of the entry.
+        :param value: The value to store.
+        :param size:  The size of the value in bytes. Calculated if omitted.
+        """
+        if size is None:
+            size = self._sizeof(value)
+
+        with self._lock:
+            self.discard(key)
+            if size > self._budget:
+                return
+
+            self._entries[key] = (value, size)
+            self._size += size
+            self._evict()
+
+    def discard(self, key: K) -> None:
+        """
+        Removes the entry if it is cached.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+    def invalidate(self, predicate: Optional[Callable[[K], bool]] = None) -> None:
+        """
+        Removes all entries whose key match the predicate.
+
+        :param predicate: Returns true for all keys to remove. Removes all entries if omitted.
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                self._size = 0
+                return
+
+            for key in [k for k in self._entries if predicate(k)]:
+                self.discard(key)
+
+    clear = invalidate
+
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            return CacheStatistics(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+                budget=self._budget
+            )
+
+    def _evict(self) -> None:
+        while self._size > self._budget and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
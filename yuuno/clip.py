@@ -17,11 +17,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import math
 from enum import IntEnum
-from typing import TypeVar, NamedTuple, Tuple, Dict, Tuple
+from typing import TypeVar, NamedTuple, Tuple, Dict, Tuple, Iterable, Iterator, Hashable
 
-from PIL.Image import Image
+from PIL.Image import Image, BICUBIC
 
-from yuuno.utils import inline_resolved, Future
+from yuuno.utils import inline_resolved, future_yield_coro, ordered, Future
 
 
 T = TypeVar("T")
@@ -32,6 +32,13 @@ class Size(NamedTuple):
     height: int
 
 
+class Box(NamedTuple):
+    left: int
+    top: int
+    width: int
+    height: int
+
+
 class SampleType(IntEnum):
     INTEGER = 0
     FLOAT = 1
@@ -68,12 +75,24 @@ class Frame(object):
     This class represents a single frame out of a clip.
     """
 
+    __slots__ = ()
+
     def to_pil(self) -> Image:
         """
         Generates an RGB (or RGBA) 8bit PIL-Image from the frame.
         :return: A PIL-Image with the frame data.
         """
 
+    @inline_resolved
+    def to_pil_async(self) -> Image:
+        """
+        Generates the PIL-Image without blocking the calling thread.
+
+        Override this function if the image has to be rendered first.
+        :return: A future with the PIL-Image.
+        """
+        return self.to_pil()
+
     def format(self) -> RawFormat:
         """
         Returns the raw-format of the image.
@@ -126,6 +145,21 @@ class Frame(object):
     def get_raw_data_async(self) -> Tuple[Size, RawFormat, bytes]:
         return self.size(), self.format(), self.to_raw()
 
+    def close(self) -> None:
+        """
+        Frees the resources held by the frame.
+
+        Call this once per frame returned by :meth:`Clip.__getitem__`.
+        Don't use the frame afterwards. Images returned by
+        :meth:`to_pil` stay valid.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
 
 class Clip(object):
     """
@@ -157,3 +191,139 @@ class Clip(object):
         :return: A frame-instance with the given data.
         """
         raise NotImplementedError
+
+    def get_frames(self, frames: Iterable[int], prefetch: int = 4) -> Iterator[Frame]:
+        """
+        Streams the frames in the given order.
+
+        Close each frame once you are done with it.
+
+        :param frames:   The frame numbers.
+        :param prefetch: How many frames may be requested at the same time.
+        :return: An iterator of frame-instances.
+        """
+        for future in self.get_frames_async(frames, prefetch):
+            yield future.result()
+
+    def get_frames_async(self, frames: Iterable[int], prefetch: int = 4) -> Iterator[Future]:
+        """
+        Requests the frames ahead of the consumer.
+
+        The futures are returned in the given order. At most ``prefetch``
+        frames are in flight at the same time. Override this function if
+        a frame needs more than :meth:`__getitem__` to be fetched.
+
+        :param frames:   The frame numbers.
+        :param prefetch: How many frames may be requested at the same time.
+        :return: An iterator of futures resolving to the frames.
+        """
+        return ordered(self.__getitem__, frames, prefetch)
+
+    def scaled(self, factor: float) -> 'Clip':
+        """
+        Returns a clip whose images are rendered at a fraction of their size.
+
+        The frames still report the size of the original clip. Clips
+        that cannot scale their images return themselves.
+
+        :param factor: The scale factor. Values of 1 and above return the clip itself.
+        :return: The scaled clip.
+        """
+        return self
+
+    def region(self, factor: float, box: Box) -> 'Clip':
+        """
+        Returns a clip whose images only contain a part of the scaled images.
+
+        Like with :meth:`scaled`, the frames still report the size of
+        the original clip. Clips that can convert only a part of a frame
+        should override this function. By default the region is cropped
+        out of the scaled image. If the clip cannot scale its images,
+        the region is cropped out of the full image and scaled afterwards.
+
+        :param factor: The scale factor. See :meth:`scaled`.
+        :param box:    The region inside the scaled image.
+        :return: The clip rendering the region.
+        """
+        scaled = self.scaled(factor)
+        if scaled is self and factor < 1:
+            return RegionClip(self, Box(*box), factor)
+        return RegionClip(scaled, Box(*box))
+
+    def cache_key(self) -> Hashable:
+        """
+        Identifies the images rendered by this clip.
+
+        Two clips with the same key render the same images.
+        Wrappers should return the key of the object they wrap so
+        cached images survive the clip being wrapped again.
+
+        :return: A hashable object.
+        """
+        return self
+
+
+class RegionFrame(Frame):
+    """
+    Crops a region out of the image of another frame.
+
+    If a factor below 1 is given, the box is in the coordinates of the
+    image scaled by this factor. The region is then cropped out of the
+    full image and scaled down to the size of the box.
+    """
+
+    def __init__(self, frame: Frame, box: Box, factor: float = 1) -> None:
+        self.frame = frame
+        self.box = box
+        self.factor = factor
+
+    def _crop(self, image: Image) -> Image:
+        left, top, width, height = self.box
+        if self.factor >= 1:
+            return image.crop((left, top, left+width, top+height))
+
+        # The size of the scaled image is rounded up. Don't read past the edge of the full image.
+        source = (
+            left / self.factor,
+            top / self.factor,
+            min(image.width, (left+width) / self.factor),
+            min(image.height, (top+height) / self.factor)
+        )
+        return image.resize((width, height), BICUBIC, box=source)
+
+    def to_pil(self) -> Image:
+        return self._crop(self.frame.to_pil())
+
+    @future_yield_coro
+    def to_pil_async(self) -> Future:
+        return self._crop((yield self.frame.to_pil_async()))
+
+    def size(self) -> Size:
+        return self.frame.size()
+
+    def properties(self) -> Dict[str, Tuple[str]]:
+        return self.frame.properties()
+
+    def close(self) -> None:
+        self.frame.close()
+
+
+class RegionClip(Clip):
+    """
+    Renders a region of the frames of another clip.
+    """
+
+    def __init__(self, clip: Clip, box: Box, factor: float = 1) -> None:
+        super(RegionClip, self).__init__(clip)
+        self.box = box
+        self.factor = factor
+
+    def __len__(self) -> int:
+        return len(self.clip)
+
+    @future_yield_coro
+    def __getitem__(self, item: int) -> Future:
+        return RegionFrame((yield self.clip[item]), self.box, self.factor)
+
+    def cache_key(self) -> Hashable:
+        return (self.clip.cache_key(), self.factor, self.box)
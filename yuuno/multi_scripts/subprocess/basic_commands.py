@@ -67,7 +67,8 @@ class BasicCommands(object):
             frame = yield clip[frame]
         except IndexError:
             return None
-        return frame.size(), frame.format()
+        with frame:
+            return frame.size(), frame.format()
 
     @future_yield_coro
     def frame_data(self, id: str, frame: int):
@@ -79,13 +80,14 @@ class BasicCommands(object):
             frame = yield clip[frame]
         except IndexError:
             return None
-        frame = frame.to_raw()
+        with frame:
+            _, _, data = yield frame.get_raw_data_async()
 
         from yuuno.multi_scripts.subprocess.process import FRAME_BUFFER_SIZE
-        if len(frame) > FRAME_BUFFER_SIZE:
-            return frame
+        if len(data) > FRAME_BUFFER_SIZE:
+            return data
 
         with self.env.framebuffer() as f:
-            f[:len(frame)] = frame
+            f[:len(data)] = data
 
-        return len(frame)
+        return len(data)
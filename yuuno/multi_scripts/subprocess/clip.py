@@ -16,12 +16,12 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 from typing import TYPE_CHECKING
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Iterable, Iterator
 
 from PIL.Image import Image, frombuffer, merge
 
 from yuuno.clip import Clip, Frame, Size, RawFormat
-from yuuno.utils import future_yield_coro, auto_join, inline_resolved, gather
+from yuuno.utils import future_yield_coro, inline_resolved, gather, ordered, Future
 
 if TYPE_CHECKING:
     from yuuno.multi_scripts.subprocess.process import Subprocess
@@ -80,9 +80,11 @@ class ProxyFrame(Frame):
     def to_raw(self) -> bytes:
         return self._raw_async().result()
 
-    @auto_join
-    @future_yield_coro
     def to_pil(self):
+        return self.to_pil_async().result()
+
+    @future_yield_coro
+    def to_pil_async(self):
         if self._cached_img is not None:
             return self._cached_img
 
@@ -100,7 +102,8 @@ class ProxyFrame(Frame):
         pil_format = "RGB"
         if format.num_planes == 4:
             pil_format += "A"
-        return merge(pil_format, planes)
+        self._cached_img = merge(pil_format, planes)
+        return self._cached_img
 
     @future_yield_coro
     def get_raw_data_async(self) -> Tuple[Size, RawFormat, bytes]:
@@ -126,3 +129,13 @@ class ProxyClip(Clip):
         if item >= len(self):
             raise IndexError("The clip does not have as many frames.")
         return ProxyFrame(clip=self.clip, frameno=item, script=self.script)
+
+    @future_yield_coro
+    def _fetch(self, item):
+        frame = yield self[item]
+        # The subprocess renders the frame while the previous frames are transferred.
+        yield frame._meta()
+        return frame
+
+    def get_frames_async(self, frames: Iterable[int], prefetch: int = 4) -> Iterator[Future]:
+        return ordered(self._fetch, frames, prefetch)
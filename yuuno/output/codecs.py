@@ -0,0 +1,131 @@
+# -*- encoding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from io import BytesIO
+from typing import TYPE_CHECKING, Dict, NamedTuple
+
+from PIL import features
+from PIL.Image import Image
+
+from yuuno.clip import Size
+
+if TYPE_CHECKING:
+    from yuuno.output.pil2png import YuunoImageOutput
+
+
+class EncodedImage(NamedTuple):
+    codec: str
+    mime: str
+    data: bytes
+
+
+class EncodedFrame(NamedTuple):
+    image: EncodedImage
+    # The size of the frame and the size of the encoded image, which differ for scaled clips.
+    size: Size
+    image_size: Size
+
+
+class Codec(object):
+    """
+    Encodes images for the transfer to the frontend.
+    """
+
+    name: str = None
+    mime: str = None
+
+    def supports(self, image: Image) -> bool:
+        """
+        Checks if the codec can encode the image without losing its alpha channel.
+        """
+        return True
+
+    def encode(self, output: 'YuunoImageOutput', image: Image) -> bytes:
+        raise NotImplementedError
+
+
+class PNGCodec(Codec):
+    name = "png"
+    mime = "image/png"
+
+    def encode(self, output: 'YuunoImageOutput', image: Image) -> bytes:
+        return output.bytes_of(image)
+
+
+class WebPCodec(Codec):
+    """
+    Lossless WebP. Usually smaller and faster to encode than PNG.
+    """
+    name = "webp"
+    mime = "image/webp"
+
+    def supports(self, image: Image) -> bool:
+        return image.mode in ("RGB", "RGBA") and features.check("webp")
+
+    def encode(self, output: 'YuunoImageOutput', image: Image) -> bytes:
+        f = BytesIO()
+        image.save(f, format="webp", lossless=True, method=output.webp_method, **output.icc_settings())
+        return f.getvalue()
+
+
+class JPEGCodec(Codec):
+    """
+    Lossy, but very fast. Meant for scrubbing through a clip.
+    """
+    name = "jpeg"
+    mime = "image/jpeg"
+
+    def supports(self, image: Image) -> bool:
+        return image.mode in ("RGB", "L")
+
+    def encode(self, output: 'YuunoImageOutput', image: Image) -> bytes:
+        f = BytesIO()
+        # Don't subsample the chroma. The previews are often used to judge chroma artifacts.
+        image.save(f, format="jpeg", quality=output.jpeg_quality, subsampling=0, **output.icc_settings())
+        return f.getvalue()
+
+
+class RawCodec(Codec):
+    """
+    Uncompressed RGBA pixels. Only sensible if the kernel runs on the same host.
+    """
+    name = "raw"
+    mime = "application/x-yuuno-rgba"
+
+    def encode(self, output: 'YuunoImageOutput', image: Image) -> bytes:
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        return image.tobytes()
+
+
+CODECS: Dict[str, Codec] = {
+    codec.name: codec
+    for codec in (PNGCodec(), WebPCodec(), JPEGCodec(), RawCodec())
+}
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Returns the codec with the given name.
+
+    :param name: The name of the codec.
+    :return: The codec.
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec: {name}") from None
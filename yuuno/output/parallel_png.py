@@ -0,0 +1,268 @@
+# -*- encoding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A PNG writer that compresses the image on multiple threads.
+
+The filtered scanlines are split into blocks of whole rows. Each block is
+deflated on its own, seeded with the last 32KiB of the block before it,
+and ends on a byte boundary. The blocks are then concatenated into a
+single zlib-stream, which is what pigz does for gzip-files.
+zlib and numpy release the GIL, so the blocks are compressed in parallel.
+"""
+import os
+import zlib
+import struct
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from PIL.Image import Image, register_save
+from PIL.PngImagePlugin import putchunk, _save
+
+from yuuno.output.srgb_png import SRGB_MARKER, putchunk_srgb, save_srgb_png
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+FORMAT_NAME = "png+parallel.yuuno"
+
+# Images smaller than this are not worth the overhead of the threads.
+MIN_PARALLEL_SIZE = 1 << 20
+
+# The amount of filtered image data compressed by each job.
+BLOCK_SIZE = 1 << 18
+
+# Deflate can reference up to 32KiB of previous data.
+WINDOW_SIZE = 1 << 15
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+COLOR_TYPES = {
+    "L": (0, 1),
+    "RGB": (2, 3),
+    "RGBA": (6, 4),
+}
+
+
+class CompressedBlock(NamedTuple):
+    data: bytes
+    crc: int
+    adler: int
+    length: int
+
+
+def supports(im: Image) -> bool:
+    """
+    Checks if the image is large enough and in a mode the parallel writer supports.
+    """
+    if numpy is None or im.mode not in COLOR_TYPES:
+        return False
+    return im.width * im.height * COLOR_TYPES[im.mode][1] >= MIN_PARALLEL_SIZE
+
+
+def adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    """
+    Returns the adler32-checksum of two concatenated buffers.
+
+    :param adler1: The checksum of the first buffer.
+    :param adler2: The checksum of the second buffer.
+    :param len2:   The length of the second buffer.
+    """
+    base = 65521
+    rem = len2 % base
+    sum1 = adler1 & 0xffff
+    sum2 = (rem * sum1) % base
+    sum1 = (sum1 + (adler2 & 0xffff) + base - 1) % base
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + base - rem) % base
+    return sum1 | (sum2 << 16)
+
+
+def zlib_header(level: int) -> bytes:
+    if level < 0 or level == 6:
+        flevel = 2
+    elif level < 2:
+        flevel = 0
+    elif level < 6:
+        flevel = 1
+    else:
+        flevel = 3
+
+    cmf = 0x78
+    flg = flevel << 6
+    flg += 31 - ((cmf << 8) + flg) % 31
+    return bytes((cmf, flg))
+
+
+def filter_rows(pixels: 'numpy.ndarray', bpp: int, start: int, stop: int) -> 'numpy.ndarray':
+    """
+    Filters the given rows of the image.
+
+    Like libpng, each row uses the filter with the smallest sum of absolute differences.
+
+    :param pixels: The image as an array of shape (height, width*bpp).
+    :param bpp:    The bytes per pixel.
+    :param start:  The first row to filter.
+    :param stop:   The row after the last row to filter.
+    :return: The filtered rows, each prefixed with its filter type.
+    """
+    cur = pixels[start:stop]
+    up = numpy.zeros_like(cur)
+    up[1:] = cur[:-1]
+    if start > 0:
+        up[0] = pixels[start-1]
+    left = numpy.zeros_like(cur)
+    left[:, bpp:] = cur[:, :-bpp]
+    upleft = numpy.zeros_like(cur)
+    upleft[:, bpp:] = up[:, :-bpp]
+
+    # Paeth needs the signed differences.
+    a = left.astype(numpy.int16)
+    b = up.astype(numpy.int16)
+    c = upleft.astype(numpy.int16)
+    pa = numpy.abs(b - c)
+    pb = numpy.abs(a - c)
+    pc = numpy.abs(a + b - c - c)
+    paeth = numpy.where((pa <= pb) & (pa <= pc), left, numpy.where(pb <= pc, up, upleft))
+
+    candidates = (
+        cur,
+        cur - left,
+        cur - up,
+        cur - ((left >> 1) + (up >> 1) + (left & up & 1)),
+        cur - paeth,
+    )
+    costs = numpy.stack([numpy.minimum(f, -f).sum(axis=1, dtype=numpy.uint32) for f in candidates])
+    choice = costs.argmin(axis=0)
+
+    result = numpy.empty((cur.shape[0], cur.shape[1] + 1), dtype=numpy.uint8)
+    result[:, 0] = choice
+    for filter_type, filtered in enumerate(candidates):
+        rows = choice == filter_type
+        result[rows, 1:] = filtered[rows]
+    return result
+
+
+def compress_block(pixels: 'numpy.ndarray', bpp: int, start: int, stop: int, level: int, last: bool) -> CompressedBlock:
+    """
+    Filters and compresses the given rows into a raw deflate-stream that ends on a byte boundary.
+    """
+    data = filter_rows(pixels, bpp, start, stop)
+
+    options = {}
+    if start > 0:
+        dict_rows = -(-WINDOW_SIZE // (pixels.shape[1] + 1))
+        options["zdict"] = filter_rows(pixels, bpp, max(0, start - dict_rows), start).tobytes()[-WINDOW_SIZE:]
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, **options)
+    compressed = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    if start == 0:
+        compressed = zlib_header(level) + compressed
+
+    return CompressedBlock(
+        compressed,
+        zlib.crc32(compressed, zlib.crc32(b"IDAT")),
+        zlib.adler32(data),
+        data.nbytes
+    )
+
+
+@lru_cache(maxsize=None)
+def _executor(threads: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=threads, thread_name_prefix="yuuno-png")
+
+
+def write_png(fp, im: Image, level: int = -1, threads: int = 0, chunk=putchunk,
+              icc_profile: Optional[bytes] = None, pnginfo=None) -> None:
+    """
+    Writes the image as a PNG-file.
+
+    :param fp:          The file to write to.
+    :param im:          The image. Must be in L, RGB or RGBA.
+    :param level:       The zlib compression level.
+    :param threads:     The number of threads to compress with. 0 uses one per CPU core.
+    :param chunk:       The function writing the chunks, as used by Pillow's PNG writer.
+    :param icc_profile: The ICC-profile to embed.
+    :param pnginfo:     Additional chunks to write before the image data.
+    """
+    color_type, bpp = COLOR_TYPES[im.mode]
+    pixels = numpy.asarray(im).reshape(im.height, im.width * bpp)
+
+    rows_per_block = max(1, BLOCK_SIZE // pixels.shape[1])
+    starts = range(0, im.height, rows_per_block)
+    jobs = [
+        (pixels, bpp, start, min(start + rows_per_block, im.height), level, start + rows_per_block >= im.height)
+        for start in starts
+    ]
+
+    threads = threads or os.cpu_count() or 1
+    if threads == 1 or len(jobs) == 1:
+        blocks = [compress_block(*job) for job in jobs]
+    else:
+        blocks = list(_executor(threads).map(lambda job: compress_block(*job), jobs))
+
+    fp.write(PNG_SIGNATURE)
+    chunk(fp, b"IHDR", struct.pack("!2I5B", im.width, im.height, 8, color_type, 0, 0, 0))
+    if icc_profile:
+        chunk(fp, b"iCCP", b"ICC Profile\0\0" + zlib.compress(icc_profile))
+    if pnginfo is not None:
+        for info_chunk in pnginfo.chunks:
+            chunk(fp, *info_chunk[:2])
+
+    adler = 1
+    for block in blocks:
+        adler = adler32_combine(adler, block.adler, block.length)
+
+    for block in blocks[:-1]:
+        fp.write(struct.pack("!I", len(block.data)) + b"IDAT")
+        fp.write(block.data)
+        fp.write(struct.pack("!I", block.crc))
+
+    # The adler32-checksum is only known once all blocks are done.
+    last = blocks[-1]
+    trailer = struct.pack("!I", adler)
+    fp.write(struct.pack("!I", len(last.data) + 4) + b"IDAT")
+    fp.write(last.data)
+    fp.write(trailer)
+    fp.write(struct.pack("!I", zlib.crc32(trailer, last.crc)))
+
+    chunk(fp, b"IEND", b"")
+
+
+def save_parallel_png(im, fp, filename):
+    info = im.encoderinfo
+    is_srgb = info.get("icc_profile") == SRGB_MARKER
+
+    if not supports(im):
+        if is_srgb:
+            return save_srgb_png(im, fp, filename)
+        return _save(im, fp, filename)
+
+    write_png(
+        fp, im,
+        level=info.get("compress_level", -1),
+        threads=info.get("threads", 0),
+        chunk=putchunk_srgb if is_srgb else putchunk,
+        icc_profile=info.get("icc_profile"),
+        pnginfo=info.get("pnginfo")
+    )
+
+
+register_save(FORMAT_NAME, save_parallel_png)
@@ -17,13 +17,19 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from io import BytesIO
+from typing import Callable, Optional
+from concurrent.futures import CancelledError
 
-from traitlets import Unicode, CInt, Any
+from traitlets import Unicode, CInt, Any, Instance, default, observe
 from traitlets.config import Configurable
 from PIL.Image import Image
 
-from yuuno.clip import Frame
+from yuuno.cache import LRUCache
+from yuuno.clip import Clip, Frame, Size
+from yuuno.utils import future_yield_coro
 from yuuno.output.srgb_png import srgb
+from yuuno.output import parallel_png
+from yuuno.output.codecs import EncodedImage, EncodedFrame, get_codec
 
 
 class YuunoImageOutput(Configurable):
@@ -38,6 +44,136 @@ class YuunoImageOutput(Configurable):
     zlib_compression: int = CInt(6, help="0=No compression\n1=Fastest\n9=Slowest", config=True)
     icc_profile: str = Unicode("sRGB", help="Specify the path to an ICC-Profile (Defaults to sRGB).", allow_none=True, config=True)
 
+    jpeg_quality: int = CInt(90, help="The quality of JPEG-previews (1-95).", config=True)
+    webp_method: int = CInt(0, help="The effort spent on WebP-previews.\n0=Fastest\n6=Smallest", config=True)
+    png_threads: int = CInt(0, help="The threads compressing large PNG-files.\n0=One per CPU core\n1=Use the encoder of Pillow", config=True)
+
+    encoded_cache_size: int = CInt(64, help="""The amount of memory in megabytes used to cache encoded frames.
+Set to 0 to disable the cache.""", config=True)
+    encoded_cache: LRUCache = Instance(LRUCache)
+
+    # Computed on first use so the ICC-profile is not read for every single frame.
+    _save_settings: dict = Any(None, allow_none=True)
+
+    @default("encoded_cache")
+    def _default_encoded_cache(self):
+        return LRUCache(self.encoded_cache_size * 1024 * 1024, sizeof=lambda encoded: len(encoded.image.data))
+
+    @observe("encoded_cache_size")
+    def _observe_encoded_cache_size(self, change):
+        self.encoded_cache.budget = change.new * 1024 * 1024
+
+    @observe("zlib_compression", "icc_profile")
+    def _invalidate_save_settings(self, change):
+        self._save_settings = None
+
+    @observe("zlib_compression", "icc_profile", "jpeg_quality", "webp_method")
+    def _invalidate_encoded_cache(self, change):
+        # Images encoded with the old settings will never be requested again.
+        self.encoded_cache.clear()
+
+    def save_settings(self) -> dict:
+        """
+        Returns the arguments passed to PIL when saving an image.
+
+        :return: The keyword arguments for :meth:`PIL.Image.Image.save`.
+        """
+        settings = self._save_settings
+        if settings is None:
+            settings = {
+                "compress_level": self.zlib_compression,
+                "format": "png"
+            }
+            if self.icc_profile is not None:
+                if self.icc_profile != "sRGB":
+                    with open(self.icc_profile, "rb") as f:
+                        settings["icc_profile"] = f.read()
+                else:
+                    settings.update(srgb())
+            self._save_settings = settings
+        return settings
+
+    def icc_settings(self) -> dict:
+        """
+        Returns the ICC-profile as an argument for codecs other than PNG.
+
+        Browsers assume sRGB, so the profile is only embedded if a custom one is set.
+        """
+        if self.icc_profile is None or self.icc_profile == "sRGB":
+            return {}
+        return {"icc_profile": self.save_settings()["icc_profile"]}
+
+    def encode(self, im: Frame, codec: str = "png") -> EncodedImage:
+        """
+        Encodes the frame for the transfer to the frontend.
+
+        Falls back to PNG if the codec cannot encode the image.
+
+        :param im:    The frame to encode.
+        :param codec: The name of the codec. (png, webp, jpeg or raw)
+        :return: The encoded image and the codec actually used.
+        """
+        if not isinstance(im, Image):
+            im = im.to_pil()
+
+        selected = get_codec(codec)
+        if not selected.supports(im):
+            selected = get_codec("png")
+
+        return EncodedImage(selected.name, selected.mime, selected.encode(self, im))
+
+    def _encoded_key(self, clip: Clip, frameno: int, codec: str) -> tuple:
+        return (
+            clip.cache_key(), frameno, codec,
+            self.zlib_compression, self.jpeg_quality, self.webp_method, self.icc_profile
+        )
+
+    def is_encoded(self, clip: Clip, frameno: int, codec: str = "png") -> bool:
+        """
+        Checks if the frame can be served from the cache.
+        """
+        return self._encoded_key(clip, frameno, codec) in self.encoded_cache
+
+    @future_yield_coro
+    def encode_frame(self, clip: Clip, frameno: int, codec: str = "png",
+                     cancelled: Optional[Callable[[], bool]] = None, cache: bool = True) -> EncodedFrame:
+        """
+        Renders and encodes a frame of the clip.
+
+        The result is cached, so showing the same frame again
+        neither renders nor encodes it a second time.
+
+        :param clip:      The clip to render.
+        :param frameno:   The number of the frame.
+        :param codec:     The name of the codec. See :meth:`encode`.
+        :param cancelled: Checked before each step: Rendering, converting and encoding the frame.
+                          If it returns true, the future fails with a :class:`CancelledError`.
+        :param cache:     Store the result in the cache. Disable this for throwaway images.
+        :return: A future resolving to the encoded frame.
+        """
+        def _check():
+            if cancelled is not None and cancelled():
+                raise CancelledError()
+
+        key = self._encoded_key(clip, frameno, codec)
+        cached = self.encoded_cache.get(key)
+        if cached is not None:
+            return cached
+
+        _check()
+        frame = yield clip[frameno]
+        with frame:
+            _check()
+            image = yield frame.to_pil_async()
+            size = Size(*frame.size())
+
+        # The image does not need the frame anymore.
+        _check()
+        encoded = EncodedFrame(self.encode(image, codec), size, Size(*image.size))
+        if cache:
+            self.encoded_cache.put(key, encoded)
+        return encoded
+
     def bytes_of(self, im: Frame) -> bytes:
         """
         Converts the frame into a bytes-object containing
@@ -51,16 +187,9 @@ class YuunoImageOutput(Configurable):
         if im.mode not in ("RGBA", "RGB", "1", "L", "P"):
             im = im.convert("RGB")
 
-        settings = {
-            "compress_level": self.zlib_compression,
-            "format": "png"
-        }
-        if self.icc_profile is not None:
-            if self.icc_profile != "sRGB":
-                with open(self.icc_profile, "rb") as f:
-                    settings["icc_profile"] = f.read()
-            else:
-                settings.update(srgb())
+        settings = self.save_settings()
+        if self.png_threads != 1 and parallel_png.supports(im):
+            settings = dict(settings, format=parallel_png.FORMAT_NAME, threads=self.png_threads)
 
         f = BytesIO()
         im.save(f, **settings)
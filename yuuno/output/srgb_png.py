@@ -22,6 +22,9 @@ from PIL.PngImagePlugin import PngInfo, putchunk, _save
 _EMPTY = []
 FORMAT_NAME = "png+srgb.yuuno"
 
+# Passed as the ICC-profile to request an sRGB-chunk instead.
+SRGB_MARKER = b"\0"
+
 # These values are taken from the official PNG specification.
 # These values allow older browsers to have sRGB-like color-settings.
 GAMA_SRGB = struct.pack('!I', 45455)
@@ -52,6 +55,6 @@ register_save(FORMAT_NAME, save_srgb_png)
 def srgb() -> dict:
     return {
         "format": FORMAT_NAME,
-        "icc_profile": b"\0",
+        "icc_profile": SRGB_MARKER,
         "pnginfo": SRGB_PNGINFO
     }
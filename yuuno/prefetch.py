@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from threading import RLock
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Set
+
+from yuuno.utils import Future
+
+
+class ReadAhead(object):
+    """
+    Speculatively renders the frames a user will probably request next.
+
+    The scheduler learns the direction and the step size from the
+    requests it sees and renders the next ``depth`` frames in the
+    background. At most ``concurrency`` speculative renders run at once
+    so the foreground request keeps most of the threads of the core.
+
+    Running renders cannot be cancelled. When the user jumps elsewhere,
+    all queued speculative work is dropped. Renders that are still running
+    count against the concurrency limit until they finish, but are not
+    remembered as finished anymore.
+    """
+
+    def __init__(self, depth: int = 4, concurrency: int = 1, max_step: int = 16):
+        self.depth = depth
+        self.concurrency = concurrency
+        self.max_step = max_step
+
+        self._lock = RLock()
+        self._target: Any = None
+        self._render: Optional[Callable[[int], Future]] = None
+
+        self._last: Optional[int] = None
+        self._step = 1
+        self._predicted: List[int] = []
+
+        self._generation = 0
+        self._scheduling = False
+        self._queue: Deque[int] = deque()
+        self._running: Set[int] = set()
+        self._finished: Deque[int] = deque(maxlen=64)
+
+    @property
+    def generation(self) -> int:
+        """
+        Counts how often the user did not follow the prediction.
+        """
+        return self._generation
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def predict(self, frameno: int, length: int) -> List[int]:
+        """
+        Returns the frames that will likely be requested after the given frame.
+
+        :param frameno: The frame that has just been requested.
+        :param length:  The length of the clip.
+        :return: A list of frame numbers ordered by their likeliness.
+        """
+        result = []
+        for i in range(1, self.depth+1):
+            nframe = frameno + self._step * i
+            if not 0 <= nframe < length:
+                break
+            result.append(nframe)
+        return result
+
+    def request(self, frameno: int, length: int, render: Callable[[int], Future], target: Any = None) -> None:
+        """
+        Tells the scheduler a frame has been requested in the foreground.
+
+        :param frameno: The requested frame.
+        :param length:  The length of the clip.
+        :param render:  A function that renders the given frame number into the cache.
+        :param target:  The object the frames are rendered from. Changing it resets the scheduler.
+        """
+        with self._lock:
+            if target is not self._target:
+                self.reset()
+                self._target = target
+
+            self._render = render
+            self._learn(frameno)
+
+            if self.depth <= 0:
+                return
+
+            self._predicted = self.predict(frameno, length)
+            self._queue = deque(
+                f for f in self._predicted
+                if f not in self._running and f not in self._finished
+            )
+
+        self._schedule()
+
+    def reset(self) -> None:
+        """
+        Forgets everything learned and drops all queued work.
+        """
+        with self._lock:
+            self._generation += 1
+            self._target = None
+            self._last = None
+            self._step = 1
+            self._predicted = []
+            self._queue.clear()
+            self._finished.clear()
+
+    def _learn(self, frameno: int) -> None:
+        if frameno != self._last and frameno not in self._predicted:
+            # The user did not follow our prediction.
+            # The frames that are still being rendered are of no use anymore.
+            self._generation += 1
+
+        if self._last is not None and frameno != self._last:
+            delta = frameno - self._last
+            if abs(delta) <= self.max_step:
+                self._step = delta
+            else:
+                self._step = 1 if delta > 0 else -1
+
+        self._last = frameno
+
+    def _take(self) -> List[int]:
+        frames = []
+        while self._queue and len(self._running) < self.concurrency:
+            frameno = self._queue.popleft()
+            self._running.add(frameno)
+            frames.append(frameno)
+        return frames
+
+    def _schedule(self) -> None:
+        # Submits the queued frames without holding the lock.
+        # Renders may finish synchronously. Their callbacks only update the
+        # bookkeeping and this loop submits the next frames, so we never recurse.
+        with self._lock:
+            if self._scheduling:
+                return
+            self._scheduling = True
+
+        while True:
+            with self._lock:
+                frames = self._take()
+                if not frames:
+                    self._scheduling = False
+                    return
+                render, generation = self._render, self._generation
+
+            for frameno in frames:
+                try:
+                    fut = render(frameno)
+                except Exception:
+                    with self._lock:
+                        self._running.discard(frameno)
+                    continue
+
+                fut.add_done_callback(lambda f, n=frameno, g=generation: self._done(n, g))
+
+    def _done(self, frameno: int, generation: int) -> None:
+        with self._lock:
+            self._running.discard(frameno)
+
+            # Work of an abandoned prediction or of another target is stale.
+            if generation == self._generation:
+                self._finished.append(frameno)
+
+        # The queue always belongs to the latest request.
+        self._schedule()
@@ -16,10 +16,12 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import functools
+import itertools
 from threading import Lock
+from collections import deque
 from types import TracebackType
 from typing import Optional, Type, NamedTuple, List, Any, TYPE_CHECKING
-from typing import Callable, TypeVar, Generator, Tuple, Generic, Sequence
+from typing import Callable, TypeVar, Generator, Tuple, Generic, Sequence, Iterable, Iterator
 from concurrent.futures import Future as ConcFuture
 
 
@@ -166,3 +168,24 @@ def gather(futures: [Sequence[Future[T]]]) -> Sequence[T]:
         raise AccumulatedException("Multiple errors occured.", res.failed)
 
     return [f.result() for f in res.completed]
+
+
+def ordered(request: Callable[[T], Future[R]], items: Iterable[T], window: int) -> Iterator[Future[R]]:
+    """
+    Requests the items ahead of the consumer and yields the futures in order.
+
+    At most ``window`` requests are in flight at the same time. The next
+    item is only requested when the consumer asks for the next future.
+
+    :param request: Starts the request for an item.
+    :param items:   The items to request.
+    :param window:  The maximal amount of requests in flight.
+    :return: An iterator of the futures in the order of the items.
+    """
+    items = iter(items)
+    pending = deque(request(item) for item in itertools.islice(items, max(1, window)))
+
+    while pending:
+        yield pending.popleft()
+        for item in itertools.islice(items, 1):
+            pending.append(request(item))
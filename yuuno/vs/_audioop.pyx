@@ -1,89 +1,109 @@
-import typing as t
-import audioop
-import sys
-
-from cython cimport view, cdivision
-
-
-cdef bytes __byteswap(bytearray inp):
-    if sys.byteorder == "big":
-        return audioop.byteswap(inp, 4)
-    else:
-        return bytes(inp)
-
-cdef float __clamp(float v, float min, float max) nogil:
-    if v < min:
-        return min
-    elif v > max:
-        return max
-    else:
-        return v
-
-
-@cdivision(True)
-def int8_to_float32(unsigned char[::1] inp, int bits_per_sample) -> bytes:
-    data = bytearray(len(inp) * 4)
-    cdef float[::1] view
-    view = data
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled versions of the conversions in yuuno.vs.audioop.
 
-    cdef float* _view = &view[0]
-    cdef unsigned char* _inp = &inp[0]
-
-    cdef int shifted_by = 1 << (bits_per_sample-1)
-    cdef float max_pos_value = shifted_by - 1
-    cdef unsigned char v = 0
+The functions produce exactly the same output as the Python implementation.
+"""
+import sys
 
-    if max_pos_value == 0:
-        raise ValueError("Bits per Sample must be >0")
+from cython cimport cdivision
 
-    for i in range(len(inp)):
-        # Cast float as int in typing as the memoryview accepts floats.
-        _view[i] = __clamp((_inp[i] - shifted_by) / max_pos_value, -1.0, 1)
 
-    return __byteswap(data)
+cdef bint BIG_ENDIAN = sys.byteorder == "big"
 
 
-@cdivision(True)
-def int16_to_float32(unsigned short[::1] inp, int bits_per_sample) -> bytes:
-    data = bytearray(len(inp) * 4)
-    cdef float[::1] view
-    view = data
-
-    cdef float* _view = &view[0]
-    cdef unsigned short* _inp = &inp[0]
+cdef inline float __to_float(double v, double scale) noexcept nogil:
+    # Scale in double precision, so the result matches the Python implementation.
+    v = v * scale
+    if v < -1.0:
+        return -1.0
+    elif v > 1.0:
+        return 1.0
+    else:
+        return <float>v
 
-    cdef int shifted_by = 1 << (bits_per_sample-1)
-    cdef float max_pos_value = shifted_by - 1
-    cdef unsigned char v = 0
 
-    if max_pos_value <= 8:
-        raise ValueError("Bits per Sample must be >8")
+cdef inline void __swap32(unsigned int* data, Py_ssize_t length) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef unsigned int v
+    for i in range(length):
+        v = data[i]
+        data[i] = ((v & 0xff) << 24) | ((v & 0xff00) << 8) | ((v >> 8) & 0xff00) | (v >> 24)
 
-    for i in range(len(inp)):
-        # Cast float as int in typing as the memoryview accepts floats.
-        _view[i] = __clamp((_inp[i] - shifted_by) / max_pos_value, -1.0, 1)
 
-    return __byteswap(data)
+cdef bytes __finish(bytearray data):
+    cdef unsigned int[::1] view
+    if BIG_ENDIAN and len(data) > 0:
+        view = memoryview(data).cast("I")
+        with nogil:
+            __swap32(&view[0], view.shape[0])
+    return bytes(data)
 
 
 @cdivision(True)
-def int16_to_float32(unsigned int[::1] inp, int bits_per_sample) -> bytes:
-    data = bytearray(len(inp) * 4)
-    cdef float[::1] view
-    view = data
-
-    cdef float* _view = &view[0]
-    cdef unsigned int* _inp = &inp[0]
-
-    cdef int shifted_by = 1 << (bits_per_sample-1)
-    cdef float max_pos_value = shifted_by - 1
-    cdef unsigned char v = 0
-
-    if max_pos_value <= 16:
-        raise ValueError("Bits per Sample must be >16")
-
-    for i in range(len(inp)):
-        # Cast float as int in typing as the memoryview accepts floats.
-        _view[i] = __clamp((_inp[i] - shifted_by) / max_pos_value, -1.0, 1)
-
-    return __byteswap(data)
+cdef double __scale(int bits_per_sample):
+    # Shift in 64 bits. 1 << 31 overflows a C int for 32 bit samples.
+    cdef long long largest = (<long long>1 << (bits_per_sample - 1)) - 1
+    return 1.0 / max(1, largest)
+
+
+def int8_to_float32(const signed char[::1] inp, int bits_per_sample) -> bytes:
+    data = bytearray(inp.shape[0] * 4)
+    if inp.shape[0] == 0:
+        return bytes(data)
+
+    cdef float[::1] view = memoryview(data).cast("f")
+    cdef double scale = __scale(bits_per_sample)
+    cdef Py_ssize_t i
+    with nogil:
+        for i in range(inp.shape[0]):
+            view[i] = __to_float(inp[i], scale)
+    return __finish(data)
+
+
+def int16_to_float32(const short[::1] inp, int bits_per_sample) -> bytes:
+    data = bytearray(inp.shape[0] * 4)
+    if inp.shape[0] == 0:
+        return bytes(data)
+
+    cdef float[::1] view = memoryview(data).cast("f")
+    cdef double scale = __scale(bits_per_sample)
+    cdef Py_ssize_t i
+    with nogil:
+        for i in range(inp.shape[0]):
+            view[i] = __to_float(inp[i], scale)
+    return __finish(data)
+
+
+def int32_to_float32(const int[::1] inp, int bits_per_sample) -> bytes:
+    data = bytearray(inp.shape[0] * 4)
+    if inp.shape[0] == 0:
+        return bytes(data)
+
+    cdef float[::1] view = memoryview(data).cast("f")
+    cdef double scale = __scale(bits_per_sample)
+    cdef Py_ssize_t i
+    with nogil:
+        for i in range(inp.shape[0]):
+            view[i] = __to_float(inp[i], scale)
+    return __finish(data)
+
+
+def float32_le(const float[::1] inp) -> bytes:
+    data = bytearray(inp.shape[0] * 4)
+    if inp.shape[0] == 0:
+        return bytes(data)
+
+    cdef float[::1] view = memoryview(data).cast("f")
+    cdef Py_ssize_t i
+    with nogil:
+        for i in range(inp.shape[0]):
+            view[i] = inp[i]
+    return __finish(data)
+
+
+def byteswap(inp) -> bytes:
+    data = bytearray(inp)
+    if len(data) % 4 != 0:
+        raise ValueError("The buffer does not contain whole samples.")
+    return __finish(data)
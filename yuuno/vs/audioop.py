@@ -1,58 +1,115 @@
 import sys
-import audioop
 import typing as t
+from array import array
 
-# try:
-#     from yuuno.vs._audioop import *
-# 
-# 
-# except ImportError:
-if True:
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-    def __clamp(v: float, min: float, max: float) -> float:
-        if v < min:
-            return min
-        elif v > max:
-            return max
-        else:
-            return v
+try:
+    from yuuno.vs import _audioop
+except ImportError:
+    _audioop = None
 
-    def __int_to_float32(inp: t.Sequence[int], bits_per_sample: int) -> bytes:
-        data = bytearray(len(inp) * 4)
-        _view = memoryview(data).cast("f")
-        shifted_by = 1 << (bits_per_sample-1)
-        max_pos_value = shifted_by - 1
-        for i, v in enumerate(inp):
-            # Cast float as int in typing as the memoryview accepts floats.
-            _view[i] = t.cast(int, __clamp((v - shifted_by) / (max_pos_value), -1.0, 1))
 
-        return byteswap(data)
+# The container of the samples for each sample width in bytes.
+SAMPLE_TYPES = {
+    1: "b",
+    2: "h",
+    4: "i",
+}
 
-    def int8_to_float32(inp: bytes, bits_per_sample: int) -> bytes:
-        return __int_to_float32(inp, factor=4, bits_per_sample=bits_per_sample)
+# The functions of the compiled module for each sample width in bytes.
+COMPILED_CONVERSIONS = {
+    1: "int8_to_float32",
+    2: "int16_to_float32",
+    4: "int32_to_float32",
+}
 
-    def int16_to_float32(inp: bytes, bits_per_sample: int) -> bytes:
-        return __int_to_float32(memoryview(inp).cast("H"), bits_per_sample=bits_per_sample)
 
-    def int32_to_float32(inp: bytes, bits_per_sample: int) -> bytes:
-        return __int_to_float32(memoryview(inp).cast("I"), bits_per_sample=bits_per_sample)
-
-
-def to_float32_le(inp: bytes, bits_per_sample: int) -> bytes:
+def _sample_width(bits_per_sample: int) -> int:
     if bits_per_sample == 0:
         raise ValueError("bits per sample may not be 0")
     elif bits_per_sample <= 8:
-        return int8_to_float32(inp, bits_per_sample)
+        return 1
     elif bits_per_sample <= 16:
-        return int16_to_float32(inp, bits_per_sample)
+        return 2
     elif bits_per_sample <= 32:
-        return int32_to_float32(inp, bits_per_sample)
+        return 4
     else:
         raise ValueError("bits per sample may not exceed 32")
 
 
-def byteswap(inp: bytearray) -> bytes:
+def _scale(bits_per_sample: int) -> float:
+    # The largest positive sample becomes 1.0. The smallest negative sample is clamped to -1.0.
+    return 1 / max(1, (1 << (bits_per_sample - 1)) - 1)
+
+
+def __int_to_float32_numpy(inp: t.ByteString, width: int, bits_per_sample: int) -> bytes:
+    samples = numpy.frombuffer(inp, dtype=SAMPLE_TYPES[width])
+    # Scale in double precision, so the result matches the fallback exactly.
+    result = samples * _scale(bits_per_sample)
+    numpy.clip(result, -1.0, 1.0, out=result)
+    return result.astype("<f4").tobytes()
+
+
+def __int_to_float32_python(inp: t.ByteString, width: int, bits_per_sample: int) -> bytes:
+    scale = _scale(bits_per_sample)
+    samples = memoryview(inp).cast(SAMPLE_TYPES[width])
+
+    # Only clamp sample by sample if a sample is actually out of range.
+    largest = (1 << (bits_per_sample - 1)) - 1
+    if len(samples) == 0 or -largest <= min(samples) and max(samples) <= largest:
+        result = array("f", map(scale.__mul__, samples))
+    else:
+        result = array("f", [(v if -largest <= v <= largest else (largest if v > 0 else -largest)) * scale for v in samples])
+    return byteswap(result)
+
+
+def to_float32_le(inp: t.ByteString, bits_per_sample: int) -> bytes:
+    """
+    Converts signed integer samples in native byte order into little endian float32 samples.
+
+    :param inp:             The samples. Each sample is stored in 1, 2 or 4 bytes depending on its bit depth.
+    :param bits_per_sample: The significant bits of each sample.
+    :return: The samples as float32 between -1.0 and 1.0.
+    """
+    width = _sample_width(bits_per_sample)
+    if len(inp) % width != 0:
+        raise ValueError("The buffer does not contain whole samples.")
+
+    if _audioop is not None:
+        convert = getattr(_audioop, COMPILED_CONVERSIONS[width])
+        return convert(memoryview(inp).cast("B").cast(SAMPLE_TYPES[width]), bits_per_sample)
+    if numpy is not None:
+        return __int_to_float32_numpy(inp, width, bits_per_sample)
+    return __int_to_float32_python(inp, width, bits_per_sample)
+
+
+def float32_le(inp: t.ByteString) -> bytes:
+    """
+    Converts native float32 samples into little endian float32 samples.
+
+    :param inp: A buffer of float32 samples, like the channels of a VapourSynth audio frame.
+    :return: The samples as little endian float32.
+    """
+    if _audioop is not None:
+        return _audioop.float32_le(memoryview(inp).cast("B").cast("f"))
+    if numpy is not None:
+        return numpy.frombuffer(inp, dtype="=f4").astype("<f4").tobytes()
+    return byteswap(memoryview(inp).cast("B"))
+
+
+def byteswap(inp: t.Union[bytearray, array]) -> bytes:
+    """
+    Converts native float32 samples into little endian float32 samples.
+    """
+    if _audioop is not None:
+        return _audioop.byteswap(inp)
     if sys.byteorder == "big":
-        return audioop.byteswap(inp, 4)
+        swapped = array("f", bytes(inp))
+        swapped.byteswap()
+        return swapped.tobytes()
     else:
         return bytes(inp)
@@ -17,11 +17,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import math
 import ctypes
-from typing import Tuple, overload
+from threading import Lock
+from typing import Callable, List, Tuple, TypeVar, Union, overload
 from concurrent.futures import Future
 
 from PIL import Image
-from traitlets import HasTraits, Instance, observe
+from traitlets import HasTraits, Instance, Any, Dict, default, observe
 
 import vapoursynth as vs
 from vapoursynth import VideoNode, VideoFrame
@@ -29,19 +30,53 @@ from vapoursynth import VideoNode, VideoFrame
 from yuuno import Yuuno
 from yuuno.utils import future_yield_coro, gather
 
-from yuuno.clip import Clip, Frame, Size, RawFormat
+from yuuno.cache import LRUCache
+from yuuno.clip import Clip, Frame, Size, Box, RawFormat
 from yuuno.audio import Audio, Format as AudioFormat
 
 from yuuno.vs.extension import VapourSynth
-from yuuno.vs.utils import get_proxy_or_core, is_single
+from yuuno.vs.utils import get_proxy_or_core, is_single, close_frame
 from yuuno.vs.flags import Features
 from yuuno.vs.alpha import AlphaOutputClip
+from yuuno.vs.interleave import interleave
+
+# NumPy is optional. Fall back to memoryviews if it is not installed.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+T = TypeVar("T")
 
 
 # On MAC OSX VapourSynth<=R43 is actually returned as XRGB instead of RGBX
 COMPAT_PIXEL_FORMAT = "XRGB" if Features.COMPATBGR_IS_XRGB else "BGRX"
 
 
+_live_frames_lock = Lock()
+_live_frames = 0
+
+# Guards the pending renders and the users of the frame wrappers.
+_wrapper_lock = Lock()
+
+
+def _track_frames(delta: int) -> None:
+    global _live_frames
+    with _live_frames_lock:
+        _live_frames += delta
+
+
+def live_frames() -> int:
+    """
+    Returns how many native frames are currently held by frame wrappers.
+
+    This is a diagnostic: The number should stay flat while scrubbing
+    through a clip, no matter how long the session runs.
+    """
+    return _live_frames
+
+
 def calculate_size(frame: VideoFrame, planeno: int) -> Tuple[int, int]:
     """
     Calculates the size of the plane
@@ -56,90 +91,187 @@ def calculate_size(frame: VideoFrame, planeno: int) -> Tuple[int, int]:
         height >>= frame.format.subsampling_h
     return width, height
 
-@overload
-def extract_plane_r36compat(frame: VideoFrame, planeno: int, *, compat: bool=False , direction: int = -1, raw=True) -> bytes: pass
-@overload
-def extract_plane_r36compat(frame: VideoFrame, planeno: int, *, compat: bool=False, direction: int = -1, raw=False) -> Image.Image: pass
-def extract_plane_r36compat(frame, planeno, *, compat=False, direction=-1, raw=False):
-    """
-    Extracts the plane using the old VapourSynth API for reading a frame.
+def _typecode(fmt) -> str:
+    if fmt.sample_type == vs.FLOAT:
+        return "e" if fmt.bytes_per_sample == 2 else "f"
+    return {1: "B", 2: "H", 4: "I"}[fmt.bytes_per_sample]
 
-    Since we are doing raw memory operations using ctypes, this function has proven to be prone
-    to SIGSEGV while developing.
 
-    This code will subseqently be dropped from this codebase when VapourSynth r36 is officially dropped
-    with the official release of R39.
+def _plane_buffer_r36compat(frame: VideoFrame, planeno: int) -> memoryview:
+    """
+    Maps the plane using the old VapourSynth API for reading a frame.
 
-    :param frame:     The frame
-    :param planeno:   The plane number
-    :param compat:    Are we dealing with a compat format.
-    :param direction: -1 bottom to top, 1 top to bottom
-    :param raw:       Return bytes instead of an image.
-    :return: The extracted image.
+    VapourSynth R36 frames do not support the buffer protocol, so the
+    memory is mapped with ctypes. Without NumPy, padded lines are copied.
     """
     width, height = calculate_size(frame, planeno)
     stride = frame.get_stride(planeno)
-    s_plane = height * stride
-    buf = (ctypes.c_byte*s_plane).from_address(frame.get_read_ptr(planeno).value)
+    size = frame.format.bytes_per_sample
+    typecode = _typecode(frame.format)
+
+    buf = (ctypes.c_ubyte * (stride * height)).from_address(frame.get_read_ptr(planeno).value)
+    # ctypes does not own the memory. Pin the frame to the buffer
+    # so it can't be freed while somebody still reads from it.
+    buf._frame = frame
+    flat = memoryview(buf).toreadonly().cast("B")
+
+    if stride == width * size:
+        return flat.cast(typecode, (height, width))
+
+    if numpy is not None:
+        samples = numpy.frombuffer(flat, dtype=numpy.dtype(typecode))
+        return memoryview(numpy.lib.stride_tricks.as_strided(samples, (height, width), (stride, size)))
+
+    line = width * size
+    return memoryview(b"".join(flat[y*stride:y*stride+line] for y in range(height))).cast(typecode, (height, width))
+
+
+def plane_buffer(frame: VideoFrame, planeno: int) -> memoryview:
+    """
+    Returns a read-only view on the samples of the plane.
+
+    The view has the shape ``(height, width)`` and the native sample type of the plane.
+    It skips the padding at the end of each line, so it is not contiguous if the lines
+    are padded. No data is copied. The frame is kept alive for as long as the view
+    (or any object created from it) exists.
+
+    :param frame:    The frame
+    :param planeno:  The plane
+    :return: A two dimensional memoryview of the plane.
+    """
+    if Features.API4:
+        return memoryview(frame[planeno]).toreadonly()
+    elif Features.EXTRACT_VIA_ARRAY:
+        return memoryview(frame.get_read_array(planeno)).toreadonly()
+    return _plane_buffer_r36compat(frame, planeno)
+
+
+def plane_data(frame: VideoFrame, planeno: int) -> memoryview:
+    """
+    Returns the tightly packed data of the plane.
+
+    The memory of the frame is returned directly if the lines of the plane
+    are not padded. Otherwise the lines are copied in a single strided copy.
+
+    :param frame:    The frame
+    :param planeno:  The plane
+    :return: A memoryview with ``width * bytes_per_sample * height`` bytes.
+    """
+    buf = plane_buffer(frame, planeno)
+    if buf.c_contiguous:
+        return buf.cast("B")
+    return memoryview(buf.tobytes())
+
+
+def plane_array(frame: VideoFrame, planeno: int) -> Union['numpy.ndarray', memoryview]:
+    """
+    Returns the samples of the plane in their native type.
+
+    With NumPy, a read-only array of the shape ``(height, width)`` is
+    returned that maps the memory of the frame. Otherwise a memoryview of
+    the same shape is returned. This view has to copy the lines of the
+    plane if they are padded.
+
+    :param frame:    The frame
+    :param planeno:  The plane
+    :return: A two dimensional array or memoryview with the samples.
+    """
+    buf = plane_buffer(frame, planeno)
+    if numpy is not None:
+        return numpy.asarray(buf)
+
+    if buf.c_contiguous:
+        return buf
+    return plane_data(frame, planeno).cast(_typecode(frame.format), buf.shape)
 
-    if raw:
-        return bytes(buf)
-    else:
-        if not compat:
-            return Image.frombuffer('L', (width, height), buf, "raw", "L", stride, direction)
-        else:
-            return Image.frombuffer('RGB', (width, height), buf, "raw", COMPAT_PIXEL_FORMAT, stride, direction)
 
 @overload
-def extract_plane_new(frame: VideoFrame, planeno: int, *, compat: bool=False , direction: int = -1, raw=True) -> bytes: pass
+def extract_plane(frame: VideoFrame, planeno: int, *, compat: bool=False , direction: int = -1, raw=True) -> memoryview: pass
 @overload
-def extract_plane_new(frame: VideoFrame, planeno: int, *, compat: bool=False, direction: int = -1, raw=False) -> Image.Image: pass
-def extract_plane_new(frame, planeno, *, compat=False, direction=-1, raw=False):
+def extract_plane(frame: VideoFrame, planeno: int, *, compat: bool=False, direction: int = -1, raw=False) -> Image.Image: pass
+def extract_plane(frame, planeno, *, compat=False, direction=-1, raw=False):
     """
-    Extracts the plane with the VapourSynth R37+ array-API.
+    Extracts the plane of the frame.
+
+    The returned image maps the memory of the frame whenever PIL supports it
+    and the lines of the plane are not padded. PIL will copy the data if it
+    has to convert the pixel format (e.g. for COMPATBGR32-frames).
 
     :param frame:     The frame
     :param planeno:   The plane number
     :param compat:    Are we dealing with a compat format.
     :param direction: -1 bottom to top, 1 top to bottom
-    :param raw:       Return bytes instead of an image.
+    :param raw:       Return the packed plane data instead of an image.
     :return: The extracted image.
     """
-    arr = frame.get_read_array(planeno)
-    height, width = arr.shape
-    stride = frame.format.bytes_per_sample * width
-
+    data = plane_data(frame, planeno)
     if raw:
-        return arr
+        return data
+
+    width, height = calculate_size(frame, planeno)
+    if not compat:
+        return Image.frombuffer('L', (width, height), data, "raw", "L", 0, direction)
     else:
-        if not compat:
-            return Image.frombuffer('L', (width, height), bytes(arr), "raw", "L", stride, direction)
-        else:
-            return Image.frombuffer('RGB', (width, height), bytes(arr), "raw", COMPAT_PIXEL_FORMAT, stride, direction)
+        return Image.frombuffer('RGB', (width, height), data, "raw", COMPAT_PIXEL_FORMAT, 0, direction)
 
 
 def extract_image(frame: VideoFrame) -> Image.Image:
-    r = extract_plane(frame, 0, raw=True)
-    g = extract_plane(frame, 1, raw=True)
-    b = extract_plane(frame, 2, raw=True)
+    data = interleave(
+        [plane_buffer(frame, planeno) for planeno in range(3)],
+        frame.width,
+        frame.height
+    )
+    return Image.frombuffer("RGB", (frame.width, frame.height), data, "raw", "RGB", 0, 1)
+
+
+def extract_rgba(frame: VideoFrame, alpha: VideoFrame) -> Image.Image:
+    """
+    Builds an RGBA-image out of an RGB24-frame and its GRAY8 alpha-frame.
+
+    All four planes are interleaved in a single pass. PIL maps the
+    resulting buffer without copying it again.
 
-    data = bytearray(len(r)*4)
-    data[0::4] = b
-    data[1::4] = g
-    data[2::4] = r
+    :param frame: The RGB24-frame
+    :param alpha: The alpha-frame
+    :return: The RGBA-image
+    """
+    data = interleave(
+        [plane_buffer(frame, planeno) for planeno in range(3)] + [plane_buffer(alpha, 0)],
+        frame.width,
+        frame.height,
+        channels=4
+    )
+    return Image.frombuffer("RGBA", (frame.width, frame.height), data, "raw", "RGBA", 0, 1)
 
-    return Image.frombuffer("RGB", (frame.width, frame.height), bytes(data), "raw", "BGRX", len(data)//frame.height, 1)
 
+def frame_nbytes(frame: VideoFrame) -> int:
+    """
+    Calculates the amount of memory occupied by the planes of the frame.
+    """
+    return sum(
+        frame.get_stride(planeno) * calculate_size(frame, planeno)[1]
+        for planeno in range(frame.format.num_planes)
+    )
 
-if Features.EXTRACT_VIA_ARRAY:
-    extract_plane = extract_plane_new
-else:
-    extract_plane = extract_plane_r36compat
+
+def image_nbytes(image: Image.Image) -> int:
+    """
+    Calculates the amount of memory occupied by a PIL-image.
+    """
+    # PIL stores each pixel of multi-band images in four bytes.
+    bands = len(image.getbands())
+    return image.width * image.height * (1 if bands == 1 else 4)
+
+
+# Binary properties longer than this are summarized instead of shown.
+MAX_BINARY_PROPERTY = 64
 
 
 def _simplify_props(props):
     if isinstance(props, list):
         return [_simplify_props(p) for p in props]
+    elif isinstance(props, (bytes, bytearray, memoryview)) and len(props) > MAX_BINARY_PROPERTY:
+        return f"<{len(props)} bytes>"
     elif not isinstance(props, str):
         return repr(props)
     else:
@@ -153,41 +285,269 @@ def simplify_props(props):
     return res
 
 
-class VapourSynthFrameWrapper(HasTraits, Frame):
+def _native_frame(name: str) -> property:
+    # Counts the native frames held by the wrappers.
+    def _get(self):
+        return getattr(self, name)
 
-    pil_cache: Image.Image = Instance(Image.Image, allow_none=True)
+    def _set(self, frame):
+        old = getattr(self, name)
+        setattr(self, name, frame)
+        _track_frames((frame is not None) - (old is not None))
 
-    frame: VideoFrame = Instance(VideoFrame)
-    rgb_frame: VideoFrame = Instance(VideoFrame)
-    compat_frame: VideoFrame = Instance(VideoFrame)
+    return property(_get, _set)
 
-    @property
-    def extension(self) -> VapourSynth:
-        return Yuuno.instance().get_extension(VapourSynth)
 
-    def _extract(self):
-        # APIv4 requires manually plane based extraction.
-        if self.extension.merge_bands or Features.API4:
-            self.pil_cache = extract_image(self.rgb_frame)
-        else:
-            self.pil_cache = extract_plane(self.compat_frame, 0, compat=True)
+class VapourSynthFrameWrapper(Frame):
+    """
+    Wraps a single frame of a VapourSynth-clip.
 
-    def to_pil(self) -> Image.Image:
+    A wrapper is created for every single frame request. Thus it stores
+    its state in slots instead of traitlets and gets the extension
+    passed by its clip.
+    """
+
+    __slots__ = (
+        "_frame", "_rgb_frame", "_compat_frame",
+        "frameno", "rgb_node", "compat_node",
+        "pil_cache", "cache_key", "owns_frame", "extension", "_properties",
+        "_pending", "_converting", "_users", "_exported"
+    )
+
+    frame: VideoFrame = _native_frame("_frame")
+
+    # The converted frames are only rendered when they are first needed.
+    rgb_frame: VideoFrame = _native_frame("_rgb_frame")
+    compat_frame: VideoFrame = _native_frame("_compat_frame")
+
+    def __init__(
+            self,
+            frame: VideoFrame,
+            frameno: int = 0,
+            *,
+            rgb_frame: VideoFrame = None,
+            compat_frame: VideoFrame = None,
+            rgb_node: VideoNode = None,
+            compat_node: VideoNode = None,
+            pil_cache: Image.Image = None,
+            cache_key: tuple = None,
+            owns_frame: bool = True,
+            extension: VapourSynth = None
+    ):
+        self._frame = self._rgb_frame = self._compat_frame = None
+        self.frame = frame
+        self.rgb_frame = rgb_frame
+        self.compat_frame = compat_frame
+
+        self.frameno = frameno
+        self.rgb_node = rgb_node
+        self.compat_node = compat_node
+        self.pil_cache = pil_cache
+
+        # The key of this frame inside the frame cache of the extension.
+        self.cache_key = cache_key
+
+        # Scaled clips and regions share the source frame with their parent clip.
+        self.owns_frame = owns_frame
+
+        if extension is None:
+            extension = Yuuno.instance().get_extension(VapourSynth)
+        self.extension = extension
+        self._properties = None
+
+        # The requests of the converted frames that are still being rendered.
+        self._pending = {}
+
+        # The number of callers still copying pixels out of the converted frames.
+        self._converting = 0
+
+        # The frame cache hands the same wrapper to every caller.
+        # The native frames are only closed once all of them closed the wrapper.
+        self._users = 0
+
+        # Set once native_planes() handed out views on the source frame.
+        self._exported = False
+
+    def __del__(self):
+        _track_frames(-sum(
+            getattr(self, name, None) is not None
+            for name in ("_frame", "_rgb_frame", "_compat_frame")
+        ))
+
+    def release(self) -> None:
+        """
+        Closes the converted frames.
+
+        Call this once their pixels have been copied out of the frames.
+        Nothing is closed while a :meth:`convert` is still running.
+        The frames are rendered again should they be needed later.
+        """
+        with _wrapper_lock:
+            if self._converting > 0:
+                return
+            rgb_frame, self.rgb_frame = self.rgb_frame, None
+            compat_frame, self.compat_frame = self.compat_frame, None
+        close_frame(rgb_frame)
+        close_frame(compat_frame)
+
+    def acquire(self) -> bool:
+        """
+        Registers another user of the wrapper. Each user closes the wrapper once.
+
+        :return: False if the wrapper has already been closed.
+        """
+        with _wrapper_lock:
+            if self.frame is None:
+                return False
+            self._users += 1
+            return True
+
+    def close(self) -> None:
+        """
+        Closes all native frames and removes the frame from the frame cache.
+
+        Don't use the frame afterwards. If other users got the same wrapper
+        from the frame cache, the frames are closed once the last of them
+        closed it. The buffers returned by :meth:`native_planes` stay valid:
+        They keep the source frame alive until the last of them is gone.
+        """
+        with _wrapper_lock:
+            self._users = max(0, self._users - 1)
+            if self._users > 0 or self.frame is None:
+                return
+
+            if self.cache_key is not None:
+                self.extension.frame_cache.discard(self.cache_key)
+            frame, self.frame = self.frame, None
+
+        self.release()
+        if not self._exported:
+            close_frame(frame)
+
+    def nbytes(self) -> int:
+        """
+        Calculates the amount of memory held by this frame.
+        """
+        size = frame_nbytes(self.frame) if self.owns_frame and self.frame is not None else 0
+        for frame in (self.rgb_frame, self.compat_frame):
+            if frame is not None:
+                size += frame_nbytes(frame)
+        if self.pil_cache is not None:
+            size += image_nbytes(self.pil_cache)
+        return size
+
+    def remember(self) -> None:
+        """
+        Stores the frame inside the frame cache of the extension.
+        """
+        if self.cache_key is not None and self.frame is not None:
+            self.extension.frame_cache.put(self.cache_key, self, self.nbytes())
+
+    @future_yield_coro
+    def _render(self, name: str, node: VideoNode) -> Future:
+        # Concurrent callers share the request of the first caller.
+        with _wrapper_lock:
+            frame = getattr(self, name)
+            pending = self._pending.get(name)
+            owner = frame is None and pending is None
+            if owner:
+                pending = self._pending[name] = node.get_frame_async(self.frameno)
+
+        if frame is not None:
+            return frame
+
+        try:
+            frame = yield pending
+        except Exception:
+            if owner:
+                with _wrapper_lock:
+                    del self._pending[name]
+            raise
+
+        if owner:
+            with _wrapper_lock:
+                setattr(self, name, frame)
+                del self._pending[name]
+        return frame
+
+    def render_rgb(self) -> Future:
+        """
+        Renders the RGB24 representation of the frame.
+
+        :return: A future resolving to the RGB24 frame.
+        """
+        return self._render("rgb_frame", self.rgb_node)
+
+    def render_compat(self) -> Future:
+        """
+        Renders the compat representation of the frame.
+
+        :return: A future resolving to the compat frame.
+        """
+        if self.compat_node is not None and self.compat_node is self.rgb_node:
+            return self.render_rgb()
+        return self._render("compat_frame", self.compat_node)
+
+    @future_yield_coro
+    def convert(self, render: Callable[[], Future], extract: Callable[[VideoFrame], T]) -> Future:
+        """
+        Renders a converted frame and copies the pixels out of it.
+
+        Concurrent callers share the converted frame. It is released
+        once the last of them extracted its pixels.
+
+        :param render:  Renders the converted frame, e.g. :meth:`render_rgb`.
+        :param extract: Copies the pixels out of the converted frame.
+        :return: A future resolving to the result of ``extract``.
+        """
+        with _wrapper_lock:
+            self._converting += 1
+        try:
+            return extract((yield render()))
+        finally:
+            with _wrapper_lock:
+                self._converting -= 1
+            self.release()
+
+    @future_yield_coro
+    def to_pil_async(self) -> Future:
         if self.pil_cache is None:
-            self._extract()
-        # noinspection PyTypeChecker
+            # APIv4 requires manually plane based extraction.
+            if self.extension.merge_bands or Features.API4:
+                render, extract = self.render_rgb, extract_image
+            else:
+                render, extract = self.render_compat, lambda frame: extract_plane(frame, 0, compat=True)
+
+            image = yield self.convert(render, extract)
+
+            # Concurrent callers extract the image each. Keep the first one.
+            if self.pil_cache is None:
+                self.pil_cache = image
+
+                # Update the size of the frame inside the cache.
+                self.remember()
+
         return self.pil_cache
 
+    def to_pil(self) -> Image.Image:
+        return self.to_pil_async().result()
+
     def size(self) -> Size:
         return Size(self.frame.width, self.frame.height)
 
     def format(self) -> RawFormat:
-        if self.extension.raw_force_compat:
-            frame = self.rgb_frame
+        if not self.extension.raw_force_compat:
+            ff = self.frame.format
+        elif self.rgb_frame is not None:
+            ff = self.rgb_frame.format
         else:
-            frame = self.frame
+            # Don't render the frame just to read its format.
+            ff = self.rgb_node.format
+
+        return self._raw_format(ff)
 
-        ff: vs.Format = frame.format
+    @staticmethod
+    def _raw_format(ff) -> RawFormat:
         samples = RawFormat.SampleType.INTEGER if ff.sample_type==vs.INTEGER else RawFormat.SampleType.FLOAT
         fam = {
             vs.RGB: RawFormat.ColorFamily.RGB,
@@ -206,30 +566,84 @@ class VapourSynthFrameWrapper(HasTraits, Frame):
         )
 
     def properties(self):
-        return {
-            str(k): simplify_props(v)
-            for k, v in self.frame.props.items()
-        }
-
-    def to_raw(self):
-        if self.extension.raw_force_compat:
-            frame = self.rgb_frame
-        else:
-            frame = self.frame
+        # Frame properties never change. Only convert them once.
+        if self._properties is None:
+            self._properties = {
+                str(k): simplify_props(v)
+                for k, v in self.frame.props.items()
+            }
+        return self._properties
 
+    @staticmethod
+    def _raw_planes(frame: VideoFrame) -> bytes:
         return b"".join(
             extract_plane(frame, i, compat=False, raw=True)
             for i in range(frame.format.num_planes)
         )
 
+    def to_raw(self):
+        if self.extension.raw_force_compat:
+            return self.convert(self.render_rgb, self._raw_planes).result()
+        return self._raw_planes(self.frame)
+
+    def native_planes(self) -> Tuple[RawFormat, List[Union['numpy.ndarray', memoryview]]]:
+        """
+        Returns the planes of the source frame in their native sample type.
+
+        Unlike :meth:`to_raw`, the frame is never converted or resized,
+        regardless of ``raw_force_compat``. The planes map the memory of the
+        frame if possible. See :func:`plane_array` for details.
+
+        :return: The format of the source frame and its planes.
+        """
+        self._exported = True
+        return (
+            self._raw_format(self.frame.format),
+            [plane_array(self.frame, i) for i in range(self.frame.format.num_planes)]
+        )
+
+    @future_yield_coro
+    def get_raw_data_async(self) -> Future:
+        # Wait for the converted frame instead of blocking a thread of the core.
+        if self.extension.raw_force_compat:
+            raw = yield self.convert(self.render_rgb, self._raw_planes)
+        else:
+            raw = self._raw_planes(self.frame)
+        return self.size(), self.format(), raw
+
 
 class VapourSynthClipMixin(HasTraits, Clip):
 
     clip: VideoNode
 
+    # The size the frames are converted to. Defaults to the size of the clip.
+    target_size: Size = Any(None, allow_none=True)
+
+    # The part of the source frame that is converted as (left, top, width, height).
+    # Defaults to the whole frame.
+    source_region: tuple = Any(None, allow_none=True)
+
+    # (clip, settings, rgb24-node, compat-node)
+    _conversion: tuple = Any(None, allow_none=True)
+    _scaled: dict = Dict()
+
+    # A frame is split into hundreds of tiles. Only keep the recently used regions.
+    _regions: LRUCache = Instance(LRUCache)
+
+    # Looked up once per clip and handed to each frame.
+    _extension: VapourSynth = Instance(VapourSynth)
+
+    @default("_regions")
+    def _default_regions(self):
+        return LRUCache(256, sizeof=lambda _: 1)
+
+    @default("_extension")
+    def _default_extension(self):
+        return Yuuno.instance().get_extension(VapourSynth)
+
     @property
     def extension(self) -> VapourSynth:
-        return Yuuno.instance().get_extension(VapourSynth)
+        return self._extension
 
     @staticmethod
     def _wrap_frame(frame: VideoFrame) -> VideoNode:
@@ -246,21 +660,45 @@ class VapourSynthClipMixin(HasTraits, Clip):
 
         return bc.std.ModifyFrame([bc], lambda n, f: frame.copy())
 
+    def _resize_arguments(self, source: VideoNode, clip: VideoNode) -> dict:
+        # The region is given in the coordinates of the source clip.
+        # A post-processor may have changed the size of the frames.
+        size = {}
+        if self.target_size is not None:
+            size = {"width": self.target_size.width, "height": self.target_size.height}
+        if self.source_region is not None:
+            left, top, width, height = self.source_region
+            sx = clip.width / source.width if clip.width else 1
+            sy = clip.height / source.height if clip.height else 1
+            size.update(src_left=left*sx, src_top=top*sy, src_width=width*sx, src_height=height*sy)
+        return size
+
     def _to_rgb32(self, clip: VideoNode) -> VideoNode:
+        # Scale and crop the clip in the same step as the conversion.
+        # The resizer reads the pixels around the region, so tiles do not show seams.
+        # The post-processor has to see the whole frame, so it runs before scaling and cropping.
+        source = clip
+        processor = self.extension.processor
+        size = self._resize_arguments(source, clip) if processor is None else {}
+
         if clip.format.color_family == vs.YUV:
             clip = self.extension.resize_filter(
                 clip,
                 format=vs.RGB24,
                 matrix_in_s=self.extension.yuv_matrix,
-                prefer_props=self.extension.prefer_props
+                prefer_props=self.extension.prefer_props,
+                **size
             )
+            size = {}
 
-        if clip.format.color_family != vs.RGB or clip.format.bits_per_sample != 8:
-            clip = self.extension.resize_filter(clip, format=vs.RGB24)
+        if clip.format.color_family != vs.RGB or clip.format.bits_per_sample != 8 or size:
+            clip = self.extension.resize_filter(clip, format=vs.RGB24, **size)
 
-        processor = self.extension.processor
         if processor is not None:
             clip = processor(clip)
+            size = self._resize_arguments(source, clip)
+            if size:
+                clip = self.extension.resize_filter(clip, format=vs.RGB24, **size)
 
         return clip
 
@@ -273,6 +711,71 @@ class VapourSynthClipMixin(HasTraits, Clip):
             return frame
         return self.extension.resize_filter(frame, format=vs.COMPATBGR32)
 
+    def _conversion_settings(self) -> tuple:
+        extension = self.extension
+        return (
+            extension.yuv_matrix,
+            extension.prefer_props,
+            extension.resizer,
+            extension.post_processor,
+            self.target_size,
+            self.source_region
+        )
+
+    def scaled(self, factor: float) -> Clip:
+        if factor >= 1 or self.clip.width == 0 or self.clip.height == 0:
+            return self
+
+        size = Size(
+            max(1, math.ceil(self.clip.width * factor)),
+            max(1, math.ceil(self.clip.height * factor))
+        )
+        scaled = self._scaled.get(size, None)
+        if scaled is None:
+            scaled = self._scaled[size] = VapourSynthClip(self.clip, target_size=size)
+        return scaled
+
+    def region(self, factor: float, box: Box) -> Clip:
+        derived = self.target_size is not None or self.source_region is not None
+        if self.clip.width == 0 or self.clip.height == 0 or derived:
+            return super(VapourSynthClipMixin, self).region(factor, box)
+
+        factor = min(factor, 1)
+        box = Box(*box)
+        key = (factor, box)
+
+        region = self._regions.get(key)
+        if region is None:
+            region = VapourSynthClip(
+                self.clip,
+                target_size=Size(box.width, box.height),
+                source_region=(box.left/factor, box.top/factor, box.width/factor, box.height/factor)
+            )
+            self._regions.put(key, region)
+        return region
+
+    def cache_key(self):
+        return (self.clip, self._conversion_settings())
+
+    def converted(self) -> Tuple[VideoNode, VideoNode]:
+        """
+        Returns the nodes that convert this clip to RGB24 and the compat format.
+
+        The conversion chain is only built once per clip and per snapshot
+        of the conversion settings. This way VapourSynth caches and
+        parallelizes the conversion like any other filter in the graph.
+
+        :return: A tuple with the RGB24-node and the compat-node.
+        """
+        settings = self._conversion_settings()
+        cached = self._conversion
+        if cached is None or cached[0] is not self.clip or cached[1] != settings:
+            rgb24 = self.to_rgb32(self.clip)
+            cached = (self.clip, settings, rgb24, self.to_compat_rgb32(rgb24))
+            self._conversion = cached
+
+        return cached[2], cached[3]
+
     def __len__(self):
         return len(self.clip)
 
@@ -284,29 +787,35 @@ class VapourSynthClipMixin(HasTraits, Clip):
             except vs.Error:
                 raise RuntimeError("Tried to access clip of a dead core.") from None
 
-        frame = yield self.clip.get_frame_async(item)
-        wrapped = self._wrap_frame(frame)
-        _rgb24: VideoNode = self.to_rgb32(wrapped)
-        rgb24: Future = _rgb24.get_frame_async(0)
+        rgb24, compat = self.converted()
 
-        compat: Future = self.to_compat_rgb32(_rgb24).get_frame_async(0)
+        cache_key = (self.clip, item, self._conversion_settings())
+        cached = self.extension.frame_cache.get(cache_key)
+        if cached is not None and cached.acquire():
+            return cached
 
-        (yield gather([rgb24, compat]))
-        rgb24_frame, compat_frame = rgb24.result(), compat.result()
+        frame = yield self.clip.get_frame_async(item)
 
-        return VapourSynthFrameWrapper(
+        wrapped = VapourSynthFrameWrapper(
             frame=frame,
-            compat_frame=compat_frame,
-            rgb_frame=rgb24_frame
+            frameno=item,
+            rgb_node=rgb24,
+            compat_node=compat,
+            cache_key=cache_key,
+            owns_frame=self.target_size is None and self.source_region is None,
+            extension=self.extension
         )
+        wrapped.acquire()
+        wrapped.remember()
+        return wrapped
 
 
 class VapourSynthClip(VapourSynthClipMixin, HasTraits):
 
     clip: VideoNode = Instance(VideoNode)
 
-    def __init__(self, clip):
-        super(VapourSynthClip, self).__init__(clip)
+    def __init__(self, clip, **kwargs):
+        super(VapourSynthClip, self).__init__(clip, **kwargs)
 
 
 class VapourSynthFrame(VapourSynthClipMixin, HasTraits):
@@ -323,27 +832,37 @@ class VapourSynthFrame(VapourSynthClipMixin, HasTraits):
         self.clip = self._wrap_frame(value['new'])
 
 
-class VapourSynthAlphaFrameWrapper(HasTraits):
-    clip: VapourSynthFrameWrapper = Instance(VapourSynthFrameWrapper)
-    alpha: VapourSynthFrameWrapper = Instance(VapourSynthFrameWrapper)
+class VapourSynthAlphaFrameWrapper(Frame):
 
-    _cache: Image.Image = Instance(Image.Image, allow_none=True)
+    __slots__ = ("clip", "alpha", "_cache")
+
+    def __init__(self, clip: VapourSynthFrameWrapper, alpha: VapourSynthFrameWrapper):
+        self.clip = clip
+        self.alpha = alpha
+        self._cache: Image.Image = None
 
     @property
     def color(self):
         return self.clip
 
-    def to_pil(self):
+    @future_yield_coro
+    def to_pil_async(self):
         if self._cache is None:
-            color = self.clip.to_pil()
-            alpha = extract_plane(self.alpha.frame, 0, direction=1)
-            color.putalpha(alpha)
-            self._cache = color
+            self._cache = yield self.clip.convert(
+                self.clip.render_rgb,
+                lambda frame: extract_rgba(frame, self.alpha.frame)
+            )
         return self._cache
 
+    def to_pil(self):
+        return self.to_pil_async().result()
+
     def size(self) -> Size:
         return self.clip.size()
 
+    def properties(self):
+        return self.clip.properties()
+
     def format(self) -> RawFormat:
         f = self.clip.format()
         return RawFormat(
@@ -358,6 +877,15 @@ class VapourSynthAlphaFrameWrapper(HasTraits):
     def to_raw(self):
         return b"".join([self.clip.to_raw(), self.alpha.to_raw()])
 
+    def close(self) -> None:
+        self.clip.close()
+        self.alpha.close()
+
+    @future_yield_coro
+    def get_raw_data_async(self):
+        yield gather([self.clip.get_raw_data_async(), self.alpha.get_raw_data_async()])
+        return self.size(), self.format(), self.to_raw()
+
 
 class VapourSynthAlphaClip(Clip):
 
@@ -381,14 +909,18 @@ class VapourSynthAlphaClip(Clip):
         if self.alpha is None:
             return (yield self.clip[item])
 
-        f1 = yield self.clip[item]
-        f2 = yield self.alpha[item]
+        f1, f2 = yield gather([self.clip[item], self.alpha[item]])
         return VapourSynthAlphaFrameWrapper(clip=f1, alpha=f2)
 
+    def cache_key(self):
+        if self.alpha is None:
+            return self.clip.cache_key()
+        return (self.clip.cache_key(), self.alpha.cache_key())
+
 
 if Features.API4:
     from yuuno.audio import Audio
-    from yuuno.vs.audioop import byteswap, to_float32_le
+    from yuuno.vs.audioop import float32_le, to_float32_le
 
 
     COMBINE_FRAME_COUNT = 24
@@ -404,11 +936,16 @@ if Features.API4:
                 channel_count = self.clip.num_channels,
                 samples_per_second = self.clip.sample_rate,
                 frames = math.ceil(self.clip.num_frames / COMBINE_FRAME_COUNT),
-                sample_count = self.clip.num_samples
+                sample_count = self.clip.num_samples,
+                channel_layout = self.clip.channel_layout
             )
 
         def __len__(self):
-            return len(self.clip.num_frames)
+            # The number of chunks, not the number of VapourSynth audio frames.
+            return math.ceil(self.clip.num_frames / COMBINE_FRAME_COUNT)
+
+        def cache_key(self):
+            return self.clip
 
         @future_yield_coro
         def _single_frame(self, frame: int) -> Future:
@@ -418,15 +955,7 @@ if Features.API4:
             rendered = yield self.clip.get_frame_async(frame)
             with rendered:
                 if rendered.sample_type == vs.FLOAT:
-                    result = []
-                    floats = len(rendered[0])
-
-                    data = bytearray(floats * 4)
-                    for channel in rendered:
-                        memoryview(data).cast("f")[:] = channel
-                        result.append(byteswap(data))
-
-                    return tuple(result)
+                    return tuple(float32_le(channel) for channel in rendered)
 
                 else:
                     return tuple(
@@ -436,7 +965,7 @@ if Features.API4:
 
         @future_yield_coro
         def __getitem__(self, frame: int) -> Future:
-            if frame * COMBINE_FRAME_COUNT > self.clip.num_frames:
+            if not 0 <= frame * COMBINE_FRAME_COUNT < self.clip.num_frames:
                 raise IndexError("Frame index out of range.")
 
             many_frames = yield gather([self._single_frame(frame*COMBINE_FRAME_COUNT + i) for i in range(COMBINE_FRAME_COUNT)])
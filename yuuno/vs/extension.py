@@ -25,10 +25,11 @@ from traitlets import Unicode, DottedObjectName
 from traitlets import default
 from traitlets import CInt, CBool
 from traitlets import Union
-from traitlets import List
+from traitlets import List, Instance
 from traitlets.config import import_item
 
 from yuuno.trait_types import Callable
+from yuuno.cache import LRUCache
 
 from yuuno.core.extension import Extension
 from yuuno.core.registry import Registry
@@ -92,12 +93,29 @@ Settings to a value less than one makes it default to the number of hardware thr
     vsscript_environment_wrap: bool = CBool(True, help="Allow Yuuno to automatically wrap the internal frame-extractor into the current environment. Do not disable while running multiple cores at once.", config=True)
     raw_force_compat: bool = CBool(True, "In raw image exports, force Planar RGB output", config=True)
 
+    frame_cache_size: int = CInt(256, help="""The amount of memory in megabytes used to cache converted frames.
+Set to 0 to disable the cache.""", config=True)
+    frame_cache: LRUCache = Instance(LRUCache)
+
     log_handlers: TList[TCallable[[int, str], None]] = List(Callable())
 
     @default("log_handlers")
     def _default_log_handlers(self):
         return []
 
+    @default("frame_cache")
+    def _default_frame_cache(self):
+        return LRUCache(self.frame_cache_size * 1024 * 1024)
+
+    @observe("frame_cache_size")
+    def _observe_frame_cache_size(self, change):
+        self.frame_cache.budget = change.new * 1024 * 1024
+
+    @observe("yuv_matrix", "prefer_props", "resizer", "post_processor")
+    def _observe_conversion_settings(self, change):
+        # Frames converted with the old settings will never be requested again.
+        self.frame_cache.clear()
+
     def _update_core_values(name: Optional[str]=None):
         def _func(self, change=None):
             core = get_proxy_or_core()
@@ -96,7 +96,7 @@ class Features(enum.Flag):
     @staticmethod
     def EXTRACT_VIA_ARRAY(vs: 'vapoursynth'):
         # AT R37
-        return hasattr(vs.VideoNode, 'get_read_array')
+        return hasattr(vs.VideoFrame, 'get_read_array')
 
     @flag(4)
     @staticmethod
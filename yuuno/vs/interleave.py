@@ -0,0 +1,139 @@
+# -*- encoding: utf-8 -*-
+
+# Yuuno - IPython + VapourSynth
+# Copyright (C) 2022 cid-chan (Sarah <cid+yuuno@cid-chan.moe>)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import typing as t
+
+# NumPy is optional. Fall back to slice assignments if it is not installed.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+Buffer = t.Union[bytes, bytearray, memoryview, 'numpy.ndarray']
+
+
+class Interleaver(object):
+    """
+    Interleaves three (or four) 8-bit planes into RGB or RGBX.
+
+    The planes are passed as flat buffers of ``stride * height`` bytes or as
+    two dimensional buffers of the shape ``(height, width)``, like the views
+    returned by :func:`yuuno.vs.clip.plane_buffer`. The padding at the end of
+    each line is skipped while interleaving.
+
+    Each call returns a new buffer, as PIL maps it into the image.
+    """
+
+    def __init__(self, channels: int = 3):
+        if channels not in (3, 4):
+            raise ValueError("Can only interleave into RGB or RGBX.")
+
+        self.channels = channels
+
+    def _allocate(self, size: int) -> Buffer:
+        if numpy is not None:
+            # Skip zeroing the buffer. It gets overwritten anyways.
+            return numpy.empty(size, dtype=numpy.uint8)
+        return bytearray(size)
+
+    def interleave(
+            self,
+            planes: t.Sequence[Buffer],
+            width: int,
+            height: int,
+            strides: t.Optional[t.Sequence[int]] = None,
+            *,
+            fill: int = 255
+    ) -> Buffer:
+        """
+        Interleaves the planes.
+
+        :param planes:  The planes in output order (e.g. ``(r, g, b)``).
+        :param width:   The width of each plane.
+        :param height:  The height of each plane.
+        :param strides: The length of a line of each flat plane in bytes. Defaults to the width.
+        :param fill:    The value of the fourth channel if only three planes are passed for RGBX.
+        :return: A buffer with ``width * height * channels`` bytes.
+        """
+        if len(planes) not in (3, self.channels):
+            raise ValueError("Invalid amount of planes passed.")
+
+        if strides is None:
+            strides = (width,) * len(planes)
+
+        out = self._allocate(width * height * self.channels)
+        if numpy is not None:
+            _interleave_numpy(out, planes, width, height, strides, self.channels, fill)
+        else:
+            _interleave_python(out, planes, width, height, strides, self.channels, fill)
+        return out
+
+
+def _interleave_numpy(out, planes, width, height, strides, channels, fill):
+    target = numpy.frombuffer(out, dtype=numpy.uint8).reshape(height, width, channels)
+
+    views = [
+        numpy.asarray(plane)[:, :width] if _is_2d(plane) else
+        numpy.frombuffer(plane, dtype=numpy.uint8, count=stride*height).reshape(height, stride)[:, :width]
+        for plane, stride in zip(planes, strides)
+    ]
+    if len(views) < channels:
+        views.append(numpy.broadcast_to(numpy.uint8(fill), (height, width)))
+
+    numpy.stack(views, axis=-1, out=target)
+
+
+def _is_2d(plane: Buffer) -> bool:
+    return getattr(plane, "ndim", 1) == 2
+
+
+def _pack(plane: Buffer, width: int, height: int, stride: int) -> Buffer:
+    if _is_2d(plane):
+        # Copies the lines of padded planes in a single strided copy.
+        plane = memoryview(plane)
+        return plane.cast("B") if plane.c_contiguous else plane.tobytes()
+
+    if stride == width:
+        return memoryview(plane)[:width*height]
+    plane = memoryview(plane)
+    return b"".join(plane[y*stride:y*stride+width] for y in range(height))
+
+
+def _interleave_python(out, planes, width, height, strides, channels, fill):
+    for idx, (plane, stride) in enumerate(zip(planes, strides)):
+        out[idx::channels] = _pack(plane, width, height, stride)
+
+    if len(planes) < channels:
+        out[channels-1::channels] = bytes((fill,)) * (width * height)
+
+
+def interleave(
+        planes: t.Sequence[Buffer],
+        width: int,
+        height: int,
+        strides: t.Optional[t.Sequence[int]] = None,
+        *,
+        channels: int = 3,
+        fill: int = 255
+) -> Buffer:
+    """
+    Interleaves the planes into a newly allocated buffer.
+
+    See :meth:`Interleaver.interleave` for the arguments.
+    """
+    return Interleaver(channels).interleave(planes, width, height, strides, fill=fill)
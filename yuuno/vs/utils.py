@@ -56,6 +56,30 @@ def filter_or_import(name: AnyStr) -> Callable:
         return import_item(name)
 
 
+def close_frame(frame) -> None:
+    """
+    Frees the memory of the frame right away if VapourSynth supports it.
+
+    Only call this if nothing maps the memory of the frame anymore.
+    On older versions the frame is freed once the last reference is gone.
+
+    :param frame: The frame to close.
+    """
+    if frame is not None and Features.CLOSE_FRAMES:
+        frame.close()
+
+
+@contextmanager
+def closing_frame(frame):
+    """
+    Closes the frame when the block is left.
+    """
+    try:
+        yield frame
+    finally:
+        close_frame(frame)
+
+
 def get_environment():
     import vapoursynth
     if Features.ENVIRONMENT_POLICIES:
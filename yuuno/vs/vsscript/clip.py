@@ -18,7 +18,7 @@
 from typing import TYPE_CHECKING, Callable, Any, TypeVar, Generic
 
 from yuuno.utils import future_yield_coro, auto_join
-from yuuno.clip import Clip, Frame
+from yuuno.clip import Clip, Frame, Box
 
 if TYPE_CHECKING:
     from yuuno.vs.vsscript.script import VSScript
@@ -60,20 +60,43 @@ class WrappedMixin(Generic[T]):
             return result
         return _func
 
+    @staticmethod
+    def wrap_sync(name: str) -> Callable[..., Any]:
+        # For methods that return their result directly instead of a future.
+        def _func(self: 'WrappedMixin', *args, **kwargs):
+            func = getattr(self.parent, name)
+            return self.env.perform(lambda: func(*args, **kwargs)).result()
+        return _func
+
 
 class WrappedFrame(WrappedMixin[Frame], Frame):
     to_pil = WrappedMixin.wrap('to_pil')
+    to_pil_async = WrappedMixin.wrap_future('to_pil_async')
     to_raw = WrappedMixin.wrap('to_raw')
     size = WrappedMixin.wrap('size')
     format = WrappedMixin.wrap('format')
     properties = WrappedMixin.wrap("properties")
     get_raw_data_async = WrappedMixin.wrap_future('get_raw_data_async')
+    native_planes = WrappedMixin.wrap_sync('native_planes')
+    close = WrappedMixin.wrap_sync('close')
 
 
 class WrappedClip(WrappedMixin[Clip], Clip):
     __len__ = WrappedMixin.wrap('__len__')
     __getitem__ = WrappedMixin.wrap_future('__getitem__')
 
+    def scaled(self, factor: float) -> Clip:
+        scaled = self.parent.scaled(factor)
+        if scaled is self.parent:
+            return self
+        return WrappedClip(self.env, scaled)
+
+    def region(self, factor: float, box: Box) -> Clip:
+        return WrappedClip(self.env, self.parent.region(factor, box))
+
+    def cache_key(self):
+        return self.parent.cache_key()
+
     @property
     def clip(self):
         return self.parent.clip
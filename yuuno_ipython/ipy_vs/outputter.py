@@ -20,7 +20,7 @@ from threading import RLock
 from concurrent.futures import Future
 
 import vapoursynth as vs
-from yuuno.vs.utils import get_proxy_or_core
+from yuuno.vs.utils import get_proxy_or_core, closing_frame
 from yuuno.vs.flags import Features
 
 
@@ -157,30 +157,32 @@ def encode(
 
     frame: vs.VideoFrame
     for idx, frame in enumerate(frames(clip, prefetch, backlog)):
-        if y4m:
-            stream.write(b"FRAME\n")
+        # Free each frame as soon as it is written instead of waiting for the garbage collector.
+        with closing_frame(frame):
+            if y4m:
+                stream.write(b"FRAME\n")
 
-        if Features.API4:
-            iterator = frame
-        else:
-            iterator = frame.planes()
-
-        for planeno, plane in enumerate(iterator):
-            # This is a quick fix.
-            # Calling bytes(VideoPlane) should make the buffer continuous by
-            # copying the frame to a continous buffer
-            # if the stride does not match the width*bytes_per_sample.
-            try:
-                if frame.get_stride(planeno) != frame.width*clip.format.bytes_per_sample:
-                    stream.write(bytes(plane))
-                else:
-                    stream.write(plane)
-
-            except BrokenPipeError:
-                return
-
-            if hasattr(stream, "flush"):
-                stream.flush()
+            if Features.API4:
+                iterator = frame
+            else:
+                iterator = frame.planes()
+
+            for planeno, plane in enumerate(iterator):
+                # This is a quick fix.
+                # Calling bytes(VideoPlane) should make the buffer continuous by
+                # copying the frame to a continous buffer
+                # if the stride does not match the width*bytes_per_sample.
+                try:
+                    if frame.get_stride(planeno) != frame.width*clip.format.bytes_per_sample:
+                        stream.write(bytes(plane))
+                    else:
+                        stream.write(plane)
+
+                except BrokenPipeError:
+                    return
+
+                if hasattr(stream, "flush"):
+                    stream.flush()
 
         if progress is not None:
             progress(idx+1, len(clip))
@@ -13,11 +13,38 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import weakref
+from typing import Optional
+from threading import RLock
+from concurrent.futures import Future as ConcFuture, CancelledError
+
 from ipywidgets import DOMWidget
-from traitlets import Unicode, Any
+from traitlets import Unicode, Any, Integer, Instance, default, observe
+
+from yuuno.cache import LRUCache
+from yuuno.prefetch import ReadAhead
+from yuuno.utils import Future, future_yield_coro
+from yuuno.audio import Audio, Format, Transport, Waveform, negotiate, transport_format, convert, waveform
+
+
+# The waveforms are shared by all widgets showing the same clip.
+# They are dropped once no widget shows the clip anymore.
+WAVEFORM_CACHE: LRUCache = LRUCache(16 * 1024 * 1024, sizeof=lambda waveform: len(waveform.data))
+
+# The running waveform computations with their progress. A failed computation is kept
+# until its error has been reported once. The next request computes the waveform again.
+_waveform_lock = RLock()
+_waveform_jobs = {}
+_widgets = weakref.WeakSet()
 
-from yuuno.utils import future_yield_coro
-from yuuno.audio import Audio
+
+def _collect_waveforms() -> None:
+    # Forget the waveforms of all clips that are not shown anymore.
+    with _waveform_lock:
+        shown = {widget.clip.cache_key() for widget in list(_widgets) if widget.clip is not None}
+        WAVEFORM_CACHE.invalidate(lambda key: key[0] not in shown)
+        for key in [k for k in _waveform_jobs if k[0] not in shown]:
+            del _waveform_jobs[key]
 
 
 class AudioWidget(DOMWidget):
@@ -27,10 +54,100 @@ class AudioWidget(DOMWidget):
 
     clip: Audio = Any().tag(sync=True, to_json=(lambda v,w: id(v) if v is not None else None), from_json=(lambda v, w: w.clip))
 
+    cache_size: int = Integer(64, help="The amount of memory in megabytes used to keep rendered chunks for seeking back. Set to 0 to disable the cache.")
+    prefetch_depth: int = Integer(4, help="How many chunks should be rendered ahead of the played chunk. Set to 0 to disable.")
+    prefetch_concurrency: int = Integer(1, help="How many chunks may be rendered ahead at the same time.")
+
+    sample_type: str = Unicode("int16", help="The preferred sample type for the transfer to the browser: float32 or int16.")
+    max_channels: int = Integer(2, help="Downmix audio with more channels to stereo (2) or mono (1) for the transfer. Set to 0 to transfer all channels.")
+    max_sample_rate: int = Integer(0, help="Resample audio with a higher sample rate for the transfer. Set to 0 to keep the sample rate.")
+
+    waveform_buckets: int = Integer(2048, help="The resolution of the waveform overview.")
+    waveform_concurrency: int = Integer(2, help="How many chunks may be rendered at the same time while computing the waveform.")
+
+    chunk_cache: LRUCache = Instance(LRUCache)
+
     def __init__(self, clip, **kwargs):
+        self._lock = RLock()
+        self._pending = {}
+        self._read_ahead = ReadAhead()
+
         super(AudioWidget, self).__init__(**kwargs, clip=clip)
+        _widgets.add(self)
         self.on_msg(self._handle_request_meta)
         self.on_msg(self._handle_request_render)
+        self.on_msg(self._handle_request_waveform)
+
+    @default("chunk_cache")
+    def _default_chunk_cache(self):
+        return LRUCache(self.cache_size * 1024 * 1024, sizeof=lambda chunk: sum(len(channel) for channel in chunk))
+
+    @observe("cache_size")
+    def _observe_cache_size(self, change):
+        self.chunk_cache.budget = change.new * 1024 * 1024
+
+    @observe("clip")
+    def _observe_clip(self, change):
+        # Chunks of the old clip will never be requested again.
+        self.chunk_cache.clear()
+        self._read_ahead.reset()
+        _collect_waveforms()
+
+    def close(self):
+        _widgets.discard(self)
+        _collect_waveforms()
+        super(AudioWidget, self).close()
+
+    def chunk(self, frame: int) -> Future:
+        """
+        Renders a chunk of the clip or returns it from the cache.
+
+        Chunks that are already being rendered are not rendered a second time.
+
+        :param frame: The index of the chunk.
+        :return: A future resolving to the samples of each channel.
+        """
+        clip = self.clip
+        key = (clip, frame)
+
+        with self._lock:
+            cached = self.chunk_cache.get(key)
+            if cached is not None:
+                future = ConcFuture()
+                future.set_result(cached)
+                return future
+
+            future = self._pending.get(key, None)
+            if future is not None:
+                return future
+
+            future = self._pending[key] = clip[frame]
+
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _store(self, key, future: Future) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.exception() is None and key[0] is self.clip:
+                self.chunk_cache.put(key, future.result())
+
+    def _negotiate(self, format: Format, request: Optional[dict]) -> Optional[Transport]:
+        # Older clients don't negotiate and only understand float32 at the native sample rate.
+        if request is None:
+            return None
+
+        accepted = request.get("sample_types", ["float32"])
+        preferred = [self.sample_type] if self.sample_type in accepted else []
+        return negotiate(format, preferred + accepted, self.max_channels, self.max_sample_rate)
+
+    def _validate(self, format: Format, transport: Optional[dict]) -> Optional[Transport]:
+        # The client sends the transport it got from the meta request. Make sure we can actually produce it.
+        if transport is None:
+            return None
+
+        return negotiate(format, [transport.get("sample_type", "float32")],
+                         transport.get("channel_count", 0), transport.get("samples_per_second", 0))
 
     @future_yield_coro
     def _handle_request_render(self, _, content, buffers):
@@ -50,14 +167,27 @@ class AudioWidget(DOMWidget):
             })
             return
 
+        requested_frame = int(requested_frame)
         try:
-            rendered = yield self.clip[int(requested_frame)]
+            # Issue the foreground request before any speculative work.
+            requested = self.chunk(requested_frame)
+
+            self._read_ahead.depth = self.prefetch_depth
+            self._read_ahead.concurrency = self.prefetch_concurrency
+            self._read_ahead.request(requested_frame, len(self.clip), self.chunk, target=self.clip)
+
+            rendered = yield requested
+
+            format = self.clip.format()
+            transport = self._validate(format, payload.get("transport", None))
+            if transport is not None:
+                rendered = convert(rendered, format, transport)
 
             self.send({
                 "type": "response",
                 "id": rqid,
                 "payload": {
-                    "size": len(rendered[0]) // 4
+                    "size": len(rendered[0]) // (4 if transport is None else transport.sample_width)
                 }
             }, rendered)
         except Exception as e:
@@ -73,11 +203,122 @@ class AudioWidget(DOMWidget):
             return
 
 
+    def waveform(self) -> Optional[Waveform]:
+        """
+        Returns the waveform of the clip. Starts computing it in the background if it is not known yet.
+
+        :return: The waveform or None while it is being computed.
+        """
+        clip = self.clip
+        key = (clip.cache_key(), self.waveform_buckets)
+        with _waveform_lock:
+            cached = WAVEFORM_CACHE.get(key)
+            if cached is not None or key in _waveform_jobs:
+                return cached
+
+            progress = [0.0]
+            _waveform_jobs[key] = (None, progress)
+
+        def _progress(value):
+            progress[0] = value
+
+        def _render(frame):
+            if _waveform_jobs.get(key, (None, None))[1] is not progress:
+                raise CancelledError()
+
+            # Render through the chunk cache, so playback and the waveform share their chunks.
+            if self.clip is clip:
+                return self.chunk(frame)
+            return clip[frame]
+
+        def _done(future):
+            with _waveform_lock:
+                # The job has been dropped while it was running.
+                if _waveform_jobs.get(key, (None, None))[1] is not progress:
+                    return
+
+                if future.exception() is not None:
+                    _waveform_jobs[key] = (future, progress)
+                    return
+                WAVEFORM_CACHE.put(key, future.result())
+                _waveform_jobs.pop(key, None)
+
+        computation = waveform(clip, self.waveform_buckets, self.waveform_concurrency, _progress, render=_render)
+        computation.add_done_callback(_done)
+        return WAVEFORM_CACHE.get(key)
+
+    def waveform_progress(self) -> float:
+        """
+        Returns the completed fraction of the running waveform computation.
+
+        Raises the error of the computation if it failed.
+        """
+        key = (self.clip.cache_key(), self.waveform_buckets)
+        with _waveform_lock:
+            if key in WAVEFORM_CACHE:
+                return 1.0
+
+            failed, progress = _waveform_jobs.get(key, (None, [0.0]))
+            if failed is not None:
+                # Report the error once and try again on the next request.
+                del _waveform_jobs[key]
+                failed.result()
+            return progress[0]
+
+    def _handle_request_waveform(self, _, content, buffers):
+        if content.get("type", "") != "waveform": return
+        rqid = content.get('id', None)
+
+        try:
+            result = self.waveform()
+            if result is None:
+                # The client asks again until the waveform is done.
+                self.send({
+                    "type": "response",
+                    "id": rqid,
+                    "payload": {
+                        "done": False,
+                        "progress": self.waveform_progress()
+                    }
+                })
+                return
+
+        except Exception as e:
+            import traceback
+            data = traceback.format_exception(type(e), e, e.__traceback__)
+            self.send({
+                "type": "failure",
+                "id": rqid,
+                "payload": {
+                    "data": data
+                }
+            })
+            return
+
+        self.send({
+            "type": "response",
+            "id": rqid,
+            "payload": {
+                "done": True,
+                "progress": 1.0,
+                "bucket_size": result.bucket_size,
+                "buckets": result.buckets,
+                "channel_count": result.channel_count
+            }
+        }, [result.data])
+
     def _handle_request_meta(self, _, content, buffers):
         if content.get("type", "") != "meta": return
         rqid = content.get('id', None)
 
         format = self.clip.format()
+        transport = self._negotiate(format, content.get("payload", {}).get("transport", None))
+
+        result = {}
+        if transport is not None:
+            result["transport"] = transport._asdict()
+            result["source_samples_per_second"] = format.samples_per_second
+            format = transport_format(format, transport)
 
         self.send({
             "type": "response",
@@ -86,7 +327,8 @@ class AudioWidget(DOMWidget):
                 "channel_count": format.channel_count,
                 "samples_per_second": format.samples_per_second,
                 "frames": format.frames,
-                "sample_count": format.sample_count
+                "sample_count": format.sample_count,
+                **result
             }
         })
         
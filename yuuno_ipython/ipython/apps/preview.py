@@ -15,9 +15,11 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import math
 import base64
 import traceback
 import typing as t
+from concurrent.futures import CancelledError
 from typing import Any as TAny
 
 from ipywidgets import DOMWidget
@@ -26,8 +28,9 @@ from traitlets import default, directional_link, observe
 from traitlets import Any
 from traitlets import Integer, Unicode, Float, Dict
 
-from yuuno.clip import Clip
+from yuuno.clip import Clip, Size, Box
 from yuuno.utils import future_yield_coro
+from yuuno.prefetch import ReadAhead
 from yuuno import Yuuno
 
 
@@ -36,6 +39,66 @@ EMPTY_IMAGE = base64.b64decode(
 )
 
 
+def preview_scale(zoom: float) -> float:
+    """
+    Calculates the scale at which the frames are rendered for the given zoom.
+
+    Below a zoom of 1 the scale is rounded up to the next power of two,
+    so only a few conversion graphs have to be built per clip.
+    The frontend uses the same function.
+    """
+    if zoom >= 1:
+        return 1
+    return 2 ** math.ceil(math.log2(max(zoom, 1/64)))
+
+
+def props_delta(old: t.Dict[str, TAny], new: t.Dict[str, TAny]) -> t.Tuple[t.Dict[str, TAny], t.List[str]]:
+    """
+    Calculates the changes between the properties of two frames.
+
+    :param old: The properties of the frame the client already knows.
+    :param new: The properties of the requested frame.
+    :return: The changed or added properties and the names of the removed properties.
+    """
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    removed = [k for k in old if k not in new]
+    return changed, removed
+
+
+def level_size(size: Size, scale: float) -> Size:
+    """
+    Calculates the size of a frame at a level of the tile pyramid.
+    """
+    return Size(
+        max(1, math.ceil(size.width * scale)),
+        max(1, math.ceil(size.height * scale))
+    )
+
+
+def tile_box(size: Size, tile_size: int, x: int, y: int) -> Box:
+    """
+    Calculates the region covered by a tile.
+
+    The tiles at the right and bottom edge are cut off at the edge of the frame.
+
+    :param size:      The size of the frame at the level of the tile.
+    :param tile_size: The width and height of a tile.
+    :param x:         The column of the tile.
+    :param y:         The row of the tile.
+    :return: The region of the tile inside the frame.
+    """
+    left, top = x * tile_size, y * tile_size
+    if x < 0 or y < 0 or left >= size.width or top >= size.height:
+        raise ValueError("The tile is outside of the frame.")
+
+    return Box(
+        left,
+        top,
+        min(tile_size, size.width - left),
+        min(tile_size, size.height - top)
+    )
+
+
 # class _Cache(object):
 # 
 #     def __init__(self, source, updater):
@@ -80,8 +143,27 @@ class Preview(DOMWidget):
     frame = Integer(0).tag(sync=True)
     zoom = Float(1.0).tag(sync=True)
 
+    prefetch_depth: int = Integer(4, help="How many frames should be rendered ahead of the current frame. Set to 0 to disable.")
+    prefetch_concurrency: int = Integer(1, help="How many frames may be rendered ahead at the same time.")
+
+    codec: str = Unicode("png", help="The codec used to transfer the frames: png, webp, jpeg or raw").tag(sync=True)
+    scrub_codec: str = Unicode(None, allow_none=True, help="The codec used while scrubbing through the clip. The frame is sent again with the normal codec once the user stops.").tag(sync=True)
+
+    tile_size: int = Integer(0, help="Splits large frames into tiles of this size and only transfers the visible tiles. Set to 0 to transfer whole frames.").tag(sync=True)
+
+    progressive_scale: float = Float(0.25, help="The size of the first image of a progressive frame relative to the final image.")
+    progressive_codec: str = Unicode("jpeg", help="The codec of the first image of a progressive frame.")
+
     def __init__(self, clip, **kwargs):
         super(Preview, self).__init__(**kwargs, clip=clip)
+        self._read_ahead = {}
+        self._wrapped = {}
+
+        # The id of the last frame request per image. Older requests are not refined anymore.
+        self._latest_frame = {}
+
+        # The properties last sent per image, so deltas don't render the base frame again.
+        self._sent_props = {}
 
         # self.on_msg(self._handle_request_length)
         # self.on_msg(self._handle_request_frame)
@@ -95,6 +177,10 @@ class Preview(DOMWidget):
         op = content['type']
         if op == 'length':
             func = self._handle_request_length
+        elif op == 'tile':
+            func = self._handle_request_tile
+        elif op == 'props':
+            func = self._handle_request_props
         else:
             func = self._handle_request_frame
 
@@ -140,24 +226,166 @@ class Preview(DOMWidget):
             return None
 
         elif not isinstance(target, Clip):
-            target = Yuuno.instance().wrap(target)
+            # Keep the wrapper so its conversion graph and the read-ahead state survive between requests.
+            cached = self._wrapped.get(id(target), None)
+            if cached is None or cached[0] is not target:
+                current = [id(c) for c in self.clips.values()]
+                self._wrapped = {k: v for k, v in self._wrapped.items() if k in current}
+
+                cached = (target, Yuuno.instance().wrap(target))
+                self._wrapped[id(target)] = cached
+            target = cached[1]
         return target
 
+    def _read_ahead_for(self, content) -> ReadAhead:
+        image = content.get('payload', {}).get('image', 'clip')
+        read_ahead = self._read_ahead.get(image, None)
+        if read_ahead is None:
+            read_ahead = self._read_ahead[image] = ReadAhead()
+
+        read_ahead.depth = self.prefetch_depth
+        read_ahead.concurrency = self.prefetch_concurrency
+        return read_ahead
+
+    @staticmethod
+    def _frame_result(encoded):
+        return {
+            "size": encoded.size,
+            "image_size": encoded.image_size,
+            "codec": encoded.image.codec,
+            "mime": encoded.image.mime
+        }
+
     @future_yield_coro
     def _handle_request_frame(self, _, content, buffers):
         wrapped = self._target_for(content)
+        payload = content.get('payload', {})
+
+        image = payload.get('image', 'clip')
+        rqid = content.get('id', None)
+        self._latest_frame[image] = rqid
 
         if wrapped is None:
             return {"size": [0, 0], "props": {}}, [EMPTY_IMAGE]
 
-        frameno = content.get('payload', {}).get('frame', self.frame)
+        frameno = payload.get('frame', self.frame)
         if frameno >= len(wrapped):
             frameno = len(wrapped) - 1
 
-        frame = yield wrapped[frameno]
-        data = Yuuno.instance().output.bytes_of(frame.to_pil())
-        return {
-            "size": frame.size(),
-            "props": frame.properties()
-        }, [data]
+        # Let the clip downscale the image instead of the browser.
+        scale = preview_scale(payload.get('zoom', self.zoom))
+        source, wrapped = wrapped, wrapped.scaled(scale)
+
+        output = Yuuno.instance().output
+        codec = payload.get('codec', None) or self.codec
+
+        def superseded():
+            return self._latest_frame.get(image) != rqid
+
+        # Send a cheap image first, unless the final image is ready anyway.
+        # It is only shown once, so it does not take space in the cache.
+        progressive = payload.get('progressive', False) and not output.is_encoded(wrapped, frameno, codec)
+        partial = None
+        if progressive:
+            partial = output.encode_frame(
+                source.scaled(scale * self.progressive_scale), frameno, self.progressive_codec,
+                cancelled=superseded, cache=False
+            )
+
+        # Issue the foreground request before any speculative work.
+        # The read-ahead encodes the frames too, so they are served from the cache.
+        requested = output.encode_frame(wrapped, frameno, codec, cancelled=superseded if progressive else None)
+        self._read_ahead_for(content).request(
+            frameno, len(wrapped), lambda n: output.encode_frame(wrapped, n, codec), target=wrapped
+        )
+
+        size = [0, 0]
+        if partial is not None:
+            try:
+                first = yield partial
+            except CancelledError:
+                pass
+            else:
+                size = first.size
+                if not requested.done():
+                    self.send({
+                        "type": "partial",
+                        "id": rqid,
+                        "payload": self._frame_result(first)
+                    }, [first.image.data])
+
+        try:
+            encoded = yield requested
+        except CancelledError:
+            # The user moved on. The client keeps showing the first image.
+            return {"size": size, "cancelled": True}, []
+
+        result = self._frame_result(encoded)
+        # Newer clients fetch the properties separately.
+        if payload.get('props', True):
+            with (yield wrapped[frameno]) as frame:
+                result["props"] = frame.properties()
+        return result, [encoded.image.data]
+
+    @future_yield_coro
+    def _handle_request_props(self, _, content, buffers):
+        wrapped = self._target_for(content)
+        payload = content.get('payload', {})
+
+        if wrapped is None:
+            return {"size": [0, 0], "props": {}}, []
+
+        frameno = payload.get('frame', self.frame)
+        if frameno >= len(wrapped):
+            frameno = len(wrapped) - 1
+
+        with (yield wrapped[frameno]) as frame:
+            props = frame.properties()
+            result = {"size": frame.size()}
+
+        # Only send what changed if the client knows the properties we sent last.
+        # Other clients of the same widget get the full properties instead.
+        image = payload.get('image', 'clip')
+        base = payload.get('base', None)
+        sent = self._sent_props.get(image, None)
+        if base is not None and sent is not None and sent[0] is wrapped and sent[1] == base:
+            changed, removed = props_delta(sent[2], props)
+            result.update(base=base, changed=changed, removed=removed)
+        else:
+            result["props"] = props
+
+        self._sent_props[image] = (wrapped, frameno, props)
+        return result, []
+
+
+    @future_yield_coro
+    def _handle_request_tile(self, _, content, buffers):
+        wrapped = self._target_for(content)
+        payload = content.get('payload', {})
 
+        if wrapped is None:
+            return {"size": [0, 0], "box": [0, 0, 1, 1]}, [EMPTY_IMAGE]
+
+        frameno = payload.get('frame', self.frame)
+        if frameno >= len(wrapped):
+            frameno = len(wrapped) - 1
+
+        tile_size = self.tile_size
+        if tile_size <= 0:
+            raise ValueError("Tiled mode is disabled.")
+
+        # The size is known without converting the whole frame.
+        with (yield wrapped[frameno]) as frame:
+            size = Size(*frame.size())
+        scale = preview_scale(payload.get('zoom', self.zoom))
+        box = tile_box(level_size(size, scale), tile_size, int(payload['x']), int(payload['y']))
+
+        encoded = yield Yuuno.instance().output.encode_frame(
+            wrapped.region(scale, box), frameno, payload.get('codec', None) or self.codec
+        )
+        return {
+            "size": size,
+            "box": box,
+            "codec": encoded.image.codec,
+            "mime": encoded.image.mime
+        }, [encoded.image.data]
@@ -23,7 +23,7 @@ from traitlets import HasTraits, Instance, Any
 
 from IPython.display import Image as IPyImage
 
-from yuuno.clip import Clip, Frame
+from yuuno.clip import Clip, Size
 from yuuno.audio import Audio
 from yuuno_ipython.ipython.feature import Feature
 from yuuno_ipython.ipython.environment import Environment
@@ -110,13 +110,15 @@ class InlineFormatVideo(AbstractInlineFormat):
 
     preview: Preview = Instance(Preview, allow_none=True)
 
-    first_frame: Frame = Any(allow_none=True)
+    # Holding the first frame would pin its memory for the life of the cell.
+    first_size: Size = Any(allow_none=True)
     _ipy_image_cache: IPyImage = None
 
     @observe("clip")
     def _update_initial_frame(self, value):
         value = value['new']
-        self.first_frame = value[0].result()
+        with value[0].result() as frame:
+            self.first_size = frame.size()
         self._ipy_image_cache = None
         self.preview.clips = {"output": value}
 
@@ -132,10 +134,11 @@ class InlineFormatVideo(AbstractInlineFormat):
         if self._ipy_image_cache is not None:
             return self._ipy_image_cache
 
-        size = self.first_frame.size()
-        raw = self.environment.parent.output.bytes_of(self.first_frame.to_pil())
+        # Displaying the same clip again is served from the cache of the output.
+        encoded = self.environment.parent.output.encode_frame(self.clip, 0).result()
+        size = encoded.size
         self._ipy_image_cache = IPyImage(
-            data=raw,
+            data=encoded.image.data,
             format="png",
             embed=True,
             unconfined=True,
@@ -151,7 +154,7 @@ class InlineFormatVideo(AbstractInlineFormat):
     }
 
     def _repr_pretty(self):
-        size = self.first_frame.size()
+        size = self.first_size
         return f"<{self.clip.clip!r} {size.width}x{size.height}, {len(self.clip)} frames>"
 
     def _repr_png(self, *args, **kwargs):